@@ -0,0 +1,128 @@
+# bench/bench_allocations.py
+#
+# Memory allocated per GET /books page (query + serialization), measured with
+# tracemalloc, for:
+#   orm       select(Book) in a regular Session: identity-mapped ORM instances,
+#             validated against List[BookRead] and jsonable_encoder'd
+#   projected project(Book, BookRead) in a read-only session, rows encoded by
+#             fast_json (what list_books does)
+#
+#   python bench/bench_allocations.py --rows 100 --repeat 200
+#
+# "peak KB" is the high-water mark above the starting point during one
+# request; "live blocks" the number of memory blocks it holds once the body
+# is encoded, before its session closes.
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import fast_json  # noqa: E402
+from models import Book, Family  # noqa: E402
+from projection import project, row_dict  # noqa: E402
+from routes.books import BookRead  # noqa: E402
+
+
+def _seed(rows: int):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Family(id=1, name="Bench", email="bench@example.com"))
+        session.add_all(
+            Book(title=f"Matemáticas {i % 6 + 1}º", author="Pérez", grade=i % 12 + 1,
+                 isbn=f"978{i:010d}", owner_id=1)
+            for i in range(rows)
+        )
+        session.commit()
+    return engine
+
+
+def _peak(fn: Callable[[], object], repeat: int) -> float:
+    """
+    Median high-water mark of traced memory during one call, in bytes.
+    """
+    for _ in range(5):
+        fn()
+    peaks: List[int] = []
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn()
+            peaks.append(tracemalloc.get_traced_memory()[1] - start)
+    finally:
+        tracemalloc.stop()
+    return statistics.median(peaks)
+
+
+def _live_blocks(fn: Callable[[Callable[[], None]], object]) -> int:
+    """
+    Memory blocks the request holds once its body is encoded, just before its
+    session closes (ORM instances, identity map, rows, dicts, the body).
+    """
+    snapshots = []
+    tracemalloc.start()
+    try:
+        snapshots.append(tracemalloc.take_snapshot())
+        fn(lambda: snapshots.append(tracemalloc.take_snapshot()))
+    finally:
+        tracemalloc.stop()
+    before, at_end = snapshots
+    return sum(stat.count_diff for stat in at_end.compare_to(before, "filename"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Allocations per GET /books page.")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = _seed(args.rows)
+    field = create_response_field(name="Response_list_books", type_=List[BookRead])
+    loop = asyncio.new_event_loop()
+
+    def orm_request(checkpoint=lambda: None) -> bytes:
+        with Session(engine) as session:
+            books = session.exec(select(Book).limit(args.rows)).all()
+            content = loop.run_until_complete(
+                serialize_response(field=field, response_content=books, is_coroutine=True)
+            )
+            body = JSONResponse(content).body
+            checkpoint()
+            return body
+
+    def projected_request(checkpoint=lambda: None) -> bytes:
+        # Same settings as database.read_only_session, on the in-memory engine
+        with Session(engine, autoflush=False, expire_on_commit=False) as session:
+            rows = session.exec(project(Book, BookRead, Book.updated_at).limit(args.rows)).all()
+            body = fast_json.dumps([row_dict(row, BookRead) for row in rows])
+            checkpoint()
+            return body
+
+    print(f"{args.rows} rows per page, median of {args.repeat} requests")
+    print(f"{'path':10} {'peak KB':>9} {'live blocks':>12}")
+    for name, fn in (("orm", orm_request), ("projected", projected_request)):
+        peak = _peak(fn, args.repeat)
+        blocks = _live_blocks(fn)
+        print(f"{name:10} {peak / 1024:>9.1f} {blocks:>12}")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
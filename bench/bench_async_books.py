@@ -0,0 +1,121 @@
+# bench/bench_async_books.py
+#
+# Compare GET /books throughput with the sync (threadpool) handlers against
+# the async-engine handlers (ASYNC_DB=true).
+#
+#   python bench/bench_async_books.py --duration 10 --concurrency 200
+#
+# Each mode starts its own uvicorn worker on a fresh SQLite database,
+# seeds it over HTTP, then hammers GET /books with `concurrency` clients.
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+async def _wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(100):
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not come up")
+
+
+async def _seed(client: httpx.AsyncClient, books: int) -> dict:
+    res = await client.post(
+        "/auth/register",
+        json={"username": "bench", "email": "bench@example.com", "password": "bench"},
+    )
+    res.raise_for_status()
+    body = res.json()
+    headers = {"Authorization": f"Bearer {body['access_token']}"}
+    for i in range(books):
+        await client.post(
+            "/books",
+            json={"title": f"Libro {i}", "author": "Autor", "owner_id": body["family_id"]},
+            headers=headers,
+        )
+    return headers
+
+
+async def _hammer(base_url: str, headers: dict, duration: float, concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+        done = 0
+        errors = 0
+
+        async def worker() -> None:
+            nonlocal done, errors
+            while time.perf_counter() < deadline:
+                res = await client.get("/books", params={"limit": 20})
+                if res.status_code == 200:
+                    done += 1
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {"requests": done, "errors": errors, "rps": done / elapsed}
+
+
+def run_mode(async_db: bool, args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+            ASYNC_DB="true" if async_db else "false",
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{args.port}"
+
+            async def scenario() -> dict:
+                async with httpx.AsyncClient(base_url=base_url) as client:
+                    await _wait_ready(client)
+                    headers = await _seed(client, args.books)
+                return await _hammer(base_url, headers, args.duration, args.concurrency)
+
+            return asyncio.run(scenario())
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--books", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    for label, async_db in (("sync", False), ("async", True)):
+        result = run_mode(async_db, args)
+        print(
+            f"{label:>5}: {result['rps']:8.1f} req/s "
+            f"({result['requests']} ok, {result['errors']} errors)"
+        )
+
+
+if __name__ == "__main__":
+    main()
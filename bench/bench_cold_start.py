@@ -0,0 +1,107 @@
+# bench/bench_cold_start.py
+#
+# Measure worker cold start with and without DDL at startup.
+#
+#   python bench/bench_cold_start.py --runs 5
+#   python bench/bench_cold_start.py --database-url postgresql://localhost/bookx_bench
+#
+# The database is migrated once up front, as the pre-start step would. Then:
+#   - startup hook: time the old create_all-at-startup path against the
+#     current check_db() hook, in-process, on a fresh connection each time
+#   - time to ready: spawn uvicorn and time until GET /health answers, with
+#     DB_MIGRATE_ON_STARTUP=true (every worker checks/applies migrations)
+#     and false (the default)
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _time_to_ready(env: dict, port: int) -> float:
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        while True:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except httpx.TransportError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError("server exited during startup")
+            time.sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _hook_times(runs: int) -> dict:
+    from sqlmodel import SQLModel
+
+    import models  # noqa: F401  registers the tables on SQLModel.metadata
+    from database import check_db, engine
+
+    def legacy() -> None:
+        # What every worker used to run on startup
+        SQLModel.metadata.create_all(engine)
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(engine, checkfirst=True)
+
+    results = {}
+    for label, hook in (("create_all at startup", legacy), ("check_db", check_db)):
+        samples = []
+        for _ in range(runs):
+            engine.dispose()
+            started = time.perf_counter()
+            hook()
+            samples.append((time.perf_counter() - started) * 1000)
+        results[label] = samples
+    return results
+
+
+def _summary(samples: list) -> str:
+    return f"median {statistics.median(samples):8.1f}ms  min {min(samples):8.1f}ms  (n={len(samples)})"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure worker cold start.")
+    parser.add_argument("--database-url", help="database to use (default: temporary SQLite file)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='bookx-cold-')}/cold.db"
+    os.environ.update(DATABASE_URL=database_url, DB_ECHO="false", DB_MIGRATE_ON_STARTUP="false")
+    sys.path.insert(0, str(ROOT))
+
+    from database import engine
+    from migrate import upgrade
+
+    upgrade(engine)
+
+    print("startup hook (in-process):")
+    for label, samples in _hook_times(args.runs * 4).items():
+        print(f"  {label:<24} {_summary(samples)}")
+
+    print("time to ready (uvicorn):")
+    for migrate_on_startup in ("true", "false"):
+        env = dict(os.environ, DB_MIGRATE_ON_STARTUP=migrate_on_startup, PASSWORD_HASH_WORKERS="0")
+        samples = [_time_to_ready(env, args.port) for _ in range(args.runs)]
+        print(f"  DB_MIGRATE_ON_STARTUP={migrate_on_startup:<6} {_summary(samples)}")
+
+
+if __name__ == "__main__":
+    main()
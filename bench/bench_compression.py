@@ -0,0 +1,86 @@
+# bench/bench_compression.py
+#
+# CPU cost vs bytes saved by CompressionMiddleware's codings on typical
+# GET /books pages (JSON bodies shaped like BookRead), at several page sizes:
+#
+#   python bench/bench_compression.py --pages 20 100 500 --kbps 10000
+#
+# "net ms" is the transfer time saved at --kbps minus the compression time;
+# positive means compressing makes the response arrive sooner.
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from compression import DEFAULT_LEVELS, Encoder, available_encodings  # noqa: E402
+
+SUBJECTS = ["Matemáticas", "Lengua Castellana", "Ciencias Naturales", "Historia", "Inglés", "Física y Química"]
+AUTHORS = ["Pérez", "García", "Fernández", "López", "Martínez", "Sánchez", "Gómez"]
+
+
+def books_page(rows: int, seed: int = 1) -> bytes:
+    """
+    JSON body of a /books page with `rows` books.
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 9, 1)
+    page = [
+        {
+            "id": i + 1,
+            "title": f"{rng.choice(SUBJECTS)} {rng.randint(1, 6)}º",
+            "author": rng.choice(AUTHORS),
+            "grade": rng.randint(1, 12),
+            "isbn": f"978{rng.randint(10**9, 10**10 - 1)}",
+            "owner_id": rng.randint(1, 5_000),
+            "version": rng.randint(1, 4),
+            "updated_at": (start + timedelta(seconds=rng.randint(0, 10**7))).isoformat(),
+        }
+        for i in range(rows)
+    ]
+    return json.dumps(page).encode()
+
+
+def _time_encoding(body: bytes, encoding: str, level: int, repeat: int):
+    best = float("inf")
+    compressed = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encoder = Encoder(encoding, level)
+        compressed = encoder.compress(body) + encoder.finish()
+        best = min(best, time.perf_counter() - started)
+    return len(compressed), best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compression CPU vs bandwidth for /books pages.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 100, 500], help="rows per page")
+    parser.add_argument("--kbps", type=float, default=10_000, help="client downlink in kbit/s")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    bytes_per_ms = args.kbps * 1000 / 8 / 1000
+    print(f"downlink {args.kbps:.0f} kbit/s; codings available: {', '.join(available_encodings())}")
+    print(f"{'rows':>5} {'coding':8} {'level':>5} {'bytes':>8} {'ratio':>6} {'cpu ms':>7} {'MB/s':>7} {'net ms':>7}")
+    for rows in args.pages:
+        body = books_page(rows)
+        print(f"{rows:>5} {'identity':8} {'-':>5} {len(body):>8} {1:>6.2f} {0:>7.3f} {'-':>7} {0:>7.2f}")
+        for encoding in available_encodings():
+            level = DEFAULT_LEVELS[encoding]
+            size, seconds = _time_encoding(body, encoding, level, args.repeat)
+            cpu_ms = seconds * 1000
+            saved_ms = (len(body) - size) / bytes_per_ms
+            print(
+                f"{rows:>5} {encoding:8} {level:>5} {size:>8} {len(body) / size:>6.2f} "
+                f"{cpu_ms:>7.3f} {len(body) / seconds / 1e6:>7.1f} {saved_ms - cpu_ms:>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
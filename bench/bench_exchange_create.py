@@ -0,0 +1,131 @@
+# bench/bench_exchange_create.py
+#
+# Latency of POST /exchanges validation + insert, database side only:
+#   gets        the previous handler: session.get for both families and both
+#               books (no ownership check), then the INSERT
+#   set-based   exchange_validation.validate_proposals: one query for both
+#               families and both books with their owners, then the INSERT
+#   bulk        POST /exchanges/bulk: one validation query and one insert for
+#               a batch of --batch proposals (reported per proposal)
+#
+#   python bench/bench_exchange_create.py --requests 1000 --rtt-ms 0.5
+#
+# --rtt-ms adds a sleep before every statement to stand in for the network
+# round trip to a database server, which SQLite (in process) does not have.
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from exchange_validation import validate_proposals  # noqa: E402
+from models import Book, Exchange, ExchangeStatus, Family  # noqa: E402
+from projection import read_columns  # noqa: E402
+from returning import insert_many_returning, insert_returning  # noqa: E402
+from routes.exchanges import ExchangeRead  # noqa: E402
+
+FAMILIES = 50
+
+
+def _engine(url: str):
+    engine = create_engine(url)
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            Family(id=i, name=f"Family {i}", email=f"f{i}@example.com") for i in range(1, FAMILIES + 1)
+        )
+        session.add_all(
+            Book(id=i, title=f"Ciencias {i % 6 + 1}º", author="López", owner_id=i)
+            for i in range(1, FAMILIES + 1)
+        )
+        session.commit()
+    return engine
+
+
+def _proposal(i: int) -> Dict:
+    proposer = i % FAMILIES + 1
+    receiver = (i + 1) % FAMILIES + 1
+    return {
+        "proposer_family_id": proposer,
+        "receiver_family_id": receiver,
+        "offered_book_id": proposer,
+        "requested_book_id": receiver,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exchange creation latency.")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--rtt-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    columns = read_columns(ExchangeRead, Exchange)
+
+    def create_gets(session: Session, i: int) -> None:
+        proposal = _proposal(i)
+        assert session.get(Family, proposal["proposer_family_id"])
+        assert session.get(Family, proposal["receiver_family_id"])
+        assert session.get(Book, proposal["offered_book_id"])
+        assert session.get(Book, proposal["requested_book_id"])
+        insert_returning(session, Exchange, {**proposal, "status": ExchangeStatus.pending}, columns)
+        session.commit()
+
+    def create_set_based(session: Session, i: int) -> None:
+        proposal = _proposal(i)
+        assert validate_proposals(session, [proposal]) == [None]
+        insert_returning(session, Exchange, {**proposal, "status": ExchangeStatus.pending}, columns)
+        session.commit()
+
+    def create_bulk(session: Session, i: int) -> None:
+        proposals = [_proposal(i * args.batch + j) for j in range(args.batch)]
+        assert not any(validate_proposals(session, proposals))
+        rows = [{**p, "status": ExchangeStatus.pending} for p in proposals]
+        insert_many_returning(session, Exchange, rows, columns)
+        session.commit()
+
+    cases = [
+        ("gets", create_gets, args.requests, 1),
+        ("set-based", create_set_based, args.requests, 1),
+        ("bulk", create_bulk, max(1, args.requests // args.batch), args.batch),
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        engine = _engine(f"sqlite:///{directory}/bench.db")
+        counter = {"statements": 0}
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _round_trip(*_args, **_kwargs):
+            counter["statements"] += 1
+            if args.rtt_ms:
+                time.sleep(args.rtt_ms / 1000)
+
+        print(f"{args.requests} proposals, rtt {args.rtt_ms} ms")
+        print(f"{'path':10} {'p50 ms':>8} {'p95 ms':>8} {'statements':>11}   (per proposal)")
+        for name, create, calls, per_call in cases:
+            counter["statements"] = 0
+            samples: List[float] = []
+            for i in range(calls):
+                # A fresh session per request, as in the app: nothing cached
+                with Session(engine) as session:
+                    started = time.perf_counter()
+                    create(session, i)
+                    samples.append((time.perf_counter() - started) / per_call)
+            p50 = statistics.median(samples) * 1000
+            p95 = statistics.quantiles(samples, n=20)[-1] * 1000 if len(samples) > 1 else p50
+            per_proposal = counter["statements"] / (calls * per_call)
+            print(f"{name:10} {p50:>8.3f} {p95:>8.3f} {per_proposal:>11.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# bench/bench_login_storm.py
+#
+# Show how a storm of logins affects GET /books latency on the same worker.
+#
+#   python bench/bench_login_storm.py --logins 200 --login-concurrency 32
+#
+# Runs the scenario twice: with bcrypt inline (PASSWORD_HASH_WORKERS=0) and
+# with the hashing process pool, printing GET /books p50/p95/max latency
+# while idle and while the login storm is running.
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+async def _wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(100):
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not come up")
+
+
+async def _probe_books(client: httpx.AsyncClient, headers: dict, stop: asyncio.Event) -> list:
+    """
+    Issue GET /books back to back until `stop` is set, returning latencies in ms.
+    """
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/books", params={"limit": 20}, headers=headers)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def _login_storm(client: httpx.AsyncClient, logins: int, concurrency: int) -> dict:
+    statuses: dict = {}
+    queue = iter(range(logins))
+
+    async def worker() -> None:
+        for _ in queue:
+            res = await client.post("/auth/token", data={"username": "bench", "password": "bench"})
+            statuses[res.status_code] = statuses.get(res.status_code, 0) + 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return statuses
+
+
+def _summary(latencies: list) -> str:
+    if not latencies:
+        return "no samples"
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (
+        f"p50 {statistics.median(ordered):7.1f}ms  p95 {p95:7.1f}ms  "
+        f"max {ordered[-1]:7.1f}ms  (n={len(ordered)})"
+    )
+
+
+async def _scenario(base_url: str, args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.login_concurrency + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await _wait_ready(client)
+        res = await client.post(
+            "/auth/register",
+            json={"username": "bench", "email": "bench@example.com", "password": "bench"},
+        )
+        res.raise_for_status()
+        headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe_books(client, headers, stop))
+        await asyncio.sleep(args.idle)
+        stop.set()
+        idle = await probe
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe_books(client, headers, stop))
+        statuses = await _login_storm(client, args.logins, args.login_concurrency)
+        stop.set()
+        storm = await probe
+
+    print(f"    idle:  {_summary(idle)}")
+    print(f"    storm: {_summary(storm)}  logins by status {statuses}")
+
+
+def run_mode(workers: int, args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+            PASSWORD_HASH_WORKERS=str(workers),
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            asyncio.run(_scenario(f"http://127.0.0.1:{args.port}", args))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=2, help="hashing pool size to compare against inline")
+    parser.add_argument("--idle", type=float, default=3.0, help="seconds of idle baseline")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    for label, workers in (("inline bcrypt", 0), (f"process pool ({args.workers})", args.workers)):
+        print(label)
+        run_mode(workers, args)
+
+
+if __name__ == "__main__":
+    main()
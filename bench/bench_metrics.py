@@ -0,0 +1,123 @@
+# bench/bench_metrics.py
+#
+# Overhead of the per-route request metrics (request_metrics.py) on GET /books.
+# Two apps are built in one process, with and without RequestMetricsMiddleware,
+# the route wrappers and the SQL statement listeners, and called in-process
+# (httpx ASGI transport: no network noise) in many short paired rounds,
+# alternating which goes first. Rounds are timed in process CPU time, and the
+# overhead is the median of the per-pair on/off ratios, so load on the rest
+# of the machine mostly cancels out:
+#
+#   python bench/bench_metrics.py --rounds 300 --requests 10 --limit 100
+#
+# Fails if that overhead exceeds --max-overhead percent (default 2).
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import event
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+async def _seed(client: httpx.AsyncClient, books: int) -> dict:
+    res = await client.post(
+        "/auth/register",
+        json={"username": "bench", "email": "bench@example.com", "password": "bench"},
+    )
+    res.raise_for_status()
+    body = res.json()
+    headers = {"Authorization": f"Bearer {body['access_token']}"}
+    for i in range(books):
+        res = await client.post(
+            "/books",
+            json={"title": f"Historia {i % 6 + 1}º", "author": "Martín", "owner_id": body["family_id"]},
+            headers=headers,
+        )
+        res.raise_for_status()
+    return headers
+
+
+async def _round(client: httpx.AsyncClient, requests: int, limit: int) -> float:
+    started = time.process_time()
+    for _ in range(requests):
+        res = await client.get("/books", params={"limit": limit})
+        assert res.status_code == 200, res.status_code
+    return (time.process_time() - started) / requests
+
+
+def _set_query_listeners(engine, enabled: bool, request_metrics) -> None:
+    for name, fn in (
+        ("before_cursor_execute", request_metrics._before_cursor_execute),
+        ("after_cursor_execute", request_metrics._after_cursor_execute),
+    ):
+        if enabled and not event.contains(engine, name, fn):
+            event.listen(engine, name, fn)
+        elif not enabled and event.contains(engine, name, fn):
+            event.remove(engine, name, fn)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Request metrics overhead on GET /books.")
+    parser.add_argument("--rounds", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--max-overhead", type=float, default=2.0)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{tmp.name}/bench.db",
+        PASSWORD_HASH_WORKERS="0",
+        REQUEST_METRICS="true",
+    )
+    import request_metrics
+    from database import engine, init_db
+    from main import create_app
+
+    init_db()
+    with_metrics = create_app()
+    request_metrics.REQUEST_METRICS_ENABLED = False
+    without_metrics = create_app()
+
+    clients = {
+        name: httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        for name, app in (("off", without_metrics), ("on", with_metrics))
+    }
+    headers = await _seed(clients["off"], args.limit)
+    for client in clients.values():
+        client.headers.update(headers)
+        client.headers["Accept-Encoding"] = "identity"
+        await _round(client, 20, args.limit)  # warm up
+
+    samples = {"off": [], "on": []}
+    for i in range(args.rounds):
+        order = ["off", "on"] if i % 2 == 0 else ["on", "off"]
+        for name in order:
+            _set_query_listeners(engine, name == "on", request_metrics)
+            samples[name].append(await _round(clients[name], args.requests, args.limit))
+    for client in clients.values():
+        await client.aclose()
+    tmp.cleanup()
+
+    ratios = [on / off for off, on in zip(samples["off"], samples["on"])]
+    overhead = (statistics.median(ratios) - 1) * 100
+    print(f"GET /books?limit={args.limit}, {args.rounds} rounds x {args.requests} requests")
+    print(f"{'metrics':8} {'CPU ms/request':>15}")
+    for name in ("off", "on"):
+        print(f"{name:8} {statistics.median(samples[name]) * 1000:>15.3f}")
+    print(f"overhead {overhead:+.2f}%")
+    if overhead > args.max_overhead:
+        sys.exit(f"overhead above {args.max_overhead}%")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
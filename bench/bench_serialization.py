@@ -0,0 +1,118 @@
+# bench/bench_serialization.py
+#
+# Per-page cost of turning a GET /books page into JSON bytes:
+#   orm+pydantic  ORM Book instances validated against List[BookRead] and run
+#                 through jsonable_encoder, as FastAPI does with response_model
+#   rows+json     BookRead columns as plain rows, encoded by fast_json with the
+#                 standard library json module
+#   rows+orjson   the same with orjson (the fast path when orjson is installed)
+# Each is timed with and without the query that produces its input:
+#
+#   python bench/bench_serialization.py --rows 100 --repeat 500
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import fast_json  # noqa: E402
+from projection import read_columns  # noqa: E402
+from models import Book, Family  # noqa: E402
+from routes.books import BookRead  # noqa: E402
+
+
+def _seed(rows: int):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Family(id=1, name="Bench", email="bench@example.com"))
+        session.add_all(
+            Book(title=f"Matemáticas {i % 6 + 1}º", author="Pérez", grade=i % 12 + 1,
+                 isbn=f"978{i:010d}", owner_id=1)
+            for i in range(rows)
+        )
+        session.commit()
+    return engine
+
+
+def _timed(fn: Callable[[], object], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="GET /books page serialization cost.")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    engine = _seed(args.rows)
+    field = create_response_field(name="Response_list_books", type_=List[BookRead])
+    columns = read_columns(BookRead, Book)
+    loop = asyncio.new_event_loop()
+
+    def pydantic_path(books) -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=books, is_coroutine=True)
+        )
+        return JSONResponse(content).body
+
+    def rows_path(rows, use_orjson: bool) -> bytes:
+        saved = fast_json.orjson
+        if not use_orjson:
+            fast_json.orjson = None
+        try:
+            return fast_json.dumps([dict(zip(BookRead.__fields__, row)) for row in rows])
+        finally:
+            fast_json.orjson = saved
+
+    with Session(engine) as session:
+        books = session.exec(select(Book).limit(args.rows)).all()
+        rows = session.exec(select(*columns).limit(args.rows)).all()
+        assert pydantic_path(books) == rows_path(rows, False), "fast path output differs"
+
+        def orm_query():
+            session.expunge_all()
+            return session.exec(select(Book).limit(args.rows)).all()
+
+        def rows_query():
+            return session.exec(select(*columns).limit(args.rows)).all()
+
+        cases = [
+            ("orm+pydantic", lambda: pydantic_path(books), lambda: pydantic_path(orm_query())),
+            ("rows+json", lambda: rows_path(rows, False), lambda: rows_path(rows_query(), False)),
+        ]
+        if fast_json.orjson is not None:
+            cases.append(
+                ("rows+orjson", lambda: rows_path(rows, True), lambda: rows_path(rows_query(), True))
+            )
+
+        print(f"{args.rows} rows per page, median of {args.repeat} runs")
+        print(f"{'path':14} {'serialize ms':>13} {'query+serialize ms':>19}")
+        for name, serialize_only, with_query in cases:
+            a = statistics.median(_timed(serialize_only, args.repeat)) * 1000
+            b = statistics.median(_timed(with_query, args.repeat)) * 1000
+            print(f"{name:14} {a:>13.3f} {b:>19.3f}")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# bench/bench_sse_idle.py
+#
+# Open many idle GET /exchanges/stream connections against one worker and
+# report its memory per connection, then time how long an exchange update
+# takes to reach every stream:
+#
+#   python bench/bench_sse_idle.py --streams 10000
+#
+# Needs a file-descriptor limit above 2 x streams (ulimit -n).
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+async def _wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(100):
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not come up")
+
+
+async def _scenario(base_url: str, pid: int, args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.streams + 10, max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await _wait_ready(client)
+        family_ids = []
+        headers = []
+        for name in ("sender", "receiver"):
+            res = await client.post(
+                "/auth/register",
+                json={"username": name, "email": f"{name}@example.com", "password": "bench"},
+            )
+            family_ids.append(res.json()["family_id"])
+            headers.append({"Authorization": f"Bearer {res.json()['access_token']}"})
+        books = []
+        for family_id in family_ids:
+            res = await client.post(
+                "/books", json={"title": "Bench", "author": "Bench", "owner_id": family_id},
+                headers=headers[0],
+            )
+            books.append(res.json()["id"])
+        res = await client.post(
+            "/exchanges",
+            json={"proposer_family_id": family_ids[0], "receiver_family_id": family_ids[1],
+                  "offered_book_id": books[0], "requested_book_id": books[1]},
+            headers=headers[0],
+        )
+        exchange_id = res.json()["id"]
+
+        baseline = _rss_mb(pid)
+        opened = asyncio.Event()
+        received: list = []
+        ready = 0
+        sent_at = 0.0
+
+        async def stream() -> None:
+            nonlocal ready
+            async with client.stream("GET", "/exchanges/stream", headers=headers[1]) as res:
+                async for line in res.aiter_lines():
+                    if line.startswith("retry:"):
+                        ready += 1
+                        if ready == args.streams:
+                            opened.set()
+                    elif line.startswith("event:"):
+                        received.append(time.perf_counter() - sent_at)
+                        return
+
+        started = time.perf_counter()
+        tasks = []
+        for _ in range(args.streams):
+            tasks.append(asyncio.create_task(stream()))
+            if len(tasks) % 500 == 0:
+                await asyncio.sleep(0.05)
+        await opened.wait()
+        open_seconds = time.perf_counter() - started
+        await asyncio.sleep(1)
+        loaded = _rss_mb(pid)
+
+        sent_at = time.perf_counter()
+        await client.put(f"/exchanges/{exchange_id}", json={"status": "accepted"}, headers=headers[0])
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=60)
+
+        per_stream_kb = (loaded - baseline) * 1024 / args.streams
+        print(f"streams:     {args.streams} opened in {open_seconds:.1f}s")
+        print(f"worker RSS:  {baseline:.0f} MB idle -> {loaded:.0f} MB ({per_stream_kb:.1f} KB per stream)")
+        print(
+            f"fan-out:     first {min(received) * 1000:.0f}ms  "
+            f"median {statistics.median(received) * 1000:.0f}ms  last {max(received) * 1000:.0f}ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Idle SSE connections per worker.")
+    parser.add_argument("--streams", type=int, default=2_000)
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bookx-sse-")
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+        DB_MIGRATE_ON_STARTUP="true",
+        DB_ECHO="false",
+        PASSWORD_HASH_WORKERS="0",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+         "--log-level", "warning", "--backlog", str(args.streams)],
+        cwd=ROOT, env=env,
+    )
+    try:
+        asyncio.run(_scenario(f"http://127.0.0.1:{args.port}", server.pid, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# bench/bench_static.py
+#
+# Bytes on the wire and a modelled time-to-interactive for the SPA, served by
+# plain StaticFiles (before) and by the fingerprinted, precompressed
+# StaticAssets (after), on a first visit and on a repeat visit with a warm
+# browser cache:
+#
+#   python bench/bench_static.py --rtt-ms 150 --kbps 1600
+#
+# The page is interactive once index.html and every script/stylesheet it
+# references have loaded; subresources are fetched in parallel after the HTML.
+
+import argparse
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+from starlette.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from static_assets import StaticAssets  # noqa: E402
+
+_REFERENCE_RE = re.compile(r'<(?:script|link)\b[^>]*\b(?:src|href)="([^"]+)"', re.IGNORECASE)
+
+ACCEPT_ENCODING = "br, gzip, deflate"
+
+
+class BrowserCache:
+    """
+    Just enough of a browser HTTP cache: fresh immutable entries are reused
+    without a request, everything else is revalidated with its validators.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, Dict[str, str]] = {}
+
+    def fetch(self, client: TestClient, path: str) -> Tuple[int, bytes]:
+        """
+        Fetch `path`; return (bytes transferred, decoded body).
+        """
+        cached = self.entries.get(path)
+        if cached is not None and "immutable" in cached.get("cache-control", ""):
+            return 0, cached["body"].encode("latin-1")
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        if cached is not None:
+            if "etag" in cached:
+                headers["If-None-Match"] = cached["etag"]
+            if "last-modified" in cached:
+                headers["If-Modified-Since"] = cached["last-modified"]
+        res = client.get(path, headers=headers)
+        wire = _header_bytes(res) + res.num_bytes_downloaded
+        if res.status_code == 304:
+            return wire, cached["body"].encode("latin-1")
+        self.entries[path] = {
+            **{k: v for k, v in res.headers.items() if k in ("etag", "last-modified", "cache-control")},
+            "body": res.content.decode("latin-1"),
+        }
+        return wire, res.content
+
+
+def _header_bytes(res) -> int:
+    status_line = len(f"HTTP/1.1 {res.status_code} {res.reason_phrase}\r\n")
+    return status_line + sum(len(k) + len(v) + 4 for k, v in res.headers.raw) + 2
+
+
+def _visit(client: TestClient, cache: BrowserCache, rtt: float, bytes_per_s: float):
+    """
+    Load the page once; return (bytes, requests, modelled seconds to interactive).
+    """
+    wire, html = cache.fetch(client, "/")
+    requests = 1 if wire else 0
+    tti = (rtt if wire else 0) + wire / bytes_per_s
+    subresources: List[int] = []
+    for url in _REFERENCE_RE.findall(html.decode()):
+        transferred, _ = cache.fetch(client, "/" + url.lstrip("/"))
+        subresources.append(transferred)
+        requests += 1 if transferred else 0
+    wire += sum(subresources)
+    if any(subresources):
+        # Parallel fetches: one round trip, then the bytes share the link
+        tti += rtt + sum(subresources) / bytes_per_s
+    return wire, requests, tti
+
+
+def _measure(app, label: str, args: argparse.Namespace) -> None:
+    rtt = args.rtt_ms / 1000
+    bytes_per_s = args.kbps * 1000 / 8
+    with TestClient(app) as client:
+        cache = BrowserCache()
+        for visit in ("first", "repeat"):
+            wire, requests, tti = _visit(client, cache, rtt, bytes_per_s)
+            print(f"{label:8} {visit:7} {wire:8} bytes  {requests} requests  TTI ~{tti * 1000:.0f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Static asset bytes and modelled TTI.")
+    parser.add_argument("--rtt-ms", type=float, default=150)
+    parser.add_argument("--kbps", type=float, default=1600, help="downlink in kbit/s")
+    parser.add_argument("--directory", default=str(ROOT / "client"))
+    args = parser.parse_args()
+
+    before = Starlette(routes=[Mount("/", StaticFiles(directory=args.directory, html=True))])
+    after = Starlette(routes=[Mount("/", StaticAssets(directory=args.directory))])
+    print(f"network: {args.rtt_ms:.0f} ms RTT, {args.kbps:.0f} kbit/s")
+    _measure(before, "before", args)
+    _measure(after, "after", args)
+
+
+if __name__ == "__main__":
+    main()
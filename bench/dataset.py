@@ -0,0 +1,243 @@
+# bench/dataset.py
+#
+# Generate a synthetic school: families, one user per family, their textbooks
+# (Spanish curriculum titles) and exchanges between them in every status.
+# Rows go straight in with multi-row Core INSERTs in batches, bypassing the
+# API, so 10M rows take minutes rather than days. The schema is migrated
+# first; the database must be empty.
+#
+#   python bench/dataset.py --rows 100k --database-url sqlite:///bench.db
+#   python bench/dataset.py --rows 10M --database-url postgresql://localhost/bookx_bench
+#
+# --rows is the approximate total, split 1 : 1 : 5 : 3 between families,
+# users, books and exchanges. The same --seed gives the same dataset. A
+# manifest (--manifest, default dataset.json) records the counts and the
+# shared login password for bench/loadgen.py:
+#   - user N is `familiaN` and acts for family N
+#   - family N owns books N, N + families, N + 2 * families, ...
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BOOKS_PER_FAMILY = 5
+EXCHANGES_PER_FAMILY = 3
+# families + users + books + exchanges per family
+ROWS_PER_FAMILY = 2 + BOOKS_PER_FAMILY + EXCHANGES_PER_FAMILY
+
+# (status, weight): most proposals have been settled, a fair share is open
+STATUS_WEIGHTS = (("pending", 3), ("accepted", 4), ("rejected", 3))
+
+COMMON_SUBJECTS = ("Matemáticas", "Lengua Castellana y Literatura", "Inglés")
+# (level, grades, subjects): 1º-6º Primaria, 1º-4º ESO, 1º-2º Bachillerato
+LEVELS = (
+    ("Primaria", 6, COMMON_SUBJECTS + (
+        "Ciencias de la Naturaleza", "Ciencias Sociales", "Música", "Educación Plástica",
+        "Religión", "Valencià", "Català",
+    )),
+    ("ESO", 4, COMMON_SUBJECTS + (
+        "Geografía e Historia", "Física y Química", "Biología y Geología", "Francés",
+        "Tecnología", "Educación Plástica y Visual", "Música", "Valores Éticos", "Latín",
+    )),
+    ("Bachillerato", 2, COMMON_SUBJECTS + (
+        "Filosofía", "Historia de España", "Física", "Química", "Biología", "Latín",
+        "Economía", "Dibujo Técnico",
+    )),
+)
+EDITIONS = (
+    "", "", "", " (Proyecto Saber Hacer)", " (Edición 2022)", " - Cuaderno de ejercicios", " (LOMLOE)",
+)
+PUBLISHERS = (
+    "Santillana", "Anaya", "SM", "Edelvives", "Vicens Vives", "Oxford University Press",
+    "McGraw-Hill", "Editex", "Bruño", "Casals", "Teide", "Edebé",
+)
+SURNAMES = (
+    "García", "Rodríguez", "González", "Fernández", "López", "Martínez", "Sánchez", "Pérez",
+    "Gómez", "Martín", "Jiménez", "Ruiz", "Hernández", "Díaz", "Moreno", "Muñoz", "Álvarez",
+    "Romero", "Alonso", "Gutiérrez", "Navarro", "Torres", "Domínguez", "Vázquez", "Ramos",
+    "Gil", "Ramírez", "Serrano", "Blanco", "Molina", "Castro", "Ortega", "Rubio", "Núñez",
+)
+
+
+def parse_rows(value: str) -> int:
+    """
+    "1k", "250k", "10M" or a plain integer.
+    """
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    value = value.strip().lower().replace("_", "")
+    if value[-1:] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+
+def _isbn(rng: random.Random) -> str:
+    digits = [9, 7, 8, 8, 4] + [rng.randrange(10) for _ in range(7)]
+    check = (10 - sum(d * (3 if i % 2 else 1) for i, d in enumerate(digits)) % 10) % 10
+    return "".join(map(str, digits + [check]))
+
+
+def _batches(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def families(n: int, rng: random.Random) -> Iterator[dict]:
+    for i in range(1, n + 1):
+        first, second = rng.choice(SURNAMES), rng.choice(SURNAMES)
+        yield {"id": i, "name": f"Familia {first} {second}", "email": f"familia{i}@example.com"}
+
+
+def users(n: int, hashed_password: str, now: datetime) -> Iterator[dict]:
+    for i in range(1, n + 1):
+        yield {
+            "id": i, "username": f"familia{i}", "email": f"familia{i}@example.com",
+            "hashed_password": hashed_password, "is_active": True, "updated_at": now,
+        }
+
+
+def books(n_families: int, rng: random.Random, now: datetime) -> Iterator[dict]:
+    for i in range(1, n_families * BOOKS_PER_FAMILY + 1):
+        level, grades, subjects = rng.choice(LEVELS)
+        grade = rng.randint(1, grades)
+        yield {
+            "id": i,
+            "title": f"{rng.choice(subjects)} {grade}º {level}{rng.choice(EDITIONS)}",
+            "author": rng.choice(PUBLISHERS),
+            "grade": grade,
+            "isbn": _isbn(rng) if rng.random() < 0.8 else None,
+            "owner_id": (i - 1) % n_families + 1,
+            "version": 1,
+            "updated_at": now,
+        }
+
+
+def exchanges(n_families: int, rng: random.Random, now: datetime) -> Iterator[dict]:
+    statuses = [status for status, weight in STATUS_WEIGHTS for _ in range(weight)]
+    start = now - timedelta(days=365)
+    for i in range(1, n_families * EXCHANGES_PER_FAMILY + 1):
+        proposer = rng.randint(1, n_families)
+        receiver = rng.randint(1, n_families - 1)
+        receiver += receiver >= proposer
+        status = rng.choice(statuses)
+        created = start + timedelta(seconds=rng.randrange(365 * 86400))
+        settled = status != "pending"
+        yield {
+            "id": i,
+            "proposer_family_id": proposer,
+            "receiver_family_id": receiver,
+            "offered_book_id": proposer + n_families * rng.randrange(BOOKS_PER_FAMILY),
+            "requested_book_id": receiver + n_families * rng.randrange(BOOKS_PER_FAMILY),
+            "status": status,
+            "created_at": created,
+            "updated_at": created + timedelta(hours=rng.randint(1, 240)) if settled else created,
+            "version": 2 if settled else 1,
+        }
+
+
+def _load(conn, table, rows: Iterator[dict], total: int, batch_size: int) -> None:
+    started = time.perf_counter()
+    done = 0
+    for batch in _batches(rows, batch_size):
+        with conn.begin():
+            conn.execute(table.insert(), batch)
+        done += len(batch)
+        rate = done / (time.perf_counter() - started)
+        print(f"\r{table.name:9} {done:>11,}/{total:,} ({rate:,.0f} rows/s)", end="", flush=True)
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic school dataset.")
+    parser.add_argument("--rows", type=parse_rows, default=parse_rows("10k"),
+                        help="approximate total rows, e.g. 1k, 100k, 10M (default 10k)")
+    parser.add_argument("--database-url", help="empty database to fill (default: DATABASE_URL)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--password", default="bench", help="login password of every user")
+    parser.add_argument("--manifest", default="dataset.json")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("DB_ECHO", "false")
+
+    from sqlalchemy import func, select, text
+
+    from database import engine, init_db
+    from models import Book, Exchange, Family, User
+    from passwords import get_password_hash
+
+    n_families = max(args.rows // ROWS_PER_FAMILY, 2)
+    init_db()
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(Family.__table__)).scalar():
+            sys.exit("database is not empty; generate into a fresh one")
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    # One bcrypt hash for everyone: hashing millions would dominate the run
+    hashed_password = get_password_hash(args.password)
+    tables: Dict[str, Callable[[], Iterator[dict]]] = {
+        "family": lambda: families(n_families, rng),
+        "user": lambda: users(n_families, hashed_password, now),
+        "book": lambda: books(n_families, rng, now),
+        "exchange": lambda: exchanges(n_families, rng, now),
+    }
+    totals = {
+        "family": n_families,
+        "user": n_families,
+        "book": n_families * BOOKS_PER_FAMILY,
+        "exchange": n_families * EXCHANGES_PER_FAMILY,
+    }
+
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            # A throwaway bench database: skip the fsync per batch
+            conn.exec_driver_sql("PRAGMA synchronous = OFF")
+        for model in (Family, User, Book, Exchange):
+            table = model.__table__
+            _load(conn, table, tables[table.name](), totals[table.name], args.batch_size)
+        with conn.begin():
+            if engine.dialect.name == "postgresql":
+                # Ids were given explicitly: move the sequences past them
+                for model in (Family, User, Book, Exchange):
+                    name = model.__table__.name
+                    conn.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('\"{name}\"', 'id'), "
+                        f"(SELECT max(id) FROM \"{name}\"))"
+                    ))
+            conn.execute(text("ANALYZE"))
+    elapsed = time.perf_counter() - started
+
+    manifest = {
+        "database_url": engine.url.render_as_string(hide_password=True),
+        "seed": args.seed,
+        "password": args.password,
+        "families": n_families,
+        "users": n_families,
+        "books": totals["book"],
+        "exchanges": totals["exchange"],
+        "books_per_family": BOOKS_PER_FAMILY,
+        "generated_at": now.isoformat() + "Z",
+    }
+    Path(args.manifest).write_text(json.dumps(manifest, indent=2) + "\n")
+    print(f"{sum(totals.values()):,} rows in {elapsed:.1f}s; manifest written to {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
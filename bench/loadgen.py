@@ -0,0 +1,346 @@
+# bench/loadgen.py
+#
+# Replay a realistic traffic mix against a dataset from bench/dataset.py and
+# record throughput and latency percentiles per endpoint. Each virtual user
+# logs in as a random family, then runs a session of weighted actions (browse
+# the catalogue page by page, open a book, search, check the family inbox,
+# propose an exchange) with an optional think time, and logs in again when
+# the session ends. Closed loop: --users requests are in flight at most.
+#
+#   python bench/dataset.py --rows 100k --database-url sqlite:///bench.db
+#   python bench/loadgen.py --dataset dataset.json --duration 60 --users 50 --output run.json
+#   python bench/loadgen.py --dataset dataset.json --compare run.json --max-regression 10
+#
+# Without --base-url a uvicorn worker is started on the dataset's database,
+# with the current environment (so ASYNC_DB=true etc. apply). Requests made
+# during --warmup seconds are not recorded. --compare checks p95 latency and
+# throughput per endpoint against an earlier result file and exits non-zero
+# when either got worse by more than --max-regression percent.
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Action weights within a session; one login starts each session
+MIX = {
+    "browse": 30,
+    "book": 20,
+    "search": 20,
+    "inbox": 15,
+    "propose": 10,
+}
+# Requests per session (after the login), drawn uniformly
+SESSION_LENGTH = (10, 40)
+# Extra catalogue pages a browse follows through X-Next-Cursor, at most
+BROWSE_MAX_PAGES = 3
+SEARCH_TERMS = (
+    "matemáticas", "mate 3", "lengua", "lengua castellana 2", "ingles", "inglés eso",
+    "historia", "geografia historia", "física y química", "fisica 1", "biologia geologia",
+    "ciencias naturaleza", "musica primaria", "latín", "filosofia", "tecnologia 4",
+    "santillana", "anaya matematicas", "vicens vives", "cuaderno", "lomloe", "català",
+)
+PERCENTILES = (50, 95, 99)
+
+
+class Recorder:
+    """
+    Latencies and statuses per endpoint, for requests started after the warm-up.
+    """
+
+    def __init__(self, record_from: float):
+        self.record_from = record_from
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Counter = Counter()
+
+    async def request(
+        self, client: httpx.AsyncClient, label: str, method: str, url: str, ok=(200,), **kwargs
+    ) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as exc:
+            response, status = None, type(exc).__name__
+        else:
+            status = str(response.status_code)
+        if started >= self.record_from:
+            self.latencies[label].append(time.perf_counter() - started)
+            self.statuses[label][status] += 1
+            if response is None or response.status_code not in ok:
+                self.errors[label] += 1
+        return response
+
+
+def _percentile(ordered: List[float], p: float) -> float:
+    # Nearest rank
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    summary = {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 2),
+    }
+    if ordered:
+        summary["mean_ms"] = round(sum(ordered) / len(ordered) * 1000, 3)
+        for p in PERCENTILES:
+            summary[f"p{p}_ms"] = round(_percentile(ordered, p) * 1000, 3)
+        summary["max_ms"] = round(ordered[-1] * 1000, 3)
+    return summary
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, dataset: dict, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.dataset = dataset
+        self.rng = rng
+        self.family = 1
+        self.headers: Dict[str, str] = {}
+
+    def _own_book(self) -> int:
+        return self.family + self.dataset["families"] * self.rng.randrange(self.dataset["books_per_family"])
+
+    def _other_book(self) -> int:
+        families = self.dataset["families"]
+        other = self.rng.randint(1, families - 1)
+        other += other >= self.family
+        return other + families * self.rng.randrange(self.dataset["books_per_family"])
+
+    async def login(self) -> bool:
+        self.family = self.rng.randint(1, self.dataset["families"])
+        response = await self.recorder.request(
+            self.client, "POST /auth/token", "POST", "/auth/token",
+            data={"username": f"familia{self.family}", "password": self.dataset["password"]},
+        )
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+
+    async def browse(self) -> None:
+        cursor = ""
+        for _ in range(self.rng.randint(1, BROWSE_MAX_PAGES)):
+            response = await self.recorder.request(
+                self.client, "GET /books", "GET", "/books",
+                params={"after": cursor, "limit": 20}, headers=self.headers,
+            )
+            cursor = response is not None and response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return
+
+    async def book(self) -> None:
+        book_id = self.rng.randint(1, self.dataset["books"])
+        await self.recorder.request(
+            self.client, "GET /books/{book_id}", "GET", f"/books/{book_id}", headers=self.headers
+        )
+
+    async def search(self) -> None:
+        await self.recorder.request(
+            self.client, "GET /books/search", "GET", "/books/search",
+            params={"q": self.rng.choice(SEARCH_TERMS)}, headers=self.headers,
+        )
+
+    async def inbox(self) -> None:
+        await self.recorder.request(
+            self.client, "GET /families/{family_id}/exchanges", "GET",
+            f"/families/{self.family}/exchanges",
+            params={"direction": "in", "status": "pending", "limit": 20}, headers=self.headers,
+        )
+
+    async def propose(self) -> None:
+        requested = self._other_book()
+        await self.recorder.request(
+            self.client, "POST /exchanges", "POST", "/exchanges", ok=(201,),
+            json={
+                "proposer_family_id": self.family,
+                "receiver_family_id": (requested - 1) % self.dataset["families"] + 1,
+                "offered_book_id": self._own_book(),
+                "requested_book_id": requested,
+            },
+            headers=self.headers,
+        )
+
+    async def run(self, deadline: float, think_ms: float) -> None:
+        actions = list(MIX)
+        weights = list(MIX.values())
+        while time.perf_counter() < deadline:
+            if not await self.login():
+                await asyncio.sleep(0.1)
+                continue
+            for _ in range(self.rng.randint(*SESSION_LENGTH)):
+                if time.perf_counter() >= deadline:
+                    return
+                await getattr(self, self.rng.choices(actions, weights)[0])()
+                if think_ms:
+                    await asyncio.sleep(self.rng.expovariate(1000 / think_ms))
+
+
+async def _wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(300):
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not become ready")
+
+
+async def run_load(base_url: str, dataset: dict, args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        await _wait_ready(client)
+        started = time.perf_counter()
+        recorder = Recorder(record_from=started + args.warmup)
+        deadline = started + args.warmup + args.duration
+        users = [
+            VirtualUser(client, recorder, dataset, random.Random(f"{args.seed}-{i}"))
+            for i in range(args.users)
+        ]
+        await asyncio.gather(*(user.run(deadline, args.think_ms) for user in users))
+        # Sessions stop at the deadline; the last responses may land a bit later
+        elapsed = max(time.perf_counter() - recorder.record_from, 1e-9)
+
+    endpoints = {
+        label: {
+            **summarize(recorder.latencies[label], recorder.errors[label], elapsed),
+            "statuses": dict(sorted(recorder.statuses[label].items())),
+        }
+        for label in sorted(recorder.latencies)
+    }
+    every = [latency for latencies in recorder.latencies.values() for latency in latencies]
+    return {"total": summarize(every, sum(recorder.errors.values()), elapsed), "endpoints": endpoints}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _start_server(database_url: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=database_url)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def print_report(result: dict) -> None:
+    columns = ("requests", "errors", "throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+    width = max(len(label) for label in [*result["endpoints"], "total"])
+    print(f"{'endpoint':{width}} " + " ".join(f"{c:>14}" for c in columns))
+    rows = [*result["endpoints"].items(), ("total", result["total"])]
+    for label, summary in rows:
+        print(f"{label:{width}} " + " ".join(f"{summary.get(c, '-'):>14}" for c in columns))
+
+
+def compare(result: dict, baseline: dict, max_regression: float) -> List[str]:
+    """
+    Print p95 latency and throughput of each endpoint against `baseline`, and
+    return the changes worse than `max_regression` percent.
+    """
+    regressions = []
+    print(f"\nagainst baseline (commit {baseline['meta'].get('git_commit')}):")
+    for key in ("users", "think_ms", "mix", "dataset"):
+        if baseline["meta"].get(key) != result["meta"].get(key):
+            print(f"  warning: {key} differs from the baseline run; numbers are not comparable")
+    rows = [*result["endpoints"].items(), ("total", result["total"])]
+    for label, summary in rows:
+        before = baseline["total"] if label == "total" else baseline["endpoints"].get(label)
+        if not before or "p95_ms" not in before or "p95_ms" not in summary:
+            continue
+        p95 = (summary["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+        rps = (summary["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0.0
+        print(f"  {label}: p95 {before['p95_ms']} -> {summary['p95_ms']} ms ({p95:+.1f}%), "
+              f"throughput {before['throughput_rps']} -> {summary['throughput_rps']} req/s ({rps:+.1f}%)")
+        if p95 > max_regression:
+            regressions.append(f"{label}: p95 latency {p95:+.1f}%")
+        if -rps > max_regression:
+            regressions.append(f"{label}: throughput {rps:+.1f}%")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a realistic traffic mix and report latencies.")
+    parser.add_argument("--dataset", default="dataset.json", help="manifest written by bench/dataset.py")
+    parser.add_argument("--base-url", help="running server to test (default: start one)")
+    parser.add_argument("--database-url", help="database of the started server (default: the manifest's)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="recorded seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unrecorded seconds first")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between a user's requests")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="loadgen.json")
+    parser.add_argument("--compare", help="earlier --output file to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0)
+    args = parser.parse_args()
+
+    dataset = json.loads(Path(args.dataset).read_text())
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = _start_server(args.database_url or dataset["database_url"], args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+    started_at = datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+    try:
+        result = asyncio.run(run_load(base_url, dataset, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    result = {
+        "meta": {
+            "started_at": started_at,
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "base_url": base_url,
+            "users": args.users,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "think_ms": args.think_ms,
+            "seed": args.seed,
+            "mix": MIX,
+            "dataset": {k: v for k, v in dataset.items() if k != "password"},
+        },
+        **result,
+    }
+    Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
+    print_report(result)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(result, json.loads(Path(args.compare).read_text()), args.max_regression)
+        if regressions:
+            sys.exit("regressions above {}%: {}".format(args.max_regression, "; ".join(regressions)))
+
+
+if __name__ == "__main__":
+    main()
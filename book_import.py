@@ -0,0 +1,143 @@
+# book_import.py
+#
+# Bulk book ingestion for POST /books/bulk: parse a CSV or JSON Lines body,
+# validate every row, check all owner_ids with one set-based query, then
+# insert the valid rows in chunks inside a single transaction
+# (COPY on PostgreSQL/psycopg2, executemany elsewhere).
+
+import csv
+import io
+import json
+from typing import IO, Dict, Iterator, List, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from models import Book, Family
+
+# Rows sent to the database per executemany / COPY batch
+CHUNK_SIZE = 5_000
+
+# Per-row errors returned in the response (the total is always reported)
+MAX_REPORTED_ERRORS = 1_000
+
+BOOK_COLUMNS = ("title", "author", "grade", "isbn", "owner_id")
+
+
+class UnreadableBody(ValueError):
+    """
+    The body is not UTF-8, or not CSV the reader can parse. Raised before
+    anything is inserted: the whole import is refused, not just the rest of it.
+    """
+
+
+def _csv_rows(stream: IO[bytes]) -> Iterator[Tuple[int, Dict]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    for row in reader:
+        # Empty cells mean "not set" for the optional columns
+        yield reader.line_num, {k: v for k, v in row.items() if k is not None and v != ""}
+
+
+def _jsonl_rows(stream: IO[bytes]) -> Iterator[Tuple[int, Dict]]:
+    for line_no, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8"), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_no, ValueError(f"Invalid JSON: {exc}")
+            continue
+        if not isinstance(row, dict):
+            yield line_no, ValueError("Each line must be a JSON object")
+            continue
+        yield line_no, row
+
+
+def parse_rows(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    Yield (line number, row dict) pairs from a "csv" or "jsonl" byte stream.
+    Lines that cannot be decoded yield an exception instead of a dict.
+    """
+    if fmt == "csv":
+        return _csv_rows(stream)
+    return _jsonl_rows(stream)
+
+
+def _copy_chunk(session: Session, rows: List[Dict]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if row[c] is None else row[c] for c in BOOK_COLUMNS])
+    buffer.seek(0)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY book ({', '.join(BOOK_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def import_books(
+    session: Session, stream: IO[bytes], fmt: str, schema: Type[BaseModel]
+) -> Dict:
+    """
+    Validate every row of `stream` against `schema` and insert the books.
+    Invalid rows are skipped and reported with their line number;
+    valid rows are committed together. A body that cannot be decoded
+    raises UnreadableBody and nothing is inserted.
+    """
+    errors: List[Dict] = []
+    error_count = 0
+    valid: List[Tuple[int, Dict]] = []
+
+    def reject(line_no: int, message: str) -> None:
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": line_no, "error": message})
+
+    try:
+        for line_no, row in parse_rows(stream, fmt):
+            if isinstance(row, Exception):
+                reject(line_no, str(row))
+                continue
+            try:
+                book = schema(**row)
+            except ValidationError as exc:
+                reject(line_no, "; ".join(
+                    f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()
+                ))
+                continue
+            valid.append((line_no, book.dict()))
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise UnreadableBody(f"Could not parse body: {exc}") from exc
+
+    # One query for every distinct owner instead of a lookup per row
+    owner_ids = {row["owner_id"] for _, row in valid}
+    known = set()
+    if owner_ids:
+        known = set(session.exec(select(Family.id).where(Family.id.in_(owner_ids))).all())
+
+    rows = []
+    for line_no, row in valid:
+        if row["owner_id"] in known:
+            rows.append(row)
+        else:
+            reject(line_no, f"Invalid owner_id={row['owner_id']}: no such family")
+
+    bind = session.get_bind()
+    use_copy = bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2"
+    for start in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[start:start + CHUNK_SIZE]
+        if use_copy:
+            _copy_chunk(session, chunk)
+        else:
+            session.execute(insert(Book.__table__), chunk)
+    session.commit()
+
+    errors.sort(key=lambda e: e["line"])
+    return {"inserted": len(rows), "error_count": error_count, "errors": errors}
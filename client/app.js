@@ -18,6 +18,7 @@ const loginError    = document.getElementById("login-error");
 const booksSec      = document.getElementById("books-section");
 const booksList     = document.getElementById("books-list");
 const refreshBtn    = document.getElementById("refresh-books");
+const searchForm    = document.getElementById("search-form");
 const logoutBtn     = document.getElementById("logout");
 
 const addBookForm   = document.getElementById("add-book-form");
@@ -126,11 +127,14 @@ loginForm.addEventListener("submit", async e => {
 });
 
 // ─────────────────────────────────────────────────────────────────────────────
-// 3) Fetch & render books
-async function loadBooks() {
+// 3) Fetch & render books (or search results when a query is given)
+async function loadBooks(query = "") {
   booksList.innerHTML = "";
+  const url = query
+    ? `${API_BASE}/books/search?q=${encodeURIComponent(query)}`
+    : `${API_BASE}/books`;
   try {
-    const res = await fetch(`${API_BASE}/books`, {
+    const res = await fetch(url, {
       headers: { "Authorization": `Bearer ${token}` },
     });
     if (!res.ok) throw new Error(`Error ${res.status}: ${res.statusText}`);
@@ -152,8 +156,13 @@ async function loadBooks() {
 }
 
 // ─────────────────────────────────────────────────────────────────────────────
-// 4) Refresh & Logout
+// 4) Search, Refresh & Logout
+searchForm.addEventListener("submit", e => {
+  e.preventDefault();
+  if (token) loadBooks(new FormData(searchForm).get("q").trim());
+});
 refreshBtn.addEventListener("click", () => {
+  searchForm.reset();
   if (token) loadBooks();
 });
 logoutBtn.addEventListener("click", () => {
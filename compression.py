@@ -0,0 +1,261 @@
+# compression.py
+#
+# Response compression for the API (ASGI middleware), configured in create_app.
+#   - codings:   zstd and brotli when their optional packages are installed
+#                (zstandard, brotli), gzip always; the client's
+#                Accept-Encoding picks among them, in that preference order
+#   - threshold: bodies under COMPRESSION_MIN_SIZE bytes are sent as they are,
+#                since framing overhead and CPU outweigh the savings
+#   - types:     JSON, NDJSON, CSV, text, JS and SVG are compressed;
+#                event streams (SSE) and anything already encoded are not
+#   - streaming: StreamingResponse bodies are compressed chunk by chunk and
+#                flushed after every chunk, so exports stay incremental
+# Levels favour speed: these are per-request costs, unlike the static assets,
+# which are precompressed once at maximum level.
+
+import os
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+# Bodies smaller than this are never compressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Comma-separated codings to offer, best first (unavailable ones are skipped)
+COMPRESSION_ENCODINGS = os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip")
+
+DEFAULT_LEVELS: Dict[str, int] = {"gzip": 6, "br": 4, "zstd": 3}
+
+# Media types worth compressing (exact types, or prefixes ending in "/")
+COMPRESSIBLE_TYPES: Tuple[str, ...] = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+# Never compressed, even if they match COMPRESSIBLE_TYPES: compressing an event
+# stream delays every event behind the compressor
+EXCLUDED_TYPES: Tuple[str, ...] = ("text/event-stream",)
+
+
+def available_encodings() -> List[str]:
+    """
+    Codings this process can produce, best first.
+    """
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def choose_encoding(accept_encoding: Optional[str], available: Iterable[str]) -> str:
+    """
+    The best of `available` codings (in server preference order) that the
+    Accept-Encoding header allows, or "identity".
+    """
+    available = list(available)
+    if not accept_encoding or not available:
+        return "identity"
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            weights[coding.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = "identity", 0.0
+    for coding in available:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type in EXCLUDED_TYPES:
+        return False
+    return any(
+        media_type.startswith(t) if t.endswith("/") else media_type == t
+        for t in COMPRESSIBLE_TYPES
+    )
+
+
+class Encoder:
+    """
+    Incremental compressor for one response body.
+    """
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            raise ValueError(f"Unsupported encoding '{encoding}'")
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        """
+        Emit everything compressed so far, keeping the stream open.
+        """
+        if self.encoding == "gzip":
+            return self._obj.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            return self._obj.flush()
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compress HTTP responses according to Accept-Encoding, size and media type.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        encodings: Optional[Iterable[str]] = None,
+        levels: Optional[Dict[str, int]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        wanted = [e.strip() for e in (encodings or COMPRESSION_ENCODINGS.split(",")) if e.strip()]
+        self.encodings = [e for e in wanted if e in available_encodings()]
+        self.levels = {**DEFAULT_LEVELS, **(levels or {})}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        if encoding == "identity":
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(send, encoding, self.levels[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """
+    Wraps `send` for one response. The start message is held back until
+    enough of the body has been seen to decide whether to compress it.
+    """
+
+    def __init__(self, send: Send, encoding: str, level: int, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.pending: List[bytes] = []
+        self.pending_size = 0
+        self.encoder: Optional[Encoder] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                message["status"] < 200
+                or message["status"] in (204, 304)
+                or "content-encoding" in headers
+                or "no-transform" in headers.get("cache-control", "")
+                or not is_compressible(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is not None:
+            await self._send_compressed(body, more_body)
+            return
+
+        self.pending.append(body)
+        self.pending_size += len(body)
+        if self.pending_size < self.minimum_size:
+            if more_body:
+                return
+            # Whole body is below the threshold: send it untouched
+            await self._send(self.start)
+            await self._send({"type": "http.response.body", "body": b"".join(self.pending)})
+            return
+
+        self._start_compressing()
+        buffered, self.pending = b"".join(self.pending), []
+        if more_body:
+            await self._send(self.start)
+            await self._send_compressed(buffered, more_body=True)
+            return
+        data = self.encoder.compress(buffered) + self.encoder.finish()
+        MutableHeaders(scope=self.start)["Content-Length"] = str(len(data))
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": data})
+
+    def _start_compressing(self) -> None:
+        self.encoder = Encoder(self.encoding, self.level)
+        headers = MutableHeaders(scope=self.start)
+        headers["Content-Encoding"] = self.encoding
+        vary = headers.get("vary")
+        if vary is None:
+            headers["Vary"] = "Accept-Encoding"
+        elif "accept-encoding" not in vary.lower():
+            headers["Vary"] = f"{vary}, Accept-Encoding"
+        etag = headers.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            # The compressed bytes differ from the identity ones
+            headers["ETag"] = f"W/{etag}"
+        if "content-length" in headers:
+            del headers["Content-Length"]
+
+    async def _send_compressed(self, body: bytes, more_body: bool) -> None:
+        if more_body:
+            data = self.encoder.compress(body) + self.encoder.flush()
+            if data:
+                await self._send({"type": "http.response.body", "body": data, "more_body": True})
+            return
+        data = self.encoder.compress(body) + self.encoder.finish()
+        await self._send({"type": "http.response.body", "body": data})
@@ -1,10 +1,20 @@
 # database.py
 
+import logging
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlmodel import SQLModel, Session
-from typing import Generator
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import AsyncGenerator, Generator
+
+from migrate import pending_migrations, upgrade
+from pool_metrics import instrument_engine, pool_options
+from query_budget import track_queries
+from request_metrics import instrument_queries
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables from .env
 load_dotenv()
@@ -12,20 +22,77 @@ load_dotenv()
 # Default to SQLite file if DATABASE_URL is not set
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database.db")
 
+# Serve the CRUD routes from an async engine instead of the threadpool
+ASYNC_DB_ENABLED = os.getenv("ASYNC_DB", "false").lower() in ("1", "true", "yes")
+
+# Apply pending migrations from every worker at startup (single-process setups only)
+MIGRATE_ON_STARTUP = os.getenv("DB_MIGRATE_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+
 # For SQLite, disable the same-thread check so you can use sessions in FastAPI threads
 connect_args = {}
 if DATABASE_URL.startswith("sqlite"):
     connect_args["check_same_thread"] = False
 
-# Create the engine
-engine = create_engine(DATABASE_URL, echo=True, connect_args=connect_args)
+# Create the engine; pool size, overflow, timeout, recycle, pre-ping and echo
+# come from DB_* environment variables (see pool_metrics.py)
+engine = create_engine(
+    DATABASE_URL, connect_args=connect_args, **pool_options(DATABASE_URL, "sync")
+)
+instrument_engine(engine, "sync")
+instrument_queries(engine)
+track_queries(engine)
+
+
+def get_async_database_url(url: str) -> str:
+    """
+    Map a sync DATABASE_URL onto its async driver:
+    asyncpg for PostgreSQL, aiosqlite for SQLite.
+    URLs that already name a driver are returned untouched.
+    """
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme:
+        return url
+    if scheme in ("postgres", "postgresql"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    raise ValueError(f"No async driver known for DATABASE_URL scheme '{scheme}'")
+
+
+# The async engine is only built when enabled, so the async drivers stay optional
+async_engine = None
+if ASYNC_DB_ENABLED:
+    ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, "async")
+    )
+    instrument_engine(async_engine.sync_engine, "async")
+    instrument_queries(async_engine.sync_engine)
+    track_queries(async_engine.sync_engine)
+
 
 def init_db() -> None:
     """
-    Create all tables in the database.
-    Called at application startup.
+    Bring the schema up to date by applying pending migrations.
+    Normally run once before the workers start: `python migrate.py upgrade`.
+    """
+    upgrade(engine)
+
+
+def check_db() -> None:
+    """
+    Startup hook. Workers leave the schema alone unless DB_MIGRATE_ON_STARTUP
+    is set (handy for a single local process); otherwise they only warn when
+    migrations are pending.
     """
-    SQLModel.metadata.create_all(engine)
+    if MIGRATE_ON_STARTUP:
+        init_db()
+        return
+    pending = pending_migrations(engine)
+    if pending:
+        names = ", ".join(f"{m.version:04d}_{m.name}" for m in pending)
+        logger.warning("Database schema is behind; run `python migrate.py upgrade` (pending: %s)", names)
+
 
 def get_session() -> Generator[Session, None, None]:
     """
@@ -33,3 +100,52 @@ def get_session() -> Generator[Session, None, None]:
     """
     with Session(engine) as session:
         yield session
+
+
+def _refuse_flush(session, flush_context, instances) -> None:
+    raise RuntimeError("Read-only session: use get_session for endpoints that write")
+
+
+def read_only_session() -> Session:
+    """
+    A Session for read-only work: no autoflush, no expiry on commit, any
+    flush refused, and a READ ONLY transaction on PostgreSQL. Meant for
+    column-projected queries (projection.py), which skip the identity map.
+    """
+    session = Session(engine, autoflush=False, expire_on_commit=False)
+    event.listen(session, "before_flush", _refuse_flush)
+    if engine.dialect.name == "postgresql":
+        session.connection(execution_options={"postgresql_readonly": True})
+    return session
+
+
+def get_read_session() -> Generator[Session, None, None]:
+    """
+    Yield a read-only Session (see read_only_session) for GET endpoints.
+    """
+    with read_only_session() as session:
+        yield session
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Yield a new AsyncSession bound to the async engine.
+    Only available when ASYNC_DB is enabled.
+    """
+    if async_engine is None:
+        raise RuntimeError("Async database access is disabled; set ASYNC_DB=true")
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def get_async_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async twin of get_read_session.
+    """
+    if async_engine is None:
+        raise RuntimeError("Async database access is disabled; set ASYNC_DB=true")
+    async with AsyncSession(async_engine, autoflush=False, expire_on_commit=False) as session:
+        event.listen(session.sync_session, "before_flush", _refuse_flush)
+        if async_engine.dialect.name == "postgresql":
+            await session.connection(execution_options={"postgresql_readonly": True})
+        yield session
@@ -0,0 +1,330 @@
+# events.py
+#
+# Pub/sub for exchange changes, feeding the Server-Sent Events stream at
+# GET /exchanges/stream.
+#   - EventBus:  in-process fan-out. Subscriptions are indexed by family id,
+#                so a publish only touches the connections of the two
+#                families involved, however many streams are open.
+#   - Backends:  how a published event reaches the bus of every worker.
+#                "local"    (default) straight into this process's bus
+#                "postgres" NOTIFY on a channel that every worker LISTENs
+#                           to, for fan-out across workers and hosts
+# EVENT_BACKEND selects the backend. Events are notifications, not a log:
+# a client that reconnects should refetch what it shows.
+
+import asyncio
+import json
+import os
+import queue
+import select
+import threading
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.engine.url import make_url
+
+import metrics
+
+EVENT_BACKEND = os.getenv("EVENT_BACKEND", "local").lower()
+
+# Events buffered per stream before a slow client is disconnected
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "64"))
+
+# Seconds between keep-alive comments on an idle stream, so proxies keep it open
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# NOTIFY channel used by the postgres backend
+PG_CHANNEL = "exchange_events"
+
+EVENTS_DROPPED = metrics.counter(
+    "exchange_events_dropped_total", "Exchange events that could not be published", ["reason"]
+)
+
+
+class Event:
+    """
+    One change to an exchange. The SSE frame is rendered once, however many
+    subscribers receive it.
+    """
+    __slots__ = ("kind", "family_ids", "data", "frame")
+
+    def __init__(self, kind: str, family_ids: Iterable[int], data: dict):
+        self.kind = kind
+        self.family_ids = tuple(family_ids)
+        self.data = data
+        payload = json.dumps(data, separators=(",", ":"))
+        self.frame = f"event: exchange.{kind}\ndata: {payload}\n\n".encode()
+
+    def to_json(self) -> str:
+        return json.dumps({"kind": self.kind, "family_ids": self.family_ids, "data": self.data})
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Event":
+        value = json.loads(raw)
+        return cls(value["kind"], value["family_ids"], value["data"])
+
+
+class Subscription:
+    """
+    An open stream: the families it follows and a bounded queue of SSE frames,
+    owned by the event loop that serves the connection.
+    """
+    __slots__ = ("family_ids", "queue", "loop", "overflowed")
+
+    def __init__(self, family_ids: Iterable[int], loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.family_ids = frozenset(family_ids)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.loop = loop
+        self.overflowed = False
+
+    def _put(self, frame: bytes) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # The client is not keeping up; the stream closes once it has
+            # drained the queue and EventSource reconnects
+            self.overflowed = True
+
+
+class EventBus:
+    """
+    In-process fan-out of events to subscriptions, safe to publish from any
+    thread (sync route handlers run in the threadpool).
+    """
+
+    def __init__(self):
+        self._by_family: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, family_ids: Iterable[int], maxsize: int = SSE_QUEUE_SIZE) -> Subscription:
+        """
+        Register a subscription on the running event loop.
+        """
+        subscription = Subscription(family_ids, asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            for family_id in subscription.family_ids:
+                self._by_family[family_id].add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for family_id in subscription.family_ids:
+                subscribers = self._by_family.get(family_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_family[family_id]
+            self._count -= 1
+
+    def dispatch(self, event: Event) -> None:
+        """
+        Queue the event on every subscription following one of its families,
+        with a single callback per event loop.
+        """
+        with self._lock:
+            targets: Set[Subscription] = set()
+            for family_id in event.family_ids:
+                targets.update(self._by_family.get(family_id, ()))
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscription]] = defaultdict(list)
+        for subscription in targets:
+            by_loop[subscription.loop].append(subscription)
+
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        for loop, subscriptions in by_loop.items():
+            if loop is current:
+                _deliver(subscriptions, event.frame)
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(_deliver, subscriptions, event.frame)
+
+    def subscriber_count(self) -> int:
+        return self._count
+
+
+def _deliver(subscriptions: List[Subscription], frame: bytes) -> None:
+    for subscription in subscriptions:
+        subscription._put(frame)
+
+
+class LocalBackend:
+    """
+    Single-process backend: events go straight into the local bus.
+    """
+
+    def __init__(self, bus: EventBus):
+        self.bus = bus
+
+    def publish(self, event: Event) -> None:
+        self.bus.dispatch(event)
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class PostgresBackend:
+    """
+    Multi-worker backend on PostgreSQL LISTEN/NOTIFY. Publishing hands the
+    event to a background thread that NOTIFYs, so request handlers never wait
+    on it; a listener thread dispatches every notification (including this
+    worker's own) into the local bus. Both use dedicated connections outside
+    the pool and reconnect with backoff.
+    """
+
+    def __init__(self, bus: EventBus, database_url: str, channel: str = PG_CHANNEL):
+        self.bus = bus
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        self.channel = channel
+        self._outbox: "queue.Queue[Optional[Event]]" = queue.Queue(maxsize=10_000)
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def publish(self, event: Event) -> None:
+        try:
+            self._outbox.put_nowait(event)
+        except queue.Full:
+            EVENTS_DROPPED.inc(reason="outbox_full")
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._threads = [
+            threading.Thread(target=self._listen, name="events-listen", daemon=True),
+            threading.Thread(target=self._notify, name="events-notify", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._outbox.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+    def _connect(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        return conn
+
+    def _notify(self) -> None:
+        conn = None
+        while True:
+            event = self._outbox.get()
+            if event is None:
+                break
+            try:
+                if conn is None:
+                    conn = self._connect()
+                with conn.cursor() as cur:
+                    cur.execute("SELECT pg_notify(%s, %s)", (self.channel, event.to_json()))
+            except Exception:
+                EVENTS_DROPPED.inc(reason="notify_failed")
+                conn = _close_quietly(conn)
+                self._stopped.wait(1)
+        _close_quietly(conn)
+
+    def _listen(self) -> None:
+        backoff = 0.5
+        while not self._stopped.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{self.channel}"')
+                backoff = 0.5
+                while not self._stopped.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        note = conn.notifies.pop(0)
+                        self.bus.dispatch(Event.from_json(note.payload))
+            except Exception:
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                _close_quietly(conn)
+
+
+def _close_quietly(conn) -> None:
+    if conn is not None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+    return None
+
+
+bus = EventBus()
+
+SSE_SUBSCRIBERS = metrics.gauge(
+    "sse_subscribers", "Open exchange event streams", callback=bus.subscriber_count
+)
+
+
+def _make_backend():
+    if EVENT_BACKEND == "local":
+        return LocalBackend(bus)
+    if EVENT_BACKEND == "postgres":
+        from database import DATABASE_URL
+
+        return PostgresBackend(bus, DATABASE_URL)
+    raise ValueError(f"Unknown EVENT_BACKEND '{EVENT_BACKEND}' (expected 'local' or 'postgres')")
+
+
+backend = _make_backend()
+
+
+def start_event_backend() -> None:
+    backend.start()
+
+
+def stop_event_backend() -> None:
+    backend.stop()
+
+
+def publish_exchange_event(kind: str, exchange) -> None:
+    """
+    Publish a created / updated / deleted event for `exchange` (an Exchange
+    or a dict of its columns) to the streams of both families involved.
+    Call it after the change is committed.
+    """
+    data = jsonable_encoder(exchange)
+    backend.publish(
+        Event(kind, {data["proposer_family_id"], data["receiver_family_id"]}, data)
+    )
+
+
+async def event_stream(family_ids: Iterable[int]) -> AsyncIterator[bytes]:
+    """
+    SSE body for a client following `family_ids`: one frame per event, and a
+    comment line every SSE_HEARTBEAT_SECONDS while idle. An idle stream costs
+    a queue and a pending timer, no thread or database connection.
+    """
+    subscription = bus.subscribe(family_ids)
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                frame = await asyncio.wait_for(subscription.queue.get(), SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            yield frame
+            if subscription.overflowed and subscription.queue.empty():
+                break
+    finally:
+        bus.unsubscribe(subscription)
@@ -0,0 +1,93 @@
+# exchange_validation.py
+#
+# Set-based validation of exchange proposals for POST /exchanges and
+# POST /exchanges/bulk. Instead of a session.get per family and per book,
+# every family and book referenced by a batch of proposals is fetched in one
+# UNION ALL query (books with their owner_id), and each proposal is then
+# checked in memory:
+#   - the proposal is between two different families and two different books
+#   - both families exist
+#   - both books exist
+#   - the offered book belongs to the proposer, the requested book to the receiver
+
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import literal_column, null, select, union_all
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import Book, Family
+
+# Keys of a proposal, as in ExchangeCreate
+FAMILY_KEYS = ("proposer_family_id", "receiver_family_id")
+BOOK_KEYS = ("offered_book_id", "requested_book_id")
+
+
+def references_statement(proposals: Sequence[Dict]):
+    """
+    One query returning (kind, id, owner_id) for every book ("book") and
+    family ("family", owner_id NULL) referenced by `proposals` that exists.
+    """
+    book_ids = {p[key] for p in proposals for key in BOOK_KEYS}
+    family_ids = {p[key] for p in proposals for key in FAMILY_KEYS}
+    return union_all(
+        select(literal_column("'book'").label("kind"), Book.id, Book.owner_id)
+        .where(Book.id.in_(book_ids)),
+        select(literal_column("'family'"), Family.id, null())
+        .where(Family.id.in_(family_ids)),
+    )
+
+
+def _index(rows) -> Tuple[Dict[int, int], Set[int]]:
+    book_owners: Dict[int, int] = {}
+    families: Set[int] = set()
+    for kind, id_, owner_id in rows:
+        if kind == "book":
+            book_owners[id_] = owner_id
+        else:
+            families.add(id_)
+    return book_owners, families
+
+
+def proposal_error(
+    proposal: Dict, book_owners: Dict[int, int], families: Set[int]
+) -> Optional[str]:
+    """
+    Why `proposal` cannot be created, or None if it is valid.
+    """
+    if proposal["proposer_family_id"] == proposal["receiver_family_id"]:
+        return "A family cannot propose an exchange to itself."
+    if proposal["offered_book_id"] == proposal["requested_book_id"]:
+        return "The offered and requested books must be different."
+    if any(proposal[key] not in families for key in FAMILY_KEYS):
+        return "One or both family IDs are invalid."
+    if any(proposal[key] not in book_owners for key in BOOK_KEYS):
+        return "One or both book IDs are invalid."
+    if book_owners[proposal["offered_book_id"]] != proposal["proposer_family_id"]:
+        return "The offered book does not belong to the proposing family."
+    if book_owners[proposal["requested_book_id"]] != proposal["receiver_family_id"]:
+        return "The requested book does not belong to the receiving family."
+    return None
+
+
+def validate_proposals(session: Session, proposals: Sequence[Dict]) -> List[Optional[str]]:
+    """
+    The proposal_error of each of `proposals`, with a single query.
+    """
+    if not proposals:
+        return []
+    book_owners, families = _index(session.execute(references_statement(proposals)))
+    return [proposal_error(p, book_owners, families) for p in proposals]
+
+
+async def validate_proposals_async(
+    session: AsyncSession, proposals: Sequence[Dict]
+) -> List[Optional[str]]:
+    """
+    Same as validate_proposals, on an AsyncSession.
+    """
+    if not proposals:
+        return []
+    result = await session.execute(references_statement(proposals))
+    book_owners, families = _index(result)
+    return [proposal_error(p, book_owners, families) for p in proposals]
@@ -0,0 +1,186 @@
+# health.py
+#
+# Liveness and readiness checks for GET /health/live and /health/ready.
+# Liveness only says the process answers. Readiness says whether this worker
+# should get traffic: the load balancer drains it (503) while
+#   - the database does not answer `SELECT 1` within HEALTH_DB_TIMEOUT
+#   - a connection pool is nearly exhausted (HEALTH_POOL_SATURATION_MAX of
+#     pool size + overflow checked out), so new requests would queue
+#   - the event loop lags (HEALTH_LOOP_LAG_MAX), i.e. it is CPU-bound or
+#     something blocks it
+# The database result is cached for HEALTH_DB_CACHE_SECONDS, and concurrent
+# probes share one in-flight query, so probes from several load balancers
+# cost at most one query per interval. The loop lag comes from a background
+# task started with the app.
+
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+import pool_metrics
+from database import async_engine, engine
+
+HEALTH_DB_CACHE_SECONDS = float(os.getenv("HEALTH_DB_CACHE_SECONDS", "1"))
+HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT", "2"))
+# Fraction of pool_size + max_overflow checked out above which the worker is not ready
+HEALTH_POOL_SATURATION_MAX = float(os.getenv("HEALTH_POOL_SATURATION_MAX", "0.9"))
+# Event-loop lag in seconds above which the worker is not ready
+HEALTH_LOOP_LAG_MAX = float(os.getenv("HEALTH_LOOP_LAG_MAX", "0.2"))
+# How often the loop monitor wakes up, and how many wake-ups its lag covers
+HEALTH_LOOP_INTERVAL = float(os.getenv("HEALTH_LOOP_INTERVAL", "0.25"))
+_LOOP_WINDOW = 4
+
+EVENT_LOOP_LAG = metrics.gauge(
+    "event_loop_lag_seconds", "Worst event-loop scheduling delay over the last second"
+)
+READY = metrics.gauge("health_ready", "1 if the last readiness check passed, else 0")
+
+
+# -- database ----------------------------------------------------------------
+
+_db_result: Optional[Dict] = None
+_db_checked_at = 0.0
+_db_lock = asyncio.Lock()
+
+
+def _select_one() -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+async def _async_select_one() -> None:
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def _query_database() -> Dict:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(run_in_threadpool(_select_one), HEALTH_DB_TIMEOUT)
+        if async_engine is not None:
+            await asyncio.wait_for(_async_select_one(), HEALTH_DB_TIMEOUT)
+    except asyncio.TimeoutError:
+        error = f"no answer within {HEALTH_DB_TIMEOUT:g}s"
+    except Exception as exc:  # any driver or pool error means not ready
+        error = f"{type(exc).__name__}: {exc}"
+    else:
+        error = None
+    return {
+        "ok": error is None,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "error": error,
+    }
+
+
+async def check_database() -> Dict:
+    """
+    Result of `SELECT 1` on the engines, at most HEALTH_DB_CACHE_SECONDS old.
+    """
+    global _db_result, _db_checked_at
+    async with _db_lock:
+        age = time.monotonic() - _db_checked_at
+        if _db_result is None or age >= HEALTH_DB_CACHE_SECONDS:
+            _db_result = await _query_database()
+            _db_checked_at = time.monotonic()
+            age = 0.0
+        return {**_db_result, "age_ms": round(age * 1000, 2)}
+
+
+# -- connection pools --------------------------------------------------------
+
+def check_pools() -> Dict[str, Dict]:
+    """
+    Checked-out connections against capacity for each engine's pool. Pools
+    without a fixed capacity (SQLite's NullPool, unlimited overflow) are
+    always ok.
+    """
+    results = {}
+    for label, watched in pool_metrics.watched_engines().items():
+        pool = watched.pool
+        result = {"ok": True, "checked_out": None, "capacity": None, "saturation": None}
+        if isinstance(pool, QueuePool) and pool._max_overflow >= 0:
+            capacity = pool.size() + pool._max_overflow
+            checked_out = pool.checkedout()
+            saturation = checked_out / capacity if capacity else 1.0
+            result = {
+                "ok": saturation < HEALTH_POOL_SATURATION_MAX,
+                "checked_out": checked_out,
+                "capacity": capacity,
+                "saturation": round(saturation, 3),
+            }
+        result["waiting"] = int(pool_metrics.POOL_WAITING.value(engine=label))
+        results[label] = result
+    return results
+
+
+# -- event loop --------------------------------------------------------------
+
+_loop_lags = [0.0] * _LOOP_WINDOW
+_loop_task: Optional[asyncio.Task] = None
+
+
+async def _monitor_loop() -> None:
+    loop = asyncio.get_running_loop()
+    i = 0
+    while True:
+        started = loop.time()
+        await asyncio.sleep(HEALTH_LOOP_INTERVAL)
+        # Anything beyond the requested sleep was spent waiting for the loop
+        _loop_lags[i % _LOOP_WINDOW] = max(loop.time() - started - HEALTH_LOOP_INTERVAL, 0.0)
+        i += 1
+        EVENT_LOOP_LAG.set(max(_loop_lags))
+
+
+def loop_lag() -> float:
+    """
+    Worst event-loop lag over the last _LOOP_WINDOW monitor wake-ups, in seconds.
+    """
+    return max(_loop_lags)
+
+
+def check_event_loop() -> Dict:
+    lag = loop_lag()
+    return {"ok": lag < HEALTH_LOOP_LAG_MAX, "lag_ms": round(lag * 1000, 2)}
+
+
+async def start_loop_monitor() -> None:
+    """
+    Startup hook: begin measuring event-loop lag.
+    """
+    global _loop_task
+    if _loop_task is None:
+        _loop_task = asyncio.get_running_loop().create_task(_monitor_loop())
+
+
+async def stop_loop_monitor() -> None:
+    """
+    Shutdown hook.
+    """
+    global _loop_task
+    if _loop_task is not None:
+        _loop_task.cancel()
+        _loop_task = None
+
+
+async def readiness() -> Dict:
+    """
+    All readiness checks, with `ready` true only if every one passed. The
+    database is not queried while a pool is saturated.
+    """
+    pools = check_pools()
+    pools_ok = all(pool["ok"] for pool in pools.values())
+    if pools_ok:
+        database = await check_database()
+    else:
+        # SELECT 1 would only queue for a connection behind the requests
+        database = {"ok": None, "latency_ms": None, "error": "skipped: connection pool saturated"}
+    checks = {"database": database, "pools": pools, "event_loop": check_event_loop()}
+    ready = pools_ok and database["ok"] and checks["event_loop"]["ok"]
+    READY.set(1 if ready else 0)
+    return {"ready": ready, "checks": checks}
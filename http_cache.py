@@ -0,0 +1,109 @@
+# http_cache.py
+#
+# Conditional GET for read endpoints.
+# Handlers load their rows as usual, derive a weak ETag from row versions /
+# updated_at (cheap: no serialization) and, when the client already holds
+# that representation (If-None-Match, or If-Modified-Since), answer 304 with
+# an empty body instead of serializing and sending it again.
+# Only single rows get Last-Modified. A page's newest updated_at does not
+# move when a row is deleted from it or shifts into it, so If-Modified-Since
+# would answer 304 for a changed page; collection pages are validated by
+# their rows_etag alone.
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import Request, Response, status
+
+from pagination import NEXT_CURSOR_HEADER
+
+# Cache-Control policies. Everything behind auth is per-user (private) and
+# mutable: browsers may keep a copy but must revalidate it, which is a 304.
+PRIVATE_REVALIDATE = "private, no-cache"
+# Settled data that cannot change again may be reused for a while
+PRIVATE_SHORT = "private, max-age=60, must-revalidate"
+
+
+def weak_etag(*parts: Any) -> str:
+    """
+    Weak ETag over arbitrary hashable values (ids, versions, timestamps).
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def rows_etag(rows: Sequence[Any], *fields: str) -> str:
+    """
+    Weak ETag for a page of rows, from each row's `fields` (e.g. "id", "version").
+    Changes when a row is added, removed, reordered or updated.
+    """
+    return weak_etag(*(tuple(getattr(row, field) for field in fields) for row in rows))
+
+
+def _http_date(value: datetime) -> str:
+    # updated_at columns are naive UTC
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """
+    True if an If-None-Match header lists `etag` (weak comparison) or is `*`.
+    """
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def conditional_get(
+    request: Request,
+    response: Response,
+    etag: str,
+    modified: Optional[datetime] = None,
+    cache_control: str = PRIVATE_REVALIDATE,
+) -> Optional[Response]:
+    """
+    Put ETag / Last-Modified / Cache-Control on `response` and return a bare
+    304 response if the request's validators show the client is up to date;
+    None means the handler should return its body as usual.
+    If-None-Match wins over If-Modified-Since, as in RFC 7232. Pass
+    `modified` for single rows only (see above).
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Authorization"}
+    if modified is not None:
+        headers["Last-Modified"] = _http_date(modified)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = (
+            if_modified_since is not None
+            and modified is not None
+            and _not_modified_since(if_modified_since, modified)
+        )
+    if not fresh:
+        return None
+    if NEXT_CURSOR_HEADER in response.headers:
+        headers[NEXT_CURSOR_HEADER] = response.headers[NEXT_CURSOR_HEADER]
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -1,22 +1,63 @@
 # main.py
 
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.responses import JSONResponse
-from starlette.staticfiles import StaticFiles
+from starlette.responses import JSONResponse, Response
 
-from database import init_db
+import metrics
+import query_budget
+import request_metrics
+from compression import CompressionMiddleware
+from database import ASYNC_DB_ENABLED, check_db
+from events import start_event_backend, stop_event_backend
+from health import start_loop_monitor, stop_loop_monitor
+from passwords import shutdown_password_pool
 from routes.auth import router as auth_router
 from routes.books import router as books_router
 from routes.users import router as users_router
 from routes.exchanges import router as exchanges_router
+from routes.families import router as families_router
+from routes.health import router as health_router
+from routes.books_async import router as async_books_router
+from routes.users_async import router as async_users_router
+from routes.exchanges_async import router as async_exchanges_router
+from static_assets import StaticAssets
+
+
+def _overlay_router(base: APIRouter, overlay: APIRouter) -> APIRouter:
+    """
+    Return a router with `base`'s routes, where every (path, method) also
+    served by `overlay` is swapped for the overlay's handler in place.
+    Route order is preserved so literal paths still win over `/{id}` ones.
+    """
+    replacements = {
+        (route.path, method): route
+        for route in overlay.routes
+        for method in route.methods
+    }
+    merged = APIRouter(redirect_slashes=False)
+    used = set()
+    for route in base.routes:
+        keys = [(route.path, method) for method in route.methods]
+        swap = next((replacements[k] for k in keys if k in replacements), None)
+        merged.routes.append(swap or route)
+        if swap:
+            used.add(id(swap))
+    merged.routes.extend(r for r in overlay.routes if id(r) not in used)
+    return merged
+
 
 def create_app() -> FastAPI:
     app = FastAPI(title="Book Exchange App", version="0.1.0")
     app.router.redirect_slashes = False
 
-    # 1️⃣ Initialize database on startup
-    app.add_event_handler("startup", init_db)
+    # 1️⃣ Check the schema on startup (migrations run before the workers: python migrate.py upgrade)
+    app.add_event_handler("startup", check_db)
+    app.add_event_handler("startup", start_event_backend)
+    app.add_event_handler("startup", start_loop_monitor)
+    app.add_event_handler("shutdown", stop_loop_monitor)
+    app.add_event_handler("shutdown", stop_event_backend)
+    app.add_event_handler("shutdown", shutdown_password_pool)
 
     # 2️⃣ CORS
     app.add_middleware(
@@ -25,29 +66,54 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
-    # 3️⃣ API routers
+    # 3️⃣ Response compression (gzip/brotli/zstd over COMPRESSION_MIN_SIZE bytes)
+    app.add_middleware(CompressionMiddleware)
+
+    # 4️⃣ SQL query budgets and N+1 detection (development and tests: QUERY_BUDGET=true)
+    if query_budget.QUERY_BUDGET_ENABLED:
+        app.add_middleware(query_budget.QueryBudgetMiddleware)
+
+    # 5️⃣ Per-route request metrics (outermost, so compression is included in the timings)
+    if request_metrics.REQUEST_METRICS_ENABLED:
+        app.add_middleware(request_metrics.RequestMetricsMiddleware)
+
+    # 6️⃣ API routers (CRUD handlers swapped for async twins when ASYNC_DB is on)
+    books, users, exchanges = books_router, users_router, exchanges_router
+    if ASYNC_DB_ENABLED:
+        books = _overlay_router(books, async_books_router)
+        users = _overlay_router(users, async_users_router)
+        exchanges = _overlay_router(exchanges, async_exchanges_router)
+
     app.include_router(auth_router,     prefix="/auth",     tags=["auth"])
-    app.include_router(books_router,    prefix="/books",    tags=["books"])
-    app.include_router(users_router,    prefix="/users",    tags=["users"])
-    app.include_router(exchanges_router,prefix="/exchanges", tags=["exchanges"])
+    app.include_router(books,           prefix="/books",    tags=["books"])
+    app.include_router(users,           prefix="/users",    tags=["users"])
+    app.include_router(exchanges,       prefix="/exchanges", tags=["exchanges"])
+    app.include_router(families_router, prefix="/families", tags=["families"])
 
-    # 4️⃣ Health check BEFORE static mount
-    @app.get("/health", tags=["health"])
-    def health_check():
+    # 7️⃣ Health checks (liveness, readiness) and metrics BEFORE static mount
+    app.include_router(health_router, prefix="/health", tags=["health"])
+
+    @app.get("/metrics", tags=["health"], include_in_schema=False)
+    def metrics_endpoint():
         """
-        Simple health check endpoint.
+        Prometheus-format metrics of this worker process.
         """
-        return {"status": "ok"}
+        return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE_LATEST)
 
-    # 5️⃣ Serve SPA & assets (catch-all)
+    # 8️⃣ Serve SPA & assets (catch-all): fingerprinted, precompressed, from memory
     app.mount(
         "/",
-        StaticFiles(directory="client", html=True),
+        StaticAssets(directory="client"),
         name="static",
     )
 
+    # Label request metrics with the route templates registered above
+    if request_metrics.REQUEST_METRICS_ENABLED:
+        request_metrics.instrument_routes(app)
+
     return app
 
 # Instantiate the application
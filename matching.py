@@ -0,0 +1,277 @@
+# matching.py
+#
+# Multi-family trade matching.
+#
+# Every pending exchange says "family P wants book R", and R is currently
+# owned by some family Q. That gives a directed want graph P -> Q over
+# families. A cycle P0 -> P1 -> ... -> P0 is a trade where every family
+# receives the book it asked for from the next family in the cycle, so
+# books move even when no two families want each other's books directly.
+#
+# The graph is held as integer-indexed CSR arrays (offsets / targets /
+# books) rather than ORM objects so 100k families and 1M wants fit in a few
+# tens of MB and are walked without attribute lookups.
+#
+# Batch job:
+#   python matching.py --max-length 4 --output cycles.json
+
+import argparse
+import json
+import time
+from array import array
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from sqlmodel import Session, select
+
+from models import Book, Exchange, ExchangeStatus
+
+# Upper bound on the cycle length the engine will search for
+MAX_CYCLE_LENGTH = 6
+
+
+@dataclass
+class TradeLeg:
+    """
+    One hand-over inside a trade cycle: `family_id` receives `book_id`
+    from `from_family_id`.
+    """
+    family_id: int
+    book_id: int
+    from_family_id: int
+
+
+class WantGraph:
+    """
+    Compact want graph over families.
+    Node i is family `family_ids[i]`; its out-edges are
+    `targets[offsets[i]:offsets[i + 1]]`, and `books[e]` is the book
+    that travels along edge e (owned by the target, wanted by the source).
+    """
+
+    def __init__(self, family_ids: array, offsets: array, targets: array, books: array):
+        self.family_ids = family_ids
+        self.offsets = offsets
+        self.targets = targets
+        self.books = books
+
+    @property
+    def node_count(self) -> int:
+        return len(self.family_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+
+def build_want_graph(rows: Iterable[Tuple[int, int, int]]) -> WantGraph:
+    """
+    Build the want graph from (wanting_family_id, book_id, owner_family_id) rows.
+    Self-wants are dropped. Several books wanted from the same family become
+    parallel edges; the first one reached is the one that travels.
+    """
+    index: Dict[int, int] = {}
+    family_ids = array("q")
+    sources = array("l")
+    dests = array("l")
+    edge_books = array("q")
+
+    for family_id, book_id, owner_id in rows:
+        if family_id == owner_id:
+            continue
+        src = index.get(family_id)
+        if src is None:
+            src = index[family_id] = len(family_ids)
+            family_ids.append(family_id)
+        dst = index.get(owner_id)
+        if dst is None:
+            dst = index[owner_id] = len(family_ids)
+            family_ids.append(owner_id)
+        sources.append(src)
+        dests.append(dst)
+        edge_books.append(book_id)
+
+    # Counting sort of the edge list into CSR order
+    n = len(family_ids)
+    offsets = array("l", bytes(array("l").itemsize * (n + 1)))
+    for src in sources:
+        offsets[src + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    fill = array("l", offsets[:n])
+    targets = array("l", bytes(array("l").itemsize * len(sources)))
+    books = array("q", bytes(array("q").itemsize * len(sources)))
+    for src, dst, book_id in zip(sources, dests, edge_books):
+        pos = fill[src]
+        targets[pos] = dst
+        books[pos] = book_id
+        fill[src] = pos + 1
+
+    return WantGraph(family_ids, offsets, targets, books)
+
+
+def find_trade_cycles(
+    graph: WantGraph,
+    max_length: int = 3,
+) -> List[List[TradeLeg]]:
+    """
+    Greedily pack vertex-disjoint trade cycles, shortest first: all mutual
+    2-way swaps, then cycles of up to 3, 4, ... `max_length` families among
+    the rest. Each family appears in at most one cycle.
+    """
+    if not 2 <= max_length <= MAX_CYCLE_LENGTH:
+        raise ValueError(f"max_length must be between 2 and {MAX_CYCLE_LENGTH}")
+
+    offsets, targets, books = graph.offsets, graph.targets, graph.books
+    n = graph.node_count
+    free = bytearray(b"\x01" * n)
+    found: List[List[Tuple[int, int]]] = []  # cycles as (source node, edge) pairs
+
+    # Pass 1: mutual wants (2-cycles). Each edge is keyed by its unordered
+    # family pair; pairs seen in both directions are found by set intersection.
+    sources = array("l", bytes(array("l").itemsize * len(targets)))
+    for src in range(n):
+        for e in range(offsets[src], offsets[src + 1]):
+            sources[e] = src
+    forward = {s * n + d for s, d in zip(sources, targets) if s < d}
+    backward = {d * n + s for s, d in zip(sources, targets) if s > d}
+    mutual = forward & backward
+    del forward, backward
+    if mutual:
+        edge_at = {}
+        for e, (src, dst) in enumerate(zip(sources, targets)):
+            key = src * n + dst if src < dst else dst * n + src
+            if key in mutual:
+                edge_at.setdefault((src, dst), e)
+        for key in sorted(mutual):
+            src, dst = divmod(key, n)
+            if free[src] and free[dst]:
+                free[src] = free[dst] = 0
+                found.append([(src, edge_at[(src, dst)]), (dst, edge_at[(dst, src)])])
+    del sources
+
+    # Pass 3..k: pointer chasing over the remaining families, allowing one
+    # more hand-over per pass so shorter cycles are still taken first
+    for limit in range(3, max_length + 1):
+        found.extend(_chase_cycles(offsets, targets, free, limit))
+
+    return [
+        [
+            TradeLeg(
+                family_id=graph.family_ids[src],
+                book_id=books[e],
+                from_family_id=graph.family_ids[targets[e]],
+            )
+            for src, e in cycle
+        ]
+        for cycle in found
+    ]
+
+
+def _chase_cycles(
+    offsets: array, targets: array, free: bytearray, limit: int
+) -> List[List[Tuple[int, int]]]:
+    """
+    Top-Trading-Cycles style walk: every free family points at its next free
+    wanted family, and following the pointers must eventually revisit a family
+    on the current path, closing a cycle. Cycles longer than `limit` are
+    rejected by moving the closing family's pointer on; families whose
+    pointers run out are dropped. Pointers only move forward, so a pass
+    costs O(families + wants).
+    """
+    n = len(offsets) - 1
+    cursor = array("l", offsets[:n])
+    live = bytearray(free)  # free and not yet dropped this pass
+    found: List[List[Tuple[int, int]]] = []
+
+    for root in range(n):
+        if not live[root]:
+            continue
+        path = [root]
+        position = {root: 0}
+        while path:
+            node = path[-1]
+            end = offsets[node + 1]
+            pos = cursor[node]
+            while pos < end and not live[targets[pos]]:
+                pos += 1
+            cursor[node] = pos
+            if pos == end:
+                # No one left to trade with: drop the family and back off
+                live[node] = 0
+                del position[path.pop()]
+                if path:
+                    cursor[path[-1]] += 1
+                continue
+
+            dst = targets[pos]
+            at = position.get(dst)
+            if at is None:
+                position[dst] = len(path)
+                path.append(dst)
+                continue
+
+            if len(path) - at > limit:
+                cursor[node] = pos + 1
+                continue
+            cycle = path[at:]
+            found.append([(src, cursor[src]) for src in cycle])
+            for src in cycle:
+                free[src] = live[src] = 0
+                del position[src]
+            del path[at:]
+            if path:
+                cursor[path[-1]] += 1
+    return found
+
+
+def load_want_rows(session: Session) -> List[Tuple[int, int, int]]:
+    """
+    Fetch (proposer_family_id, requested_book_id, current owner_id) for every
+    pending exchange as plain tuples, skipping ORM object construction.
+    """
+    statement = (
+        select(Exchange.proposer_family_id, Exchange.requested_book_id, Book.owner_id)
+        .join(Book, Book.id == Exchange.requested_book_id)
+        .where(Exchange.status == ExchangeStatus.pending)
+    )
+    return session.exec(statement).all()
+
+
+def match_pending_exchanges(session: Session, max_length: int = 3) -> dict:
+    """
+    Run the matching engine over all pending exchanges and return the
+    cycles found plus some sizing stats.
+    """
+    started = time.perf_counter()
+    graph = build_want_graph(load_want_rows(session))
+    cycles = find_trade_cycles(graph, max_length=max_length)
+    return {
+        "families_considered": graph.node_count,
+        "wants_considered": graph.edge_count,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "cycles": [[asdict(leg) for leg in cycle] for cycle in cycles],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Find multi-family trade cycles.")
+    parser.add_argument("--max-length", type=int, default=3)
+    parser.add_argument("--output", help="write the JSON result here instead of stdout")
+    args = parser.parse_args()
+
+    from database import engine
+
+    with Session(engine) as session:
+        result = match_pending_exchanges(session, max_length=args.max_length)
+
+    payload = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
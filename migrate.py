@@ -0,0 +1,181 @@
+# migrate.py
+#
+# Versioned schema migrations. Modules in migrations/ are applied in version
+# order and recorded in the schema_migrations table, so each runs once per
+# database. Run it as a one-shot step before starting the workers, which no
+# longer issue any DDL themselves:
+#
+#   python migrate.py upgrade          # apply pending migrations
+#   python migrate.py upgrade --to 2   # stop after version 2
+#   python migrate.py status           # list applied / pending versions
+#
+# On PostgreSQL the run holds an advisory lock, so concurrent pre-start steps
+# (several containers booting at once) apply each migration only once.
+
+import argparse
+import importlib
+import pkgutil
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from types import ModuleType
+from typing import Iterator, List, Optional, Set
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+MIGRATIONS_PACKAGE = "migrations"
+
+_MODULE_RE = re.compile(r"^(\d+)_(\w+)$")
+
+# Arbitrary application-wide key for pg_advisory_lock
+_LOCK_KEY = 0x626F6F6B
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+@dataclass
+class Migration:
+    """
+    One migration module: `version` and `name` come from its file name
+    (0002_exchange_indexes.py -> 2, "exchange_indexes").
+    """
+    version: int
+    name: str
+    module: ModuleType
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "TRANSACTIONAL", True)
+
+    @property
+    def description(self) -> str:
+        doc = (self.module.__doc__ or "").strip()
+        return doc.splitlines()[0] if doc else ""
+
+
+def discover_migrations() -> List[Migration]:
+    """
+    Import every migration module, sorted by version.
+    """
+    package = importlib.import_module(MIGRATIONS_PACKAGE)
+    migrations: List[Migration] = []
+    for info in pkgutil.iter_modules(package.__path__):
+        match = _MODULE_RE.match(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{info.name}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), module))
+    migrations.sort(key=lambda m: m.version)
+    for previous, current in zip(migrations, migrations[1:]):
+        if previous.version == current.version:
+            raise RuntimeError(f"Duplicate migration version {current.version}")
+    return migrations
+
+
+def applied_versions(conn: Connection) -> Set[int]:
+    """
+    Versions already recorded in schema_migrations (empty on a new database).
+    """
+    if not inspect(conn).has_table(schema_migrations.name):
+        return set()
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+    return [m for m in discover_migrations() if m.version not in applied]
+
+
+@contextmanager
+def _migration_lock(engine: Engine) -> Iterator[None]:
+    """
+    Serialise migration runs across processes. Only PostgreSQL needs it;
+    SQLite deployments run a single pre-start step.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+
+
+def upgrade(engine: Engine, target: Optional[int] = None, verbose: bool = False) -> List[Migration]:
+    """
+    Apply every pending migration up to `target` (default: all) and return
+    the ones applied. Transactional migrations commit together with their
+    schema_migrations row; the others run on an autocommit connection and
+    are written to be safely re-run if interrupted.
+    """
+    applied: List[Migration] = []
+    with _migration_lock(engine):
+        with engine.begin() as conn:
+            schema_migrations.create(conn, checkfirst=True)
+            done = applied_versions(conn)
+
+        for migration in discover_migrations():
+            if migration.version in done or (target is not None and migration.version > target):
+                continue
+            started = time.perf_counter()
+            if migration.transactional:
+                with engine.begin() as conn:
+                    migration.module.upgrade(conn)
+                    _record(conn, migration)
+            else:
+                with engine.connect() as conn:
+                    migration.module.upgrade(conn.execution_options(isolation_level="AUTOCOMMIT"))
+                with engine.begin() as conn:
+                    _record(conn, migration)
+            applied.append(migration)
+            if verbose:
+                elapsed = (time.perf_counter() - started) * 1000
+                print(f"applied {migration.version:04d}_{migration.name} ({elapsed:.0f} ms)")
+    return applied
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(
+        schema_migrations.insert().values(
+            version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply or inspect schema migrations.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_cmd = commands.add_parser("upgrade", help="apply pending migrations")
+    upgrade_cmd.add_argument("--to", type=int, help="stop after this version")
+    commands.add_parser("status", help="list applied and pending migrations")
+    args = parser.parse_args()
+
+    from database import engine
+
+    if args.command == "upgrade":
+        applied = upgrade(engine, target=args.to, verbose=True)
+        if not applied:
+            print("database is up to date")
+        return
+
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+    for migration in discover_migrations():
+        state = "applied" if migration.version in done else "pending"
+        print(f"{migration.version:04d}_{migration.name:<24} {state:<8} {migration.description}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Initial schema: families, users, books and exchanges.
+Tables are created only when missing, so databases built by the old
+startup create_all are adopted as-is.
+"""
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, ForeignKey, Integer, MetaData, String, Table,
+)
+from sqlalchemy.engine import Connection
+
+metadata = MetaData()
+
+Table(
+    "family", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("email", String, nullable=False),
+)
+
+Table(
+    "user", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("username", String, nullable=False, index=True, unique=True),
+    Column("email", String, nullable=False, index=True, unique=True),
+    Column("hashed_password", String, nullable=False),
+    Column("is_active", Boolean, nullable=False),
+)
+
+Table(
+    "book", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("title", String, nullable=False),
+    Column("author", String, nullable=False),
+    Column("grade", Integer),
+    Column("isbn", String),
+    Column("owner_id", Integer, ForeignKey("family.id"), nullable=False),
+)
+
+Table(
+    "exchange", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("proposer_family_id", Integer, ForeignKey("family.id"), nullable=False),
+    Column("receiver_family_id", Integer, ForeignKey("family.id"), nullable=False),
+    Column("offered_book_id", Integer, ForeignKey("book.id"), nullable=False),
+    Column("requested_book_id", Integer, ForeignKey("book.id"), nullable=False),
+    Column("status", String, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,29 @@
+"""
+Indexes for the per-family exchange inbox / outbox and per-book lookups.
+Covers the book and exchange foreign keys, plus partial indexes on
+pending exchanges per offered / requested book. Built CONCURRENTLY on PostgreSQL so existing tables stay writable.
+"""
+
+from sqlalchemy.engine import Connection
+
+from migrations import create_index
+
+TRANSACTIONAL = False
+
+PENDING = "status = 'pending'"
+
+
+def upgrade(conn: Connection) -> None:
+    create_index(conn, "ix_book_owner_id", "book", ["owner_id"])
+    create_index(conn, "ix_exchange_offered_book_id", "exchange", ["offered_book_id"])
+    create_index(conn, "ix_exchange_requested_book_id", "exchange", ["requested_book_id"])
+    create_index(
+        conn, "ix_exchange_receiver_status_created", "exchange",
+        ["receiver_family_id", "status", "created_at"],
+    )
+    create_index(
+        conn, "ix_exchange_proposer_status_created", "exchange",
+        ["proposer_family_id", "status", "created_at"],
+    )
+    create_index(conn, "ix_exchange_pending_offered_book", "exchange", ["offered_book_id"], where=PENDING)
+    create_index(conn, "ix_exchange_pending_requested_book", "exchange", ["requested_book_id"], where=PENDING)
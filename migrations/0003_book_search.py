@@ -0,0 +1,68 @@
+"""
+Full-text index over book title / author (see search.py).
+PostgreSQL: GIN index on a weighted, unaccented tsvector, built CONCURRENTLY.
+SQLite: FTS5 external-content table kept in sync by triggers.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from migrations import create_index
+
+TRANSACTIONAL = False
+
+_PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', book_search_unaccent(coalesce(book.title, ''))), 'A') || "
+    "setweight(to_tsvector('simple', book_search_unaccent(coalesce(book.author, ''))), 'B')"
+)
+
+_PG_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() is only STABLE; index expressions need an IMMUTABLE wrapper
+    """
+    CREATE OR REPLACE FUNCTION book_search_unaccent(text) RETURNS text AS
+    $$ SELECT public.unaccent('public.unaccent', $1) $$
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """,
+]
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5(
+        title, author,
+        content='book', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN
+        INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN
+        INSERT INTO book_fts(book_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF title, author ON book BEGIN
+        INSERT INTO book_fts(book_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END
+    """,
+    # Index rows that existed before the FTS table was created
+    "INSERT INTO book_fts(book_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade(conn: Connection) -> None:
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        for ddl in _PG_DDL:
+            conn.execute(text(ddl))
+        create_index(conn, "ix_book_search", "book", [f"({_PG_DOCUMENT})"], using="GIN")
+    elif dialect == "sqlite":
+        for ddl in _SQLITE_DDL:
+            conn.execute(text(ddl))
@@ -0,0 +1,13 @@
+"""
+Row version counters on book and exchange for optimistic concurrency.
+Existing rows start at version 1.
+"""
+
+from sqlalchemy.engine import Connection
+
+from migrations import add_column
+
+
+def upgrade(conn: Connection) -> None:
+    add_column(conn, "book", "version", "INTEGER NOT NULL DEFAULT 1")
+    add_column(conn, "exchange", "version", "INTEGER NOT NULL DEFAULT 1")
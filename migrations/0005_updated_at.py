@@ -0,0 +1,22 @@
+"""
+updated_at on book and user, for Last-Modified and cache validators.
+Existing rows are stamped with the migration time.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from migrations import add_column
+
+
+def upgrade(conn: Connection) -> None:
+    if conn.dialect.name == "postgresql":
+        # Also the value for rows COPYed in without the column (bulk import)
+        default = "(now() AT TIME ZONE 'utc')"
+    else:
+        # SQLite only allows a constant default in ADD COLUMN; backfilled below
+        default = "'1970-01-01 00:00:00'"
+    for table in ("book", "user"):
+        added = add_column(conn, table, "updated_at", f"TIMESTAMP NOT NULL DEFAULT {default}")
+        if added and conn.dialect.name == "sqlite":
+            conn.execute(text(f"UPDATE \"{table}\" SET updated_at = datetime('now')"))
@@ -0,0 +1,70 @@
+# migrations/__init__.py
+#
+# Versioned schema migrations, applied in order by migrate.py.
+# Each module is named NNNN_description.py and defines `upgrade(conn)`.
+# Set `TRANSACTIONAL = False` in a module whose DDL cannot run inside a
+# transaction (CREATE INDEX CONCURRENTLY); it then gets an autocommit
+# connection. Migrations are frozen once released: change the schema by
+# adding a new module, never by editing an old one.
+
+from typing import Optional, Sequence
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+
+def create_index(
+    conn: Connection,
+    name: str,
+    table: str,
+    columns: Sequence[str],
+    where: Optional[str] = None,
+    unique: bool = False,
+    using: Optional[str] = None,
+) -> None:
+    """
+    Create an index if it does not exist yet, optionally partial (`where`)
+    or of a given access method (`using`, e.g. "GIN"). Columns may be
+    parenthesised expressions.
+    On PostgreSQL, on an autocommit connection, it is built CONCURRENTLY so writes
+    to the table are not blocked; an invalid leftover from an interrupted
+    concurrent build is dropped and rebuilt.
+    """
+    concurrently = (
+        conn.dialect.name == "postgresql"
+        and conn.get_execution_options().get("isolation_level") == "AUTOCOMMIT"
+    )
+    if concurrently:
+        invalid = conn.execute(
+            text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ),
+            {"name": name},
+        ).first()
+        if invalid:
+            conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+
+    ddl = "CREATE {unique}INDEX {concurrently}IF NOT EXISTS \"{name}\" ON \"{table}\" {using}({columns})".format(
+        unique="UNIQUE " if unique else "",
+        concurrently="CONCURRENTLY " if concurrently else "",
+        name=name,
+        table=table,
+        using=f"USING {using} " if using else "",
+        columns=", ".join(columns),
+    )
+    if where:
+        ddl += f" WHERE {where}"
+    conn.execute(text(ddl))
+
+
+def add_column(conn: Connection, table: str, name: str, ddl: str) -> bool:
+    """
+    ALTER TABLE ... ADD COLUMN `name` `ddl`, unless the column already exists.
+    Give NOT NULL columns a DEFAULT so existing rows are filled in.
+    Returns whether the column was added.
+    """
+    if any(column["name"] == name for column in inspect(conn).get_columns(table)):
+        return False
+    conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "{name}" {ddl}'))
+    return True
@@ -4,6 +4,7 @@ from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field, Relationship
 
 
@@ -36,6 +37,9 @@ class User(SQLModel, table=True):
     email: str = Field(index=True, unique=True)
     hashed_password: str
     is_active: bool = True
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": datetime.utcnow}
+    )
 
 
 class Book(SQLModel, table=True):
@@ -48,9 +52,15 @@ class Book(SQLModel, table=True):
     grade: Optional[int] = None
     isbn: Optional[str] = None
 
-    owner_id: int = Field(foreign_key="family.id")
+    owner_id: int = Field(foreign_key="family.id", index=True)
     owner: Optional[Family] = Relationship(back_populates="books")
 
+    # Bumped on every update; compared by conditional UPDATEs and exposed as the ETag
+    version: int = Field(default=1, sa_column_kwargs={"server_default": text("1")})
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": datetime.utcnow}
+    )
+
 
 class ExchangeStatus(str, Enum):
     """
@@ -65,18 +75,40 @@ class Exchange(SQLModel, table=True):
     """
     Represents a proposal to exchange one book for another between two families.
     """
+    __table_args__ = (
+        # Per-family inbox / outbox, filtered by status and ordered by date.
+        # These also serve plain lookups on the family foreign keys.
+        Index("ix_exchange_receiver_status_created", "receiver_family_id", "status", "created_at"),
+        Index("ix_exchange_proposer_status_created", "proposer_family_id", "status", "created_at"),
+        # Only pending exchanges are matched or auto-rejected per book; the
+        # partial indexes stay small as settled exchanges pile up
+        Index(
+            "ix_exchange_pending_offered_book", "offered_book_id",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+        Index(
+            "ix_exchange_pending_requested_book", "requested_book_id",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     proposer_family_id: int = Field(foreign_key="family.id")
     receiver_family_id: int = Field(foreign_key="family.id")
 
-    offered_book_id: int = Field(foreign_key="book.id")
-    requested_book_id: int = Field(foreign_key="book.id")
+    offered_book_id: int = Field(foreign_key="book.id", index=True)
+    requested_book_id: int = Field(foreign_key="book.id", index=True)
 
     status: ExchangeStatus = Field(default=ExchangeStatus.pending)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+    # Bumped on every status change; compared by conditional UPDATEs and exposed as the ETag
+    version: int = Field(default=1, sa_column_kwargs={"server_default": text("1")})
+
     # Relationships
     proposer_family: Optional[Family] = Relationship(
         back_populates="exchanges_proposed",
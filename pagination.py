@@ -0,0 +1,92 @@
+# pagination.py
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort-key values of the last row on a page into an opaque,
+    URL-safe cursor string.
+    """
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """
+    Decode a cursor produced by `encode_cursor` back into values typed like `columns`.
+    Raises HTTP 400 if the cursor is malformed.
+    """
+    invalid = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid pagination cursor",
+    )
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        raise invalid
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise invalid
+
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        try:
+            if python_type is datetime:
+                decoded.append(datetime.fromisoformat(value))
+            else:
+                decoded.append(python_type(value))
+        except (TypeError, ValueError):
+            raise invalid
+    return decoded
+
+
+def keyset_paginate(
+    statement, columns: Sequence[Any], after: str, limit: int, descending: bool = False
+):
+    """
+    Restrict `statement` to the page that follows cursor `after`, ordered by `columns`
+    (newest / highest first when `descending`).
+    An empty `after` starts from the first page.
+    The ordered columns must be unique together (end with the primary key),
+    so every page is a single index range scan regardless of its depth.
+    """
+    if after:
+        values = decode_cursor(after, columns)
+        if len(columns) == 1:
+            key, bound = columns[0], values[0]
+        else:
+            key, bound = tuple_(*columns), tuple_(*values)
+        statement = statement.where(key < bound if descending else key > bound)
+    if descending:
+        return statement.order_by(*(column.desc() for column in columns)).limit(limit)
+    return statement.order_by(*columns).limit(limit)
+
+
+def set_next_cursor(
+    response: Response, rows: Sequence[Any], keys: Sequence[str], limit: int
+) -> Optional[str]:
+    """
+    Put the cursor for the page after `rows` in the X-Next-Cursor header.
+    No header is set once a short (final) page has been returned.
+    """
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    cursor = encode_cursor([getattr(last, key) for key in keys])
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    return cursor
@@ -0,0 +1,133 @@
+# passwords.py
+#
+# bcrypt hashing and verification, run in a dedicated process pool so a
+# ~250ms hash never blocks the event loop or holds up other requests.
+# Kept free of app imports: pool workers only need to import this module
+# (and metrics.py, which uses the standard library only).
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+import metrics
+
+T = TypeVar("T")
+
+# Configure password hashing with bcrypt
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Worker processes doing bcrypt; 0 hashes inline on the calling thread
+PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Hash jobs allowed to queue or run at once before callers get 503
+PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+# Seconds a rejected client is asked to wait before retrying
+PASSWORD_HASH_RETRY_AFTER: int = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "1"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+# bcrypt buckets: a cost-12 hash takes ~250 ms
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+PASSWORD_HASH_SECONDS = metrics.histogram(
+    "password_hash_seconds", "bcrypt time per hash or verify, in the worker",
+    ["operation"], buckets=HASH_BUCKETS,
+)
+PASSWORD_HASH_WAIT_SECONDS = metrics.histogram(
+    "password_hash_wait_seconds", "Time a hash job waited for a free worker",
+    ["operation"], buckets=HASH_BUCKETS,
+)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Compare a plaintext password against its hashed version.
+    """
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    """
+    Hash a plaintext password for storage.
+    """
+    return pwd_context.hash(password)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: forking a process that already runs threads is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def _timed(func: Callable[..., T], *args) -> Tuple[T, float]:
+    """
+    `func(*args)` and its duration; runs in the worker process.
+    """
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+async def _run_hash_job(operation: str, func: Callable[..., T], *args) -> T:
+    """
+    Run `func(*args)` in the hashing pool.
+    Raises HTTP 503 with Retry-After when PASSWORD_HASH_MAX_PENDING jobs
+    are already in flight, rather than letting the queue grow unbounded.
+    """
+    global _pending
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent password operations, retry shortly",
+            headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)},
+        )
+    _pending += 1
+    started = time.perf_counter()
+    try:
+        if PASSWORD_HASH_WORKERS <= 0:
+            result, elapsed = _timed(func, *args)
+        else:
+            loop = asyncio.get_running_loop()
+            result, elapsed = await loop.run_in_executor(_get_pool(), _timed, func, *args)
+    finally:
+        _pending -= 1
+    PASSWORD_HASH_SECONDS.observe(elapsed, operation=operation)
+    PASSWORD_HASH_WAIT_SECONDS.observe(
+        max(time.perf_counter() - started - elapsed, 0.0), operation=operation
+    )
+    return result
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Async version of verify_password, run in the hashing pool.
+    """
+    return await _run_hash_job("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Async version of get_password_hash, run in the hashing pool.
+    """
+    return await _run_hash_job("hash", get_password_hash, password)
+
+
+def shutdown_password_pool() -> None:
+    """
+    Stop the hashing worker processes. Called at application shutdown.
+    """
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,153 @@
+# pool_metrics.py
+#
+# Connection-pool tuning from the environment, and pool metrics fed by
+# SQLAlchemy pool events for GET /metrics.
+
+import os
+import time
+from typing import Dict, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import Pool, QueuePool
+
+import metrics
+
+# Engines being watched, by their `engine` label ("sync" / "async")
+_engines: Dict[str, Engine] = {}
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+# Pool settings (QueuePool only: SQLite files use SQLAlchemy's NullPool)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Apply to every pool class
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+# Log every SQL statement (off by default; very noisy)
+DB_ECHO = _env_bool("DB_ECHO", False)
+
+
+def _callback(read):
+    def collect():
+        values = {}
+        for label, engine in list(_engines.items()):
+            value = read(engine.pool)
+            if value is not None:
+                values[(label,)] = value
+        return values
+    return collect
+
+
+POOL_CHECKED_OUT = metrics.gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool", ["engine"]
+)
+POOL_WAITING = metrics.gauge(
+    "db_pool_checkouts_in_progress", "Checkouts currently waiting for or opening a connection", ["engine"]
+)
+POOL_SIZE = metrics.gauge(
+    "db_pool_size", "Configured pool size",
+    ["engine"], callback=_callback(lambda p: p.size() if isinstance(p, QueuePool) else None),
+)
+POOL_OVERFLOW = metrics.gauge(
+    "db_pool_overflow", "Connections open beyond the pool size (negative: unused pool slots)",
+    ["engine"], callback=_callback(lambda p: p.overflow() if isinstance(p, QueuePool) else None),
+)
+POOL_IDLE = metrics.gauge(
+    "db_pool_checked_in", "Idle connections held in the pool",
+    ["engine"], callback=_callback(lambda p: p.checkedin() if isinstance(p, QueuePool) else None),
+)
+POOL_CHECKOUT_SECONDS = metrics.histogram(
+    "db_pool_checkout_seconds",
+    "Time to obtain a pooled connection: queue wait, connect and pre-ping",
+    ["engine"],
+)
+POOL_TIMEOUTS = metrics.counter(
+    "db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", ["engine"]
+)
+POOL_CONNECTS = metrics.counter(
+    "db_pool_connections_created_total", "New DBAPI connections opened", ["engine"]
+)
+POOL_INVALIDATIONS = metrics.counter(
+    "db_pool_invalidations_total", "Connections invalidated (e.g. failed pre-ping)", ["engine"]
+)
+
+
+def _timed_pool_class(base: Type[Pool], label: str) -> Type[Pool]:
+    """
+    Subclass `base` so every Pool.connect() (the checkout path used by the
+    engine) is timed, including time spent blocked on an exhausted pool.
+    """
+
+    class TimedPool(base):
+        def connect(self):
+            started = time.perf_counter()
+            POOL_WAITING.inc(engine=label)
+            try:
+                return super().connect()
+            except exc.TimeoutError:
+                POOL_TIMEOUTS.inc(engine=label)
+                raise
+            finally:
+                POOL_WAITING.dec(engine=label)
+                POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started, engine=label)
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def pool_options(url: str, label: str) -> dict:
+    """
+    Keyword arguments for create_engine / create_async_engine: the env-driven
+    pool settings suited to the URL's default pool class, wrapped for timing.
+    """
+    sa_url = make_url(url)
+    pool_class = sa_url.get_dialect().get_pool_class(sa_url)
+    options = {
+        "echo": DB_ECHO,
+        "poolclass": _timed_pool_class(pool_class, label),
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    if issubclass(pool_class, QueuePool):
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return options
+
+
+def watched_engines() -> Dict[str, Engine]:
+    """
+    The instrumented engines by label (the sync engine of an async one).
+    """
+    return dict(_engines)
+
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    """
+    Track checkouts, checkins, new connections and invalidations of `engine`'s pool.
+    """
+    _engines[label] = engine
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        POOL_CONNECTS.inc(engine=label)
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKED_OUT.inc(engine=label)
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        POOL_CHECKED_OUT.dec(engine=label)
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        POOL_INVALIDATIONS.inc(engine=label)
@@ -0,0 +1,38 @@
+# projection.py
+#
+# Column-projected reads for read-only endpoints.
+# select(Book) builds an identity-mapped ORM instance per row, with attribute
+# instrumentation and relationship state, only for the handler to copy a few
+# scalar columns into the response. `project` selects just the columns of the
+# response schema instead: the result rows are lightweight named tuples
+# (row.id, row.title, ...) that fast_json encodes directly.
+# Use them with get_read_session (database.py) and never write through them.
+
+from typing import Any, Dict, List, Sequence, Type
+
+from pydantic import BaseModel
+from sqlmodel import select
+
+
+def read_columns(schema: Type[BaseModel], model: Any) -> List[Any]:
+    """
+    The columns of `model` named by the fields of `schema`, in field order,
+    e.g. read_columns(BookRead, Book) -> [Book.id, Book.title, ...].
+    """
+    return [getattr(model, name) for name in schema.__fields__]
+
+
+def project(model: Any, schema: Type[BaseModel], *extra: Any):
+    """
+    SELECT of `schema`'s columns of `model`, followed by any `extra` columns
+    the handler needs but does not return (e.g. updated_at for Last-Modified).
+    Add where / order_by / limit to it as to select(model).
+    """
+    return select(*read_columns(schema, model), *extra)
+
+
+def row_dict(row: Sequence[Any], schema: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    `schema`'s fields of a row from `project`, as a dict (extra columns dropped).
+    """
+    return dict(zip(schema.__fields__, row))
@@ -0,0 +1,82 @@
+# pytest_query_budget.py
+#
+# pytest plugin for query budgets (query_budget.py): a test fails when a
+# request it makes runs more SQL statements than its route's @query_budget.
+# Repeated statements (likely N+1 queries) are logged as warnings.
+#
+# The suite loads it through `addopts = "-p pytest_query_budget"` in
+# pyproject.toml; elsewhere use `pytest -p pytest_query_budget`. Load it
+# before the app is imported: it turns QUERY_BUDGET on. Tests marked
+# @pytest.mark.query_budget_exempt still get the reports but do not fail.
+# The `query_reports` fixture lists the QueryReport of every request made so
+# far in the test, for tighter assertions:
+#
+#   def test_list_books(client, query_reports):
+#       client.get("/books")
+#       assert query_reports[-1].count == 2
+#       assert not query_reports[-1].duplicates()
+
+import threading
+from typing import List
+
+import pytest
+
+import query_budget
+
+query_budget.QUERY_BUDGET_ENABLED = True
+
+
+class _Collector:
+    """
+    QueryReports of the requests made by the running test.
+    """
+
+    def __init__(self):
+        self.reports: List[query_budget.QueryReport] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, report: query_budget.QueryReport) -> None:
+        with self._lock:
+            self.reports.append(report)
+
+    def take(self) -> List[query_budget.QueryReport]:
+        with self._lock:
+            reports = list(self.reports)
+            self.reports.clear()
+        return reports
+
+
+_collector = _Collector()
+
+
+def pytest_configure(config) -> None:
+    config.addinivalue_line(
+        "markers", "query_budget_exempt: do not fail the test on query budget overruns"
+    )
+    query_budget.add_reporter(_collector)
+
+
+def pytest_unconfigure(config) -> None:
+    query_budget.remove_reporter(_collector)
+
+
+@pytest.fixture
+def query_reports() -> List[query_budget.QueryReport]:
+    """
+    The QueryReport of each request the test has made so far, in order.
+    """
+    return _collector.reports
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    _collector.take()
+    # A failing test raises here: its own failure is reported instead
+    result = yield
+    overruns = [report for report in _collector.take() if report.over_budget]
+    if overruns and not item.get_closest_marker("query_budget_exempt"):
+        pytest.fail(
+            "Query budget exceeded:\n" + "\n".join(f"  {r.summary()}" for r in overruns),
+            pytrace=False,
+        )
+    return result
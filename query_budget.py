@@ -0,0 +1,181 @@
+# query_budget.py
+#
+# SQL query budgets per route, and N+1 detection.
+# Relationships such as Family.books or Exchange.offered_book load lazily, so
+# an endpoint that walks them issues one query per row. Hot-path handlers
+# declare how many statements a request may run:
+#
+#   @router.get("/{book_id}", response_model=BookRead)
+#   @query_budget(2)
+#   def get_book(...):
+#
+# With QUERY_BUDGET=true (the pytest plugin in pytest_query_budget.py turns
+# it on), QueryBudgetMiddleware records every statement a request runs,
+# through before_cursor_execute on the engines, and reports requests that
+# exceed their budget or repeat the same normalized statement (the N+1
+# signature). Reports are logged; the pytest plugin also fails the test.
+# Off by default: nothing is recorded in production.
+
+import inspect
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET_ENABLED = os.getenv("QUERY_BUDGET", "false").lower() in ("1", "true", "yes")
+# A normalized statement run this many times in one request is reported as a duplicate
+QUERY_BUDGET_DUPLICATES = int(os.getenv("QUERY_BUDGET_DUPLICATES", "2"))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# String and number literals (identifiers such as param_1 are left alone)
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+# Placeholder lists of any length: IN (?, ?, ?) -> IN (?)
+_PLACEHOLDER_LIST_RE = re.compile(
+    r"\(\s*(?:\?|%\(\w+\)s|%s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|\$\d+|:\w+))+\s*\)"
+)
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    `statement` with whitespace collapsed, literals replaced by `?` and
+    placeholder lists shortened to one, so that statements differing only in
+    their values (or the length of an IN list) compare equal.
+    """
+    statement = _WHITESPACE_RE.sub(" ", statement).strip()
+    statement = _LITERAL_RE.sub("?", statement)
+    return _PLACEHOLDER_LIST_RE.sub("(?)", statement)
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Declare the most SQL statements one request to the decorated endpoint may
+    run, dependencies (such as authentication) included. Put it below the
+    route decorator; the endpoint itself is not wrapped.
+    """
+
+    def decorate(endpoint: Callable) -> Callable:
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+
+    return decorate
+
+
+@dataclass
+class QueryReport:
+    """
+    The SQL statements one request ran, normalized, and its route's budget.
+    """
+    method: str
+    path: str
+    endpoint: Optional[str]
+    budget: Optional[int]
+    statements: List[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def duplicates(self, threshold: int = QUERY_BUDGET_DUPLICATES) -> Dict[str, int]:
+        """
+        Normalized statements run at least `threshold` times, with their counts.
+        """
+        return {sql: n for sql, n in Counter(self.statements).items() if n >= threshold}
+
+    def summary(self) -> str:
+        return (
+            f"{self.method} {self.path} ({self.endpoint}) ran {self.count} SQL statements, "
+            f"budget {self.budget}"
+        )
+
+
+def _log_report(report: QueryReport) -> None:
+    if report.over_budget:
+        logger.warning("Query budget exceeded: %s", report.summary())
+    for sql, times in report.duplicates().items():
+        logger.warning(
+            "%s %s ran the same statement %d times (N+1?): %.200s",
+            report.method, report.path, times, sql,
+        )
+
+
+_reporters: List[Callable[[QueryReport], None]] = [_log_report]
+_reporters_lock = threading.Lock()
+
+
+def add_reporter(reporter: Callable[[QueryReport], None]) -> None:
+    """
+    Also pass every request's QueryReport to `reporter` (e.g. a test collector).
+    """
+    with _reporters_lock:
+        _reporters.append(reporter)
+
+
+def remove_reporter(reporter: Callable[[QueryReport], None]) -> None:
+    with _reporters_lock:
+        _reporters.remove(reporter)
+
+
+# Statements of the request being handled (raw; normalized once it ends)
+_statements: ContextVar[Optional[List[str]]] = ContextVar("query_budget_statements", default=None)
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    statements = _statements.get()
+    if statements is not None:
+        statements.append(statement)
+
+
+def track_queries(engine: Engine) -> None:
+    """
+    Record statements run by `engine` against the current request, when enabled.
+    """
+    if QUERY_BUDGET_ENABLED:
+        event.listen(engine, "before_cursor_execute", _record_statement)
+
+
+class QueryBudgetMiddleware:
+    """
+    Build a QueryReport for every HTTP request and hand it to the reporters.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        statements: List[str] = []
+        token = _statements.set(statements)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _statements.reset(token)
+            # Mounts report their app as the endpoint, possibly wrapped
+            endpoint = inspect.unwrap(scope.get("endpoint")) if "endpoint" in scope else None
+            name = getattr(endpoint, "__qualname__", None)
+            report = QueryReport(
+                method=scope["method"],
+                path=scope["path"],
+                endpoint=name and f"{endpoint.__module__}.{name}",
+                budget=getattr(endpoint, "__query_budget__", None),
+                statements=[normalize_sql(s) for s in statements],
+            )
+            with _reporters_lock:
+                reporters = list(_reporters)
+            for reporter in reporters:
+                reporter(report)
@@ -0,0 +1,204 @@
+# request_metrics.py
+#
+# Per-route request metrics for GET /metrics:
+#   - requests, latency and response size, labelled by route template
+#     ("/books/{book_id}", never the raw path: one series per id would grow
+#     without bound)
+#   - requests in flight per route
+#   - SQL statements and database time per request, counted by
+#     before/after_cursor_execute listeners on the engines
+#
+# RequestMetricsMiddleware times the whole request, compression included, and
+# counts the body bytes sent. instrument_routes wraps each route's ASGI app
+# so the router itself records the matched template: there is no second
+# route-matching pass per request, and label values are bound once per
+# (method, route) rather than looked up on every update.
+# Disable with REQUEST_METRICS=false.
+
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Mount
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import metrics
+
+REQUEST_METRICS_ENABLED = os.getenv("REQUEST_METRICS", "true").lower() in ("1", "true", "yes")
+
+# Route label of requests no route matched (404s outside every route)
+UNMATCHED = "<unmatched>"
+
+# Scope key the route wrappers store the matched route's metrics under
+_ROUTE_KEY = "metrics.route"
+
+# Response body sizes in bytes, from empty 304s to large exports
+SIZE_BUCKETS = (0, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+# SQL statements per request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+HTTP_REQUESTS = metrics.counter(
+    "http_requests_total", "HTTP requests completed", ["method", "route", "status"]
+)
+HTTP_DURATION = metrics.histogram(
+    "http_request_duration_seconds", "Time from request start to the last body byte sent",
+    ["method", "route"],
+)
+HTTP_IN_FLIGHT = metrics.gauge(
+    "http_requests_in_flight", "Requests currently being handled", ["method", "route"]
+)
+HTTP_RESPONSE_SIZE = metrics.histogram(
+    "http_response_size_bytes", "Response body bytes sent, after compression",
+    ["method", "route"], buckets=SIZE_BUCKETS,
+)
+DB_QUERIES = metrics.histogram(
+    "db_queries_per_request", "SQL statements executed per request",
+    ["route"], buckets=QUERY_COUNT_BUCKETS,
+)
+DB_SECONDS = metrics.histogram(
+    "db_query_seconds_per_request", "Time spent executing SQL statements per request", ["route"]
+)
+
+
+class _RouteMetrics:
+    """
+    The metrics of one (method, route), with their labels bound.
+    """
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.in_flight = HTTP_IN_FLIGHT.labels(method=method, route=route)
+        self.duration = HTTP_DURATION.labels(method=method, route=route)
+        self.size = HTTP_RESPONSE_SIZE.labels(method=method, route=route)
+        self.db_queries = DB_QUERIES.labels(route=route)
+        self.db_seconds = DB_SECONDS.labels(route=route)
+        self._requests: Dict[int, metrics.Child] = {}
+
+    def requests(self, status_code: int) -> metrics.Child:
+        child = self._requests.get(status_code)
+        if child is None:
+            child = self._requests[status_code] = HTTP_REQUESTS.labels(
+                method=self.method, route=self.route, status=str(status_code)
+            )
+        return child
+
+
+_route_metrics: Dict[Tuple[str, str], _RouteMetrics] = {}
+
+
+def _metrics_for(method: str, route: str) -> _RouteMetrics:
+    bundle = _route_metrics.get((method, route))
+    if bundle is None:
+        bundle = _route_metrics.setdefault((method, route), _RouteMetrics(method, route))
+    return bundle
+
+
+class _RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# Stats of the request being handled; threadpool handlers see it through the
+# context copied into their worker thread
+_current: ContextVar[Optional[_RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_metrics_started", None)
+    if stats is not None and started is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def instrument_queries(engine: Engine) -> None:
+    """
+    Count statements run by `engine` (and their time) against the current request.
+    """
+    if not REQUEST_METRICS_ENABLED:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_app(app: ASGIApp, template: str) -> ASGIApp:
+    async def route_app(scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await app(scope, receive, send)
+            return
+        bundle = scope[_ROUTE_KEY] = _metrics_for(scope["method"], template)
+        bundle.in_flight.inc()
+        try:
+            await app(scope, receive, send)
+        finally:
+            bundle.in_flight.dec()
+
+    route_app.__wrapped__ = app
+    return route_app
+
+
+def instrument_routes(app) -> None:
+    """
+    Wrap the ASGI app of every route of `app` (call once all routers are
+    included) so requests are labelled with the route template.
+    """
+    for route in app.router.routes:
+        if isinstance(route, Mount):
+            template = f"{route.path}/{{path}}"
+        else:
+            template = getattr(route, "path", None)
+        if template is not None and hasattr(route, "app"):
+            route.app = _route_app(route.app, template)
+
+
+class RequestMetricsMiddleware:
+    """
+    Record duration, status, response size and database work of every HTTP
+    request, under the route template set by instrument_routes.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestStats()
+        token = _current.set(stats)
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            bundle = scope.get(_ROUTE_KEY) or _metrics_for(scope["method"], UNMATCHED)
+            bundle.requests(status_code).inc()
+            bundle.duration.observe(elapsed)
+            bundle.size.observe(size)
+            bundle.db_queries.observe(stats.queries)
+            bundle.db_seconds.observe(stats.db_seconds)
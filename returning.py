@@ -0,0 +1,126 @@
+# returning.py
+#
+# Writes that hand back the written row in the same round trip.
+# commit() expires every instance in the session, so the usual
+# `commit(); refresh(obj)` costs one more SELECT per write. Write handlers
+# instead run Core INSERT / UPDATE ... RETURNING the columns they respond
+# with, then commit, and return the row as a dict.
+#
+# SQLAlchemy 1.4 cannot compile RETURNING for SQLite, where the equivalent
+# needs no extra statement on INSERT and no network round trip on UPDATE:
+#   - INSERT: the row is assembled from the executed parameters (including
+#             Python-side defaults such as timestamps) and cursor.lastrowid
+#   - UPDATE: the row is selected back before commit, inside the same
+#             transaction; SQLite holds the write lock, so it is exact
+# Same approach as versioning.reject_conflicting_exchanges.
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import insert, select
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+def _inserted_row(result, model: Any, columns: Sequence[Any]) -> Dict[str, Any]:
+    params = dict(result.last_inserted_params())
+    primary_key = model.__table__.primary_key.columns
+    params.update({c.key: value for c, value in zip(primary_key, result.inserted_primary_key)})
+    return {c.key: params.get(c.key) for c in columns}
+
+
+def insert_returning(
+    session: Session, model: Any, values: Dict[str, Any], columns: Sequence[Any]
+) -> Dict[str, Any]:
+    """
+    INSERT one `model` row with `values` and return `columns` of the new row
+    (defaults and primary key included), without a follow-up SELECT.
+    Does not commit.
+    """
+    statement = insert(model.__table__).values(**values)
+    if session.get_bind().dialect.full_returning:
+        return dict(session.execute(statement.returning(*columns)).mappings().one())
+    return _inserted_row(session.execute(statement), model, columns)
+
+
+async def insert_returning_async(
+    session: AsyncSession, model: Any, values: Dict[str, Any], columns: Sequence[Any]
+) -> Dict[str, Any]:
+    """
+    Same as insert_returning, on an AsyncSession.
+    """
+    statement = insert(model.__table__).values(**values)
+    if session.bind.dialect.full_returning:
+        result = await session.execute(statement.returning(*columns))
+        return dict(result.mappings().one())
+    return _inserted_row(await session.execute(statement), model, columns)
+
+
+def insert_many_returning(
+    session: Session, model: Any, rows: Sequence[Dict[str, Any]], columns: Sequence[Any]
+) -> List[Dict[str, Any]]:
+    """
+    INSERT `rows` of `model` and return `columns` of each new row, in order.
+    One multi-row INSERT ... RETURNING where supported; on SQLite one INSERT
+    per row, which costs no round trip. Does not commit.
+    """
+    if not rows:
+        return []
+    table = model.__table__
+    if session.get_bind().dialect.full_returning:
+        result = session.execute(insert(table).values(list(rows)).returning(*columns))
+        return [dict(row) for row in result.mappings()]
+    return [
+        _inserted_row(session.execute(insert(table).values(**row)), model, columns)
+        for row in rows
+    ]
+
+
+async def insert_many_returning_async(
+    session: AsyncSession, model: Any, rows: Sequence[Dict[str, Any]], columns: Sequence[Any]
+) -> List[Dict[str, Any]]:
+    """
+    Same as insert_many_returning, on an AsyncSession.
+    """
+    if not rows:
+        return []
+    table = model.__table__
+    if session.bind.dialect.full_returning:
+        result = await session.execute(insert(table).values(list(rows)).returning(*columns))
+        return [dict(row) for row in result.mappings()]
+    return [
+        _inserted_row(await session.execute(insert(table).values(**row)), model, columns)
+        for row in rows
+    ]
+
+
+def update_returning(
+    session: Session, statement, columns: Sequence[Any], key_clause
+) -> Optional[Dict[str, Any]]:
+    """
+    Run the UPDATE `statement` and return `columns` of the updated row, or
+    None if it matched no row. `key_clause` (e.g. Book.id == 7) identifies
+    the row for dialects without RETURNING. Does not commit.
+    """
+    statement = statement.execution_options(synchronize_session=False)
+    if session.get_bind().dialect.full_returning:
+        row = session.execute(statement.returning(*columns)).mappings().first()
+        return dict(row) if row is not None else None
+    if session.execute(statement).rowcount == 0:
+        return None
+    return dict(session.execute(select(*columns).where(key_clause)).mappings().one())
+
+
+async def update_returning_async(
+    session: AsyncSession, statement, columns: Sequence[Any], key_clause
+) -> Optional[Dict[str, Any]]:
+    """
+    Same as update_returning, on an AsyncSession.
+    """
+    statement = statement.execution_options(synchronize_session=False)
+    if session.bind.dialect.full_returning:
+        row = (await session.execute(statement.returning(*columns))).mappings().first()
+        return dict(row) if row is not None else None
+    if (await session.execute(statement)).rowcount == 0:
+        return None
+    result = await session.execute(select(*columns).where(key_clause))
+    return dict(result.mappings().one())
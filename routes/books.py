@@ -1,14 +1,27 @@
 # routes/books.py
 
-from typing import List, Optional
+from tempfile import SpooledTemporaryFile
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlmodel import Session, select
 
-from database import get_session
+from book_import import UnreadableBody, import_books
+from database import get_read_session, get_session
+from export import export_response
+from fast_json import row_response, rows_response
+from http_cache import conditional_get, rows_etag
 from models import Book, Family
+from pagination import keyset_paginate, set_next_cursor
+from projection import project, read_columns
+from query_budget import query_budget
+from returning import insert_returning, update_returning
+from search import search_books
 from security import get_current_active_user
+from versioning import etag_for, field_update_statement, parse_if_match, precondition_failed
 
 # All endpoints under /books require a valid, active JWT user
 router = APIRouter(
@@ -39,6 +52,28 @@ class BookRead(BaseModel):
     grade: Optional[int]
     isbn: Optional[str]
     owner_id: int
+    version: int
+
+
+class BulkImportResult(BaseModel):
+    """
+    Outcome of a bulk import: rows inserted plus per-line errors.
+    """
+    inserted: int
+    error_count: int
+    errors: List[Dict]
+
+
+# Content types accepted by POST /books/bulk
+BULK_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/json-lines": "jsonl",
+}
+
+# Request bodies are buffered in memory up to this size, then on disk
+BULK_SPOOL_MEMORY = 4 * 1024 * 1024
 
 
 class BookUpdate(BaseModel):
@@ -54,21 +89,40 @@ class BookUpdate(BaseModel):
 
 
 @router.get("", response_model=List[BookRead])
+@query_budget(2)
 def list_books(
     *,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_read_session),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
 ):
     """
     GET /books
     Return a paginated list of books.
+
+    Pass `after` (empty for the first page) to page by primary key instead of
+    offset; the next page's cursor is returned in the X-Next-Cursor header.
     """
-    statement = select(Book).offset(skip).limit(limit)
-    return session.exec(statement).all()
+    # Plain rows of the BookRead columns, no ORM objects
+    query = project(Book, BookRead)
+    if after is not None:
+        statement = keyset_paginate(query, [Book.id], after, limit)
+        books = session.exec(statement).all()
+        set_next_cursor(response, books, ["id"], limit)
+    else:
+        statement = query.offset(skip).limit(limit)
+        books = session.exec(statement).all()
+
+    # Answer 304 when the client already has this exact page
+    not_modified = conditional_get(request, response, rows_etag(books, "id", "version"))
+    return not_modified or rows_response(books, BookRead, response)
 
 
 @router.post("", response_model=BookRead, status_code=status.HTTP_201_CREATED)
+@query_budget(3)
 def create_book(
     *,
     book_in: BookCreate,
@@ -85,50 +139,108 @@ def create_book(
             detail=f"Invalid owner_id={book_in.owner_id}: no such family",
         )
 
-    book = Book(**book_in.dict())
-    session.add(book)
+    book = insert_returning(session, Book, book_in.dict(), read_columns(BookRead, Book))
     session.commit()
-    session.refresh(book)
     return book
 
 
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_create_books(
+    *,
+    request: Request,
+    session: Session = Depends(get_session),
+):
+    """
+    POST /books/bulk
+    Import many books from a CSV (with a title,author,grade,isbn,owner_id
+    header) or JSON Lines body. Valid rows are inserted in one transaction;
+    invalid rows are skipped and reported by line number. A body that is
+    not UTF-8 (or not parseable CSV) is refused with 400 and nothing is inserted.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = BULK_FORMATS.get(content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Send text/csv or application/x-ndjson, not '{content_type}'",
+        )
+
+    # Stream the body to a spool file so large uploads never sit in memory whole
+    with SpooledTemporaryFile(max_size=BULK_SPOOL_MEMORY) as spool:
+        async for chunk in request.stream():
+            # Past BULK_SPOOL_MEMORY the spool is a file on disk: keep its writes off the event loop
+            await run_in_threadpool(spool.write, chunk)
+        spool.seek(0)
+        try:
+            return await run_in_threadpool(import_books, session, spool, fmt, BookCreate)
+        except UnreadableBody as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_books(format: str = "ndjson"):
+    """
+    GET /books/export?format=ndjson|csv
+    Stream every book, with constant memory regardless of table size.
+    """
+    columns = read_columns(BookRead, Book)
+    return export_response(columns, format, "books")
+
+
+@router.get("/search", response_model=List[BookRead])
+@query_budget(2)
+def search(
+    *,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_read_session),
+):
+    """
+    GET /books/search?q=
+    Full-text search on title and author, best match first.
+    Every term matches as a prefix and accents are ignored.
+    """
+    return search_books(session, q, limit)
+
+
 @router.get("/{book_id}", response_model=BookRead)
+@query_budget(2)
 def get_book(
     *,
     book_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_read_session),
 ):
     """
     GET /books/{book_id}
     Retrieve a book by its ID.
     """
-    book = session.get(Book, book_id)
+    book = session.exec(project(Book, BookRead, Book.updated_at).where(Book.id == book_id)).first()
     if not book:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found",
         )
-    return book
+    not_modified = conditional_get(request, response, etag_for(book.version), book.updated_at)
+    return not_modified or row_response(book, BookRead, response)
 
 
 @router.put("/{book_id}", response_model=BookRead)
+@query_budget(3)
 def update_book(
     *,
     book_id: int,
     book_in: BookUpdate,
+    response: Response,
     session: Session = Depends(get_session),
+    if_match: Optional[str] = Header(None),
 ):
     """
     PUT /books/{book_id}
     Update an existing book. Only provided fields will be changed.
+    With If-Match, only if the book still has that ETag (412 otherwise).
     """
-    book = session.get(Book, book_id)
-    if not book:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Book not found",
-        )
-
     updates = book_in.dict(exclude_unset=True)
 
     # If owner_id is being updated, validate it
@@ -140,16 +252,39 @@ def update_book(
                 detail=f"Invalid owner_id={new_owner}: no such family",
             )
 
-    for field, value in updates.items():
-        setattr(book, field, value)
-
-    session.add(book)
-    session.commit()
-    session.refresh(book)
+    # One conditional UPDATE ... RETURNING; with If-Match it only matches the
+    # versions the client has seen, so a concurrent update is not overwritten.
+    # It skips rows already holding these values, leaving their ETag valid.
+    versions = parse_if_match(if_match)
+    columns = read_columns(BookRead, Book)
+    book = None
+    if updates:
+        book = update_returning(
+            session,
+            field_update_statement(Book, book_id, updates, versions),
+            columns,
+            Book.id == book_id,
+        )
+    if book is None:
+        session.rollback()
+        current = session.execute(select(*columns).where(Book.id == book_id)).mappings().first()
+        if current is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Book not found",
+            )
+        if versions is not None and current["version"] not in versions:
+            raise precondition_failed("Book")
+        # Nothing to change
+        book = dict(current)
+    else:
+        session.commit()
+    response.headers["ETag"] = etag_for(book["version"])
     return book
 
 
 @router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(3)
 def delete_book(
     *,
     book_id: int,
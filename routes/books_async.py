@@ -0,0 +1,181 @@
+# routes/books_async.py
+#
+# Async twins of the CRUD handlers in routes/books.py, served from the async
+# engine when ASYNC_DB is enabled. Schemas are shared with the sync router.
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import get_async_read_session, get_async_session
+from fast_json import row_response, rows_response
+from http_cache import conditional_get, rows_etag
+from models import Book, Family
+from pagination import keyset_paginate, set_next_cursor
+from projection import project, read_columns
+from query_budget import query_budget
+from returning import insert_returning_async, update_returning_async
+from routes.books import BookCreate, BookRead, BookUpdate
+from security import get_current_active_user_async
+from versioning import etag_for, field_update_statement, parse_if_match, precondition_failed
+
+router = APIRouter(
+    tags=["books"],
+    redirect_slashes=False,
+    dependencies=[Depends(get_current_active_user_async)],
+)
+
+
+@router.get("", response_model=List[BookRead])
+@query_budget(2)
+async def list_books(
+    *,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_async_read_session),
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+):
+    """
+    GET /books
+    Return a paginated list of books.
+
+    Pass `after` (empty for the first page) to page by primary key instead of
+    offset; the next page's cursor is returned in the X-Next-Cursor header.
+    """
+    query = project(Book, BookRead)
+    if after is not None:
+        statement = keyset_paginate(query, [Book.id], after, limit)
+        books = (await session.exec(statement)).all()
+        set_next_cursor(response, books, ["id"], limit)
+    else:
+        statement = query.offset(skip).limit(limit)
+        books = (await session.exec(statement)).all()
+
+    not_modified = conditional_get(request, response, rows_etag(books, "id", "version"))
+    return not_modified or rows_response(books, BookRead, response)
+
+
+@router.post("", response_model=BookRead, status_code=status.HTTP_201_CREATED)
+@query_budget(3)
+async def create_book(
+    *,
+    book_in: BookCreate,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    POST /books
+    Create a new book.
+    """
+    if not await session.get(Family, book_in.owner_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid owner_id={book_in.owner_id}: no such family",
+        )
+
+    book = await insert_returning_async(session, Book, book_in.dict(), read_columns(BookRead, Book))
+    await session.commit()
+    return book
+
+
+@router.get("/{book_id}", response_model=BookRead)
+@query_budget(2)
+async def get_book(
+    *,
+    book_id: int,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    GET /books/{book_id}
+    Retrieve a book by its ID.
+    """
+    result = await session.exec(project(Book, BookRead, Book.updated_at).where(Book.id == book_id))
+    book = result.first()
+    if not book:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Book not found",
+        )
+    not_modified = conditional_get(request, response, etag_for(book.version), book.updated_at)
+    return not_modified or row_response(book, BookRead, response)
+
+
+@router.put("/{book_id}", response_model=BookRead)
+@query_budget(3)
+async def update_book(
+    *,
+    book_id: int,
+    book_in: BookUpdate,
+    response: Response,
+    session: AsyncSession = Depends(get_async_session),
+    if_match: Optional[str] = Header(None),
+):
+    """
+    PUT /books/{book_id}
+    Update an existing book. Only provided fields will be changed.
+    With If-Match, only if the book still has that ETag (412 otherwise).
+    """
+    updates = book_in.dict(exclude_unset=True)
+
+    if "owner_id" in updates:
+        new_owner = updates["owner_id"]
+        if not await session.get(Family, new_owner):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid owner_id={new_owner}: no such family",
+            )
+
+    versions = parse_if_match(if_match)
+    columns = read_columns(BookRead, Book)
+    book = None
+    if updates:
+        book = await update_returning_async(
+            session,
+            field_update_statement(Book, book_id, updates, versions),
+            columns,
+            Book.id == book_id,
+        )
+    if book is None:
+        await session.rollback()
+        result = await session.execute(select(*columns).where(Book.id == book_id))
+        current = result.mappings().first()
+        if current is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Book not found",
+            )
+        if versions is not None and current["version"] not in versions:
+            raise precondition_failed("Book")
+        # Nothing to change
+        book = dict(current)
+    else:
+        await session.commit()
+    response.headers["ETag"] = etag_for(book["version"])
+    return book
+
+
+@router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(3)
+async def delete_book(
+    *,
+    book_id: int,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    DELETE /books/{book_id}
+    Delete a book by its ID.
+    """
+    book = await session.get(Book, book_id)
+    if not book:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Book not found",
+        )
+    await session.delete(book)
+    await session.commit()
+    return
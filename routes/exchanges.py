@@ -1,15 +1,36 @@
 # routes/exchanges.py
 
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import exc
 from sqlmodel import Session, select
 
-from database import get_session
-from models import Exchange, ExchangeStatus, Family, Book
+from database import get_read_session, get_session
+from events import event_stream, publish_exchange_event
+from exchange_validation import validate_proposals
+from export import export_response
+from fast_json import row_response, rows_response
+from http_cache import PRIVATE_REVALIDATE, PRIVATE_SHORT, conditional_get
+from matching import MAX_CYCLE_LENGTH, match_pending_exchanges
+from models import Exchange, ExchangeStatus, Family, User
+from pagination import keyset_paginate, set_next_cursor
+from projection import project, read_columns, row_dict
+from query_budget import query_budget
+from returning import insert_many_returning, insert_returning, update_returning
 from security import get_current_active_user
+from versioning import (
+    concurrent_update_conflict,
+    etag_for,
+    is_retryable,
+    parse_if_match,
+    reject_conflicting_exchanges,
+    transition_error,
+    transition_statement,
+)
 
 # All endpoints under /exchanges require an authenticated, active user
 router = APIRouter(
@@ -41,31 +62,88 @@ class ExchangeRead(BaseModel):
     status: ExchangeStatus
     created_at: datetime
     updated_at: datetime
+    version: int
+
+
+class ExchangeBulkResult(BaseModel):
+    """
+    Outcome of a bulk proposal: exchanges created plus per-proposal errors.
+    """
+    created: List[ExchangeRead]
+    error_count: int
+    errors: List[Dict]
+
+
+# Proposals accepted by one POST /exchanges/bulk request
+BULK_EXCHANGES_MAX = 1_000
 
 
 class ExchangeUpdate(BaseModel):
     """
     Schema for updating only the status of an existing exchange.
+    Pending exchanges can be accepted or rejected; settled ones cannot change.
     """
     status: ExchangeStatus
 
 
+class MatchRequest(BaseModel):
+    """
+    Schema for running the trade-cycle matching engine.
+    """
+    max_cycle_length: int = Field(3, ge=2, le=MAX_CYCLE_LENGTH)
+
+
+class TradeLegRead(BaseModel):
+    """
+    One hand-over in a trade cycle: `family_id` receives `book_id` from `from_family_id`.
+    """
+    family_id: int
+    book_id: int
+    from_family_id: int
+
+
+class MatchResult(BaseModel):
+    """
+    Trade cycles found among the pending exchanges.
+    """
+    families_considered: int
+    wants_considered: int
+    elapsed_ms: float
+    cycles: List[List[TradeLegRead]]
+
+
 @router.get("", response_model=List[ExchangeRead])
+@query_budget(2)
 def list_exchanges(
     *,
-    session: Session = Depends(get_session),
+    response: Response,
+    session: Session = Depends(get_read_session),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
 ):
     """
     GET /exchanges
     Return a paginated list of all exchanges.
+
+    Pass `after` (empty for the first page) to page by (created_at, id) instead
+    of offset; the next page's cursor is returned in the X-Next-Cursor header.
     """
-    statement = select(Exchange).offset(skip).limit(limit)
-    return session.exec(statement).all()
+    query = project(Exchange, ExchangeRead)
+    if after is not None:
+        statement = keyset_paginate(
+            query, [Exchange.created_at, Exchange.id], after, limit
+        )
+        exchanges = session.exec(statement).all()
+        set_next_cursor(response, exchanges, ["created_at", "id"], limit)
+    else:
+        statement = query.offset(skip).limit(limit)
+        exchanges = session.exec(statement).all()
+    return rows_response(exchanges, ExchangeRead, response)
 
 
 @router.post("", response_model=ExchangeRead, status_code=status.HTTP_201_CREATED)
+@query_budget(3)
 def create_exchange(
     *,
     exchange_in: ExchangeCreate,
@@ -74,84 +152,183 @@ def create_exchange(
     """
     POST /exchanges
     Create a new exchange request between two families for two books.
+    The offered book must belong to the proposer, the requested one to the receiver.
     """
-    # Validate that both families exist
-    if not session.get(Family, exchange_in.proposer_family_id) or not session.get(
-        Family, exchange_in.receiver_family_id
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="One or both family IDs are invalid.",
-        )
+    # Both families, both books and their owners in one query
+    error = validate_proposals(session, [exchange_in.dict()])[0]
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
 
-    # Validate that both books exist
-    if not session.get(Book, exchange_in.offered_book_id) or not session.get(
-        Book, exchange_in.requested_book_id
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="One or both book IDs are invalid.",
-        )
-
-    exch = Exchange(
-        proposer_family_id=exchange_in.proposer_family_id,
-        receiver_family_id=exchange_in.receiver_family_id,
-        offered_book_id=exchange_in.offered_book_id,
-        requested_book_id=exchange_in.requested_book_id,
-        status=ExchangeStatus.pending,
+    exch = insert_returning(
+        session,
+        Exchange,
+        {**exchange_in.dict(), "status": ExchangeStatus.pending},
+        read_columns(ExchangeRead, Exchange),
     )
-    session.add(exch)
     session.commit()
-    session.refresh(exch)
+    publish_exchange_event("created", exch)
     return exch
 
 
+@router.post("/bulk", response_model=ExchangeBulkResult)
+def bulk_create_exchanges(
+    *,
+    proposals: List[ExchangeCreate] = Body(..., max_items=BULK_EXCHANGES_MAX),
+    session: Session = Depends(get_session),
+):
+    """
+    POST /exchanges/bulk
+    Propose many exchanges at once. All proposals are validated with a single
+    query, as in POST /exchanges; valid ones are created in one transaction,
+    invalid ones are skipped and reported by their index in the request.
+    """
+    rows = [p.dict() for p in proposals]
+    errors = []
+    valid = []
+    for index, (row, error) in enumerate(zip(rows, validate_proposals(session, rows))):
+        if error:
+            errors.append({"index": index, "error": error})
+        else:
+            valid.append({**row, "status": ExchangeStatus.pending})
+
+    created = insert_many_returning(session, Exchange, valid, read_columns(ExchangeRead, Exchange))
+    session.commit()
+    for exch in created:
+        publish_exchange_event("created", exch)
+    return {"created": created, "error_count": len(errors), "errors": errors}
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_exchanges(format: str = "ndjson"):
+    """
+    GET /exchanges/export?format=ndjson|csv
+    Stream every exchange, with constant memory regardless of table size.
+    """
+    columns = read_columns(ExchangeRead, Exchange)
+    return export_response(columns, format, "exchanges")
+
+
+@router.get("/stream", response_class=StreamingResponse)
+def stream_exchange_events(
+    *,
+    current_user: User = Depends(get_current_active_user),
+    session: Session = Depends(get_read_session),
+):
+    """
+    GET /exchanges/stream
+    Server-Sent Events stream of `exchange.created`, `exchange.updated` and
+    `exchange.deleted` events for exchanges involving the caller's family
+    (the family registered with the caller's email).
+    """
+    family_ids = session.exec(select(Family.id).where(Family.email == current_user.email)).all()
+    if not family_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No family found for the current user.",
+        )
+    # Hand the connection back to the pool now; the stream may stay open for hours
+    session.close()
+    return StreamingResponse(
+        event_stream(family_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/match", response_model=MatchResult)
+def match_exchanges(
+    *,
+    match_in: MatchRequest = MatchRequest(),
+    session: Session = Depends(get_read_session),
+):
+    """
+    POST /exchanges/match
+    Find 2-, 3- ... k-way trade cycles among the families' pending exchanges,
+    in which every family receives a book it asked for. Nothing is written;
+    the cycles are proposals for the families involved.
+    """
+    return match_pending_exchanges(session, max_length=match_in.max_cycle_length)
+
+
 @router.get("/{exchange_id}", response_model=ExchangeRead)
+@query_budget(2)
 def get_exchange(
     *,
     exchange_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_read_session),
 ):
     """
     GET /exchanges/{exchange_id}
     Retrieve a single exchange by its ID.
     """
-    exchange = session.get(Exchange, exchange_id)
+    exchange = session.exec(project(Exchange, ExchangeRead).where(Exchange.id == exchange_id)).first()
     if not exchange:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Exchange not found.",
         )
-    return exchange
+    # Accepted / rejected exchanges never change again
+    settled = exchange.status != ExchangeStatus.pending
+    not_modified = conditional_get(
+        request, response, etag_for(exchange.version), exchange.updated_at,
+        PRIVATE_SHORT if settled else PRIVATE_REVALIDATE,
+    )
+    return not_modified or row_response(exchange, ExchangeRead, response)
 
 
 @router.put("/{exchange_id}", response_model=ExchangeRead)
+@query_budget(6)
 def update_exchange(
     *,
     exchange_id: int,
     exchange_in: ExchangeUpdate,
+    response: Response,
     session: Session = Depends(get_session),
+    if_match: Optional[str] = Header(None),
 ):
     """
     PUT /exchanges/{exchange_id}
-    Update the status of an existing exchange.
+    Accept or reject a pending exchange. With If-Match, only if the exchange
+    still has that ETag (412 otherwise).
+
+    The change is a single conditional UPDATE; accepting also rejects every
+    other pending exchange for either book in the same transaction.
     """
-    exchange = session.get(Exchange, exchange_id)
-    if not exchange:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Exchange not found.",
+    versions = parse_if_match(if_match)
+    now = datetime.utcnow()
+    rejected_ids = []
+    try:
+        exchange = update_returning(
+            session,
+            transition_statement(exchange_id, exchange_in.status, versions, now),
+            read_columns(ExchangeRead, Exchange),
+            Exchange.id == exchange_id,
         )
+        if exchange is None:
+            session.rollback()
+            raise transition_error(session.get(Exchange, exchange_id), exchange_in.status, versions)
+        if exchange_in.status is ExchangeStatus.accepted:
+            rejected_ids = reject_conflicting_exchanges(session, exchange_id, now)
+        session.commit()
+    except exc.DBAPIError as error:
+        session.rollback()
+        if is_retryable(error):
+            raise concurrent_update_conflict()
+        raise
 
-    exchange.status = exchange_in.status
-    exchange.updated_at = datetime.utcnow()
-    session.add(exchange)
-    session.commit()
-    session.refresh(exchange)
+    publish_exchange_event("updated", exchange)
+    if rejected_ids:
+        statement = project(Exchange, ExchangeRead).where(Exchange.id.in_(rejected_ids))
+        for rejected in session.exec(statement):
+            publish_exchange_event("updated", row_dict(rejected, ExchangeRead))
+    response.headers["ETag"] = etag_for(exchange["version"])
     return exchange
 
 
 @router.delete("/{exchange_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(3)
 def delete_exchange(
     *,
     exchange_id: int,
@@ -169,4 +346,5 @@ def delete_exchange(
         )
     session.delete(exchange)
     session.commit()
+    publish_exchange_event("deleted", exchange)
     return
@@ -0,0 +1,231 @@
+# routes/exchanges_async.py
+#
+# Async twins of the CRUD handlers in routes/exchanges.py, served from the
+# async engine when ASYNC_DB is enabled. Schemas are shared with the sync router.
+
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy import exc
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import get_async_read_session, get_async_session
+from events import publish_exchange_event
+from exchange_validation import validate_proposals_async
+from fast_json import row_response, rows_response
+from http_cache import PRIVATE_REVALIDATE, PRIVATE_SHORT, conditional_get
+from models import Exchange, ExchangeStatus
+from pagination import keyset_paginate, set_next_cursor
+from projection import project, read_columns, row_dict
+from query_budget import query_budget
+from returning import insert_many_returning_async, insert_returning_async, update_returning_async
+from routes.exchanges import (
+    BULK_EXCHANGES_MAX,
+    ExchangeBulkResult,
+    ExchangeCreate,
+    ExchangeRead,
+    ExchangeUpdate,
+)
+from security import get_current_active_user_async
+from versioning import (
+    concurrent_update_conflict,
+    etag_for,
+    is_retryable,
+    parse_if_match,
+    reject_conflicting_exchanges_async,
+    transition_error,
+    transition_statement,
+)
+
+router = APIRouter(
+    tags=["exchanges"],
+    redirect_slashes=False,
+    dependencies=[Depends(get_current_active_user_async)],
+)
+
+
+@router.get("", response_model=List[ExchangeRead])
+@query_budget(2)
+async def list_exchanges(
+    *,
+    response: Response,
+    session: AsyncSession = Depends(get_async_read_session),
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+):
+    """
+    GET /exchanges
+    Return a paginated list of all exchanges.
+
+    Pass `after` (empty for the first page) to page by (created_at, id) instead
+    of offset; the next page's cursor is returned in the X-Next-Cursor header.
+    """
+    query = project(Exchange, ExchangeRead)
+    if after is not None:
+        statement = keyset_paginate(
+            query, [Exchange.created_at, Exchange.id], after, limit
+        )
+        exchanges = (await session.exec(statement)).all()
+        set_next_cursor(response, exchanges, ["created_at", "id"], limit)
+    else:
+        statement = query.offset(skip).limit(limit)
+        exchanges = (await session.exec(statement)).all()
+    return rows_response(exchanges, ExchangeRead, response)
+
+
+@router.post("", response_model=ExchangeRead, status_code=status.HTTP_201_CREATED)
+@query_budget(3)
+async def create_exchange(
+    *,
+    exchange_in: ExchangeCreate,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    POST /exchanges
+    Create a new exchange request between two families for two books.
+    The offered book must belong to the proposer, the requested one to the receiver.
+    """
+    error = (await validate_proposals_async(session, [exchange_in.dict()]))[0]
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+
+    exch = await insert_returning_async(
+        session,
+        Exchange,
+        {**exchange_in.dict(), "status": ExchangeStatus.pending},
+        read_columns(ExchangeRead, Exchange),
+    )
+    await session.commit()
+    publish_exchange_event("created", exch)
+    return exch
+
+
+@router.post("/bulk", response_model=ExchangeBulkResult)
+async def bulk_create_exchanges(
+    *,
+    proposals: List[ExchangeCreate] = Body(..., max_items=BULK_EXCHANGES_MAX),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    POST /exchanges/bulk
+    Propose many exchanges at once; see routes.exchanges.bulk_create_exchanges.
+    """
+    rows = [p.dict() for p in proposals]
+    errors = []
+    valid = []
+    checks = await validate_proposals_async(session, rows)
+    for index, (row, error) in enumerate(zip(rows, checks)):
+        if error:
+            errors.append({"index": index, "error": error})
+        else:
+            valid.append({**row, "status": ExchangeStatus.pending})
+
+    created = await insert_many_returning_async(
+        session, Exchange, valid, read_columns(ExchangeRead, Exchange)
+    )
+    await session.commit()
+    for exch in created:
+        publish_exchange_event("created", exch)
+    return {"created": created, "error_count": len(errors), "errors": errors}
+
+
+@router.get("/{exchange_id}", response_model=ExchangeRead)
+@query_budget(2)
+async def get_exchange(
+    *,
+    exchange_id: int,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    GET /exchanges/{exchange_id}
+    Retrieve a single exchange by its ID.
+    """
+    result = await session.exec(project(Exchange, ExchangeRead).where(Exchange.id == exchange_id))
+    exchange = result.first()
+    if not exchange:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Exchange not found.",
+        )
+    # Accepted / rejected exchanges never change again
+    settled = exchange.status != ExchangeStatus.pending
+    not_modified = conditional_get(
+        request, response, etag_for(exchange.version), exchange.updated_at,
+        PRIVATE_SHORT if settled else PRIVATE_REVALIDATE,
+    )
+    return not_modified or row_response(exchange, ExchangeRead, response)
+
+
+@router.put("/{exchange_id}", response_model=ExchangeRead)
+@query_budget(6)
+async def update_exchange(
+    *,
+    exchange_id: int,
+    exchange_in: ExchangeUpdate,
+    response: Response,
+    session: AsyncSession = Depends(get_async_session),
+    if_match: Optional[str] = Header(None),
+):
+    """
+    PUT /exchanges/{exchange_id}
+    Accept or reject a pending exchange, as a conditional UPDATE (see the
+    sync handler).
+    """
+    versions = parse_if_match(if_match)
+    now = datetime.utcnow()
+    rejected_ids = []
+    try:
+        exchange = await update_returning_async(
+            session,
+            transition_statement(exchange_id, exchange_in.status, versions, now),
+            read_columns(ExchangeRead, Exchange),
+            Exchange.id == exchange_id,
+        )
+        if exchange is None:
+            await session.rollback()
+            current = await session.get(Exchange, exchange_id)
+            raise transition_error(current, exchange_in.status, versions)
+        if exchange_in.status is ExchangeStatus.accepted:
+            rejected_ids = await reject_conflicting_exchanges_async(session, exchange_id, now)
+        await session.commit()
+    except exc.DBAPIError as error:
+        await session.rollback()
+        if is_retryable(error):
+            raise concurrent_update_conflict()
+        raise
+
+    publish_exchange_event("updated", exchange)
+    if rejected_ids:
+        statement = project(Exchange, ExchangeRead).where(Exchange.id.in_(rejected_ids))
+        for rejected in await session.exec(statement):
+            publish_exchange_event("updated", row_dict(rejected, ExchangeRead))
+    response.headers["ETag"] = etag_for(exchange["version"])
+    return exchange
+
+
+@router.delete("/{exchange_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(3)
+async def delete_exchange(
+    *,
+    exchange_id: int,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    DELETE /exchanges/{exchange_id}
+    Delete an exchange request by its ID.
+    """
+    exchange = await session.get(Exchange, exchange_id)
+    if not exchange:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Exchange not found.",
+        )
+    await session.delete(exchange)
+    await session.commit()
+    publish_exchange_event("deleted", exchange)
+    return
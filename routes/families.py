@@ -0,0 +1,105 @@
+# routes/families.py
+
+from enum import Enum
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import BaseModel
+from sqlalchemy import func, or_
+from sqlmodel import Session, select
+
+from database import get_read_session
+from models import Exchange, ExchangeStatus, Family
+from pagination import keyset_paginate, set_next_cursor
+from projection import project, row_dict
+from query_budget import query_budget
+from routes.exchanges import ExchangeRead
+from security import get_current_active_user
+
+# All endpoints under /families require an authenticated, active user
+router = APIRouter(
+    tags=["families"],
+    redirect_slashes=False,
+    dependencies=[Depends(get_current_active_user)],
+)
+
+
+class ExchangeDirection(str, Enum):
+    """
+    Which side of an exchange a family is on: `in` = received, `out` = proposed.
+    """
+    incoming = "in"
+    outgoing = "out"
+
+
+class FamilyExchangeCounts(BaseModel):
+    """
+    Number of the family's exchanges per status, for the requested direction.
+    """
+    total: int
+    by_status: Dict[ExchangeStatus, int]
+
+
+class FamilyExchangePage(BaseModel):
+    """
+    One page of a family's exchanges, newest first, plus per-status counts.
+    """
+    exchanges: List[ExchangeRead]
+    counts: FamilyExchangeCounts
+    next_cursor: Optional[str]
+
+
+@router.get("/{family_id}/exchanges", response_model=FamilyExchangePage)
+@query_budget(4)
+def list_family_exchanges(
+    *,
+    family_id: int,
+    response: Response,
+    session: Session = Depends(get_read_session),
+    direction: Optional[ExchangeDirection] = None,
+    exchange_status: Optional[ExchangeStatus] = Query(None, alias="status"),
+    after: str = "",
+    limit: int = 50,
+):
+    """
+    GET /families/{family_id}/exchanges?direction=in|out&status=pending
+    Return the exchanges a family received (`in`), proposed (`out`) or both,
+    optionally with one status, newest first.
+
+    Pages by (created_at, id): pass the returned `next_cursor` (also in the
+    X-Next-Cursor header) as `after` to get the next page.
+    """
+    if session.exec(select(Family.id).where(Family.id == family_id)).first() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Family not found")
+
+    if direction is ExchangeDirection.incoming:
+        belongs = Exchange.receiver_family_id == family_id
+    elif direction is ExchangeDirection.outgoing:
+        belongs = Exchange.proposer_family_id == family_id
+    else:
+        belongs = or_(
+            Exchange.receiver_family_id == family_id,
+            Exchange.proposer_family_id == family_id,
+        )
+
+    statement = project(Exchange, ExchangeRead).where(belongs)
+    if exchange_status is not None:
+        statement = statement.where(Exchange.status == exchange_status)
+    statement = keyset_paginate(
+        statement, [Exchange.created_at, Exchange.id], after, limit, descending=True
+    )
+    exchanges = session.exec(statement).all()
+    next_cursor = set_next_cursor(response, exchanges, ["created_at", "id"], limit)
+
+    # Counts ignore the status filter so the client can render every tab at once
+    rows = session.exec(
+        select(Exchange.status, func.count()).where(belongs).group_by(Exchange.status)
+    ).all()
+    by_status = {s: 0 for s in ExchangeStatus}
+    by_status.update({ExchangeStatus(s): n for s, n in rows})
+
+    return {
+        "exchanges": [row_dict(row, ExchangeRead) for row in exchanges],
+        "counts": {"total": sum(by_status.values()), "by_status": by_status},
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,42 @@
+# routes/health.py
+
+from fastapi import APIRouter, Response, status
+
+import health
+
+# Probes for load balancers and orchestrators; no authentication
+router = APIRouter(tags=["health"], redirect_slashes=False)
+
+_NO_STORE = {"Cache-Control": "no-store"}
+
+
+@router.get("")
+def health_check():
+    """
+    Simple health check endpoint.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/live")
+async def liveness(response: Response):
+    """
+    Liveness: the process is up and its event loop answers. Touches nothing
+    else, so a database outage does not get healthy workers restarted.
+    """
+    response.headers.update(_NO_STORE)
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness(response: Response):
+    """
+    Readiness: the database answers (cached for HEALTH_DB_CACHE_SECONDS), the
+    connection pools have room and the event loop keeps up. 503 with the
+    failing checks when any threshold is crossed, so traffic drains away.
+    """
+    result = await health.readiness()
+    response.headers.update(_NO_STORE)
+    if not result["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ok" if result["ready"] else "unavailable", "checks": result["checks"]}
@@ -1,13 +1,21 @@
 # routes/users.py
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from anyio import from_thread
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel, EmailStr
+from sqlalchemy import update
 from sqlmodel import Session, select
 
-from database import get_session
+from database import get_read_session, get_session
+from fast_json import row_response, rows_response
+from http_cache import conditional_get, rows_etag
 from models import User
-from security import get_password_hash, get_current_active_user
+from pagination import keyset_paginate, set_next_cursor
+from projection import project, read_columns
+from query_budget import query_budget
+from returning import insert_returning, update_returning
+from security import get_password_hash_async, get_current_active_user, invalidate_user
 
 router = APIRouter(
     tags=["users"],
@@ -32,6 +40,7 @@ class UserUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 @router.post("", response_model=UserRead, status_code=status.HTTP_201_CREATED)
+@query_budget(2)
 def create_user(
     user_in: UserCreate,
     session: Session = Depends(get_session),
@@ -43,40 +52,56 @@ def create_user(
     existing = session.exec(select(User).where(User.email == user_in.email)).first()
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-    hashed = get_password_hash(user_in.password)
-    user = User(username=user_in.username, email=user_in.email, hashed_password=hashed, is_active=True)
-    session.add(user)
+    hashed = from_thread.run(get_password_hash_async, user_in.password)
+    values = {"username": user_in.username, "email": user_in.email, "hashed_password": hashed, "is_active": True}
+    user = insert_returning(session, User, values, read_columns(UserRead, User))
     session.commit()
-    session.refresh(user)
     return user
 
 @router.get("", response_model=List[UserRead], dependencies=[Depends(get_current_active_user)])
+@query_budget(2)
 def list_users(
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_read_session),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
 ):
     """
     GET /users
     (Protected) List all users.
+    Pass `after` (empty for the first page) to page by id; the next cursor
+    is returned in the X-Next-Cursor header.
     """
-    return session.exec(select(User).offset(skip).limit(limit)).all()
+    # Only the UserRead columns (+ updated_at for the ETag): never loads password hashes
+    query = project(User, UserRead, User.updated_at)
+    if after is not None:
+        users = session.exec(keyset_paginate(query, [User.id], after, limit)).all()
+        set_next_cursor(response, users, ["id"], limit)
+    else:
+        users = session.exec(query.offset(skip).limit(limit)).all()
+    not_modified = conditional_get(request, response, rows_etag(users, "id", "updated_at"))
+    return not_modified or rows_response(users, UserRead, response)
 
 @router.get("/{user_id}", response_model=UserRead, dependencies=[Depends(get_current_active_user)])
+@query_budget(2)
 def get_user(
     user_id: int,
-    session: Session = Depends(get_session),
+    response: Response,
+    session: Session = Depends(get_read_session),
 ):
     """
     GET /users/{user_id}
     (Protected) Fetch a single user.
     """
-    user = session.get(User, user_id)
+    user = session.exec(project(User, UserRead).where(User.id == user_id)).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    return user
+    return row_response(user, UserRead, response)
 
 @router.put("/{user_id}", response_model=UserRead, dependencies=[Depends(get_current_active_user)])
+@query_budget(4)
 def update_user(
     user_id: int,
     user_in: UserUpdate,
@@ -86,20 +111,27 @@ def update_user(
     PUT /users/{user_id}
     (Protected) Update a user.
     """
-    user = session.get(User, user_id)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     updates = user_in.dict(exclude_unset=True)
+    previous_username = None
+    if "username" in updates:
+        # The auth cache is keyed by username: the old one must be dropped too
+        previous_username = session.exec(select(User.username).where(User.id == user_id)).first()
     if "password" in updates:
-        updates["hashed_password"] = get_password_hash(updates.pop("password"))
-    for field, value in updates.items():
-        setattr(user, field, value)
-    session.add(user)
+        updates["hashed_password"] = from_thread.run(get_password_hash_async, updates.pop("password"))
+    user = update_returning(
+        session,
+        update(User).where(User.id == user_id).values(**updates),
+        read_columns(UserRead, User),
+        User.id == user_id,
+    )
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     session.commit()
-    session.refresh(user)
+    invalidate_user(previous_username or user["username"], updates.get("username"))
     return user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(get_current_active_user)])
+@query_budget(3)
 def delete_user(
     user_id: int,
     session: Session = Depends(get_session),
@@ -111,6 +143,8 @@ def delete_user(
     user = session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    username = user.username
     session.delete(user)
     session.commit()
+    invalidate_user(username)
     return
@@ -0,0 +1,138 @@
+# routes/users_async.py
+#
+# Async twins of the CRUD handlers in routes/users.py, served from the async
+# engine when ASYNC_DB is enabled. Schemas are shared with the sync router.
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import get_async_read_session, get_async_session
+from fast_json import row_response, rows_response
+from http_cache import conditional_get, rows_etag
+from models import User
+from pagination import keyset_paginate, set_next_cursor
+from projection import project, read_columns
+from query_budget import query_budget
+from returning import insert_returning_async, update_returning_async
+from routes.users import UserCreate, UserRead, UserUpdate
+from security import get_password_hash_async, get_current_active_user_async, invalidate_user
+
+router = APIRouter(
+    tags=["users"],
+    redirect_slashes=False,
+)
+
+@router.post("", response_model=UserRead, status_code=status.HTTP_201_CREATED)
+@query_budget(2)
+async def create_user(
+    user_in: UserCreate,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    POST /users
+    (Public) Register a new user.
+    """
+    result = await session.exec(select(User).where(User.email == user_in.email))
+    if result.first():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+    hashed = await get_password_hash_async(user_in.password)
+    values = {"username": user_in.username, "email": user_in.email, "hashed_password": hashed, "is_active": True}
+    user = await insert_returning_async(session, User, values, read_columns(UserRead, User))
+    await session.commit()
+    return user
+
+@router.get("", response_model=List[UserRead], dependencies=[Depends(get_current_active_user_async)])
+@query_budget(2)
+async def list_users(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_async_read_session),
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+):
+    """
+    GET /users
+    (Protected) List all users.
+    Pass `after` (empty for the first page) to page by id; the next cursor
+    is returned in the X-Next-Cursor header.
+    """
+    query = project(User, UserRead, User.updated_at)
+    if after is not None:
+        result = await session.exec(keyset_paginate(query, [User.id], after, limit))
+        users = result.all()
+        set_next_cursor(response, users, ["id"], limit)
+    else:
+        result = await session.exec(query.offset(skip).limit(limit))
+        users = result.all()
+    not_modified = conditional_get(request, response, rows_etag(users, "id", "updated_at"))
+    return not_modified or rows_response(users, UserRead, response)
+
+@router.get("/{user_id}", response_model=UserRead, dependencies=[Depends(get_current_active_user_async)])
+@query_budget(2)
+async def get_user(
+    user_id: int,
+    response: Response,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    GET /users/{user_id}
+    (Protected) Fetch a single user.
+    """
+    result = await session.exec(project(User, UserRead).where(User.id == user_id))
+    user = result.first()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return row_response(user, UserRead, response)
+
+@router.put("/{user_id}", response_model=UserRead, dependencies=[Depends(get_current_active_user_async)])
+@query_budget(4)
+async def update_user(
+    user_id: int,
+    user_in: UserUpdate,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    PUT /users/{user_id}
+    (Protected) Update a user.
+    """
+    updates = user_in.dict(exclude_unset=True)
+    previous_username = None
+    if "username" in updates:
+        result = await session.exec(select(User.username).where(User.id == user_id))
+        previous_username = result.first()
+    if "password" in updates:
+        updates["hashed_password"] = await get_password_hash_async(updates.pop("password"))
+    user = await update_returning_async(
+        session,
+        update(User).where(User.id == user_id).values(**updates),
+        read_columns(UserRead, User),
+        User.id == user_id,
+    )
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    await session.commit()
+    invalidate_user(previous_username or user["username"], updates.get("username"))
+    return user
+
+@router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(get_current_active_user_async)])
+@query_budget(3)
+async def delete_user(
+    user_id: int,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    DELETE /users/{user_id}
+    (Protected) Remove a user.
+    """
+    user = await session.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    username = user.username
+    await session.delete(user)
+    await session.commit()
+    invalidate_user(username)
+    return
@@ -0,0 +1,77 @@
+# search.py
+#
+# Full-text search over Book.title / Book.author.
+#   - PostgreSQL: GIN index on a weighted, unaccented tsvector expression
+#   - SQLite:     FTS5 external-content table kept in sync by triggers
+# Both fold accents ("matemáticas" matches "Matematicas") and treat every
+# query term as a prefix, ranking title hits above author hits.
+# The index DDL lives in migrations/0003_book_search.py.
+
+import re
+from typing import List
+
+from sqlalchemy import select, text
+from sqlmodel import Session
+
+from models import Book
+
+# Words are matched as prefixes; anything that is not a word character is dropped
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# Must stay identical to the ix_book_search expression created by
+# migrations/0003_book_search.py, or PostgreSQL will not use the index
+_PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', book_search_unaccent(coalesce(book.title, ''))), 'A') || "
+    "setweight(to_tsvector('simple', book_search_unaccent(coalesce(book.author, ''))), 'B')"
+)
+
+# Explicit select list: the results are mapped onto Book's columns by position,
+# and columns added by migrations sit in the table in migration order
+_BOOK_COLUMNS = ", ".join(f"book.{column.name}" for column in Book.__table__.c)
+
+
+def _query_terms(q: str) -> List[str]:
+    return _TERM_RE.findall(q.lower())
+
+
+def search_books(session: Session, q: str, limit: int = 20) -> List[Book]:
+    """
+    Return up to `limit` books whose title or author match every term of `q`
+    as a prefix, best match first.
+    """
+    terms = _query_terms(q)
+    if not terms:
+        return []
+
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = text(
+            f"""
+            SELECT {_BOOK_COLUMNS} FROM book
+            WHERE ({_PG_DOCUMENT}) @@ to_tsquery('simple', book_search_unaccent(:tsquery))
+            ORDER BY ts_rank(({_PG_DOCUMENT}), to_tsquery('simple', book_search_unaccent(:tsquery))) DESC,
+                     book.id
+            LIMIT :limit
+            """
+        ).bindparams(tsquery=" & ".join(f"{t}:*" for t in terms), limit=limit)
+    elif dialect == "sqlite":
+        statement = text(
+            f"""
+            SELECT {_BOOK_COLUMNS} FROM book_fts
+            JOIN book ON book.id = book_fts.rowid
+            WHERE book_fts MATCH :match
+            ORDER BY bm25(book_fts, 10.0, 5.0), book.id
+            LIMIT :limit
+            """
+        ).bindparams(match=" ".join(f'"{t}"*' for t in terms), limit=limit)
+    else:
+        clauses = " AND ".join(
+            f"(lower(book.title) LIKE :t{i} OR lower(book.author) LIKE :t{i})"
+            for i in range(len(terms))
+        )
+        statement = text(
+            f"SELECT {_BOOK_COLUMNS} FROM book WHERE {clauses} ORDER BY book.id LIMIT :limit"
+        ).bindparams(limit=limit, **{f"t{i}": f"%{t}%" for i, t in enumerate(terms)})
+
+    orm_statement = select(Book).from_statement(statement.columns(*Book.__table__.c))
+    return session.execute(orm_statement).scalars().all()
@@ -1,18 +1,29 @@
 # security.py
 
+import hashlib
 import os
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 
 from dotenv import load_dotenv
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from database import get_session
+from cache import TTLCache
+from database import get_async_session, get_session
 from models import User
+from passwords import (  # noqa: F401  (re-exported)
+    get_password_hash,
+    get_password_hash_async,
+    pwd_context,
+    verify_password,
+    verify_password_async,
+)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -22,36 +33,34 @@ SECRET_KEY: str = os.getenv("SECRET_KEY", "fallback-secret-key")
 ALGORITHM: str = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
-# Configure password hashing with bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # OAuth2 scheme to read the "Authorization: Bearer <token>" header
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# In-process auth caches so authenticated requests skip JWT decoding and the
+# user lookup. Entries live at most AUTH_CACHE_TTL seconds; update_user and
+# delete_user invalidate explicitly (other workers catch up within the TTL).
+AUTH_CACHE_TTL: float = float(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE: int = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """
-    Compare a plaintext password against its hashed version.
-    """
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    """
-    Hash a plaintext password for storage.
-    """
-    return pwd_context.hash(password)
+# sha256(token) -> username
+token_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+# username -> detached User snapshot
+user_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
 
 
-def authenticate_user(
+async def authenticate_user(
     session: Session, username: str, password: str
 ) -> Optional[User]:
     """
     Retrieve the user from the database and verify the password.
     Returns the User if authentication succeeds, otherwise None.
+    The query runs in the threadpool and bcrypt in the hashing pool,
+    so the event loop is never blocked.
     """
-    user = session.exec(select(User).where(User.username == username)).first()
-    if not user or not verify_password(password, user.hashed_password):
+    user = await run_in_threadpool(
+        lambda: session.exec(select(User).where(User.username == username)).first()
+    )
+    if not user or not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
@@ -71,6 +80,63 @@ def create_access_token(
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def decode_access_token(token: str) -> str:
+    """
+    Decode and verify the JWT token and return its subject (the username).
+    Raises HTTP 401 if the token is invalid or carries no subject.
+    Successfully decoded tokens are cached by hash until they expire.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    username = token_cache.get(key)
+    if username is not None:
+        return username
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise _credentials_exception()
+    username = payload.get("sub")
+    if username is None:
+        raise _credentials_exception()
+
+    # Never serve a token from cache past its own expiry
+    remaining = payload.get("exp", 0) - time.time()
+    if remaining > 0:
+        token_cache.set(key, username, ttl=remaining)
+    return username
+
+
+def _cache_user(user: User) -> User:
+    # Cache a copy so request-scoped sessions never share a mutable instance
+    snapshot = User(**user.dict())
+    user_cache.set(user.username, snapshot)
+    return user
+
+
+def invalidate_user(*usernames: Optional[str]) -> None:
+    """
+    Drop cached users, e.g. after their record, username or is_active changed.
+    """
+    for username in usernames:
+        if username:
+            user_cache.delete(username)
+
+
+def auth_cache_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Return hit / miss counters of the token and user caches.
+    """
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     session: Session = Depends(get_session),
@@ -79,23 +145,15 @@ async def get_current_user(
     Decode and verify the JWT token, then load and return the corresponding User.
     Raises HTTP 401 if the token is invalid or the user does not exist.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str | None = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+    username = decode_access_token(token)
+    cached = user_cache.get(username)
+    if cached is not None:
+        return cached
 
     user = session.exec(select(User).where(User.username == username)).first()
     if user is None:
-        raise credentials_exception
-    return user
+        raise _credentials_exception()
+    return _cache_user(user)
 
 
 async def get_current_active_user(
@@ -107,3 +165,33 @@ async def get_current_active_user(
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_async_session),
+) -> User:
+    """
+    Same as get_current_user, but loads the User through the async engine.
+    """
+    username = decode_access_token(token)
+    cached = user_cache.get(username)
+    if cached is not None:
+        return cached
+
+    result = await session.exec(select(User).where(User.username == username))
+    user = result.first()
+    if user is None:
+        raise _credentials_exception()
+    return _cache_user(user)
+
+
+async def get_current_active_user_async(
+    current_user: User = Depends(get_current_user_async),
+) -> User:
+    """
+    Ensure the current (async-loaded) user is active. Raises HTTP 400 otherwise.
+    """
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
@@ -0,0 +1,207 @@
+# static_assets.py
+#
+# Static asset pipeline for the single-page client in client/.
+# Assets are read once at startup and served from memory:
+#   - every asset except HTML gets a content-hashed name (app.js ->
+#     app.1f3a5c7e9b.js) and the references in the HTML pages are rewritten
+#     to it; a changed file gets a new name, so those URLs are cached as
+#     immutable for a year
+#   - HTML pages (index.html) and the original asset names keep
+#     `no-cache`: browsers revalidate them on every visit (a 304 when unchanged)
+#   - gzip and, when the optional `brotli` package is installed, brotli
+#     variants are compressed once at maximum level and picked per request
+#     from Accept-Encoding
+#
+#   python static_assets.py [client]   # print the asset manifest and sizes
+
+import gzip
+import hashlib
+import mimetypes
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from starlette.responses import PlainTextResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from compression import choose_encoding
+from http_cache import etag_matches
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Preferred content codings, best first; identity is always available
+ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+
+_HTML_SUFFIXES = {".html", ".htm"}
+_TEXT_TYPES = {"application/javascript", "application/json", "image/svg+xml"}
+# src="..." / href="..." attributes in HTML
+_REFERENCE_RE = re.compile(r'''(\b(?:src|href)\s*=\s*)(["'])([^"']+)\2''', re.IGNORECASE)
+
+
+@dataclass
+class Asset:
+    """
+    One servable file: its body per content coding and the headers that go
+    with every response for it.
+    """
+    media_type: str
+    etag: str
+    cache_control: str
+    bodies: Dict[str, bytes] = field(default_factory=dict)
+
+    def encodings(self) -> List[str]:
+        return [e for e in ENCODINGS if e in self.bodies]
+
+
+def _media_type(path: Path) -> str:
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    # Starlette adds the charset to text/* itself
+    if media_type in _TEXT_TYPES:
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+def _digest(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=5).hexdigest()
+
+
+def _compress(body: bytes) -> Dict[str, bytes]:
+    """
+    Identity body plus every precompressed variant that is actually smaller.
+    """
+    bodies = {"identity": body}
+    variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=11)
+    for encoding, compressed in variants.items():
+        if len(compressed) < len(body):
+            bodies[encoding] = compressed
+    return bodies
+
+
+def fingerprint(name: str, body: bytes) -> str:
+    """
+    `dir/app.js` -> `dir/app.<hash>.js`, from the content of `body`.
+    """
+    path = Path(name)
+    return str(path.with_name(f"{path.stem}.{_digest(body)}{path.suffix}"))
+
+
+def _rewrite_references(html: str, names: Dict[str, str]) -> str:
+    def replace(match: re.Match) -> str:
+        prefix, quote, url = match.groups()
+        leading = "/" if url.startswith("/") else ""
+        hashed = names.get(url.lstrip("/").removeprefix("./"))
+        if hashed is None:
+            return match.group(0)
+        return f"{prefix}{quote}{leading}{hashed}{quote}"
+
+    return _REFERENCE_RE.sub(replace, html)
+
+
+def build_assets(directory: str) -> Dict[str, Asset]:
+    """
+    Read every file under `directory` and return the assets to serve, keyed
+    by URL path relative to the mount (`app.js`, `app.<hash>.js`, `index.html`).
+    """
+    root = Path(directory)
+    files = {
+        path.relative_to(root).as_posix(): path
+        for path in sorted(root.rglob("*"))
+        if path.is_file() and not path.name.startswith(".")
+    }
+
+    assets: Dict[str, Asset] = {}
+    hashed_names: Dict[str, str] = {}
+    for name, path in files.items():
+        if path.suffix in _HTML_SUFFIXES:
+            continue
+        body = path.read_bytes()
+        bodies = _compress(body)
+        hashed = fingerprint(name, body)
+        hashed_names[name] = hashed
+        etag = f'W/"{_digest(body)}"'
+        media_type = _media_type(path)
+        assets[hashed] = Asset(media_type, etag, IMMUTABLE, bodies)
+        # The original name stays available for pages cached before a deploy
+        assets[name] = Asset(media_type, etag, REVALIDATE, bodies)
+
+    for name, path in files.items():
+        if path.suffix not in _HTML_SUFFIXES:
+            continue
+        html = _rewrite_references(path.read_text(encoding="utf-8"), hashed_names)
+        body = html.encode("utf-8")
+        assets[name] = Asset(_media_type(path), f'W/"{_digest(body)}"', REVALIDATE, _compress(body))
+    return assets
+
+
+class StaticAssets:
+    """
+    ASGI app serving the assets of `directory` from memory, as a drop-in
+    replacement for StaticFiles(directory=..., html=True).
+    """
+
+    def __init__(self, directory: str, index: str = "index.html"):
+        self.index = index
+        self.assets = build_assets(directory)
+
+    def lookup(self, path: str) -> Optional[Asset]:
+        name = path.lstrip("/")
+        if name == "" or name.endswith("/"):
+            name += self.index
+        return self.assets.get(name)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "http"
+        method = scope["method"]
+        if method not in ("GET", "HEAD"):
+            await PlainTextResponse("Method Not Allowed", status_code=405)(scope, receive, send)
+            return
+        asset = self.lookup(scope["path"])
+        if asset is None:
+            await PlainTextResponse("Not Found", status_code=404)(scope, receive, send)
+            return
+
+        request_headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        headers = {
+            "etag": asset.etag,
+            "cache-control": asset.cache_control,
+            "vary": "Accept-Encoding",
+        }
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, asset.etag):
+            await Response(status_code=304, headers=headers)(scope, receive, send)
+            return
+
+        encoding = choose_encoding(request_headers.get("accept-encoding"), asset.encodings())
+        body = asset.bodies[encoding]
+        if encoding != "identity":
+            headers["content-encoding"] = encoding
+        headers["content-length"] = str(len(body))
+        response = Response(
+            body if method == "GET" else b"", headers=headers, media_type=asset.media_type
+        )
+        await response(scope, receive, send)
+
+
+def main() -> None:
+    directory = sys.argv[1] if len(sys.argv) > 1 else "client"
+    assets = build_assets(directory)
+    print(f"{'path':40} {'identity':>9} {'gzip':>7} {'br':>7}  cache-control")
+    for path, asset in sorted(assets.items()):
+        sizes = [str(len(asset.bodies[e])) if e in asset.bodies else "-" for e in ("identity", "gzip", "br")]
+        print(f"{path:40} {sizes[0]:>9} {sizes[1]:>7} {sizes[2]:>7}  {asset.cache_control}")
+    if brotli is None:
+        print("(brotli not installed: gzip only)")
+
+
+if __name__ == "__main__":
+    main()
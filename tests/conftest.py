@@ -0,0 +1,103 @@
+# tests/conftest.py
+#
+# Shared setup for the suite: one throwaway SQLite database, configured
+# before the app is imported. The `client` fixture runs each test that uses
+# it twice, against the sync handlers and against their ASYNC_DB twins
+# (routes/*_async.py); the async run is skipped when aiosqlite is not
+# installed (`poetry install -E async`).
+
+import importlib.util
+import itertools
+import os
+import tempfile
+
+# A throwaway database, set before the app is imported
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}/test.db"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["DB_MIGRATE_ON_STARTUP"] = "true"
+
+# The async engine is built at import time, so it must exist for the ASYNC_DB runs
+ASYNC_DB_AVAILABLE = importlib.util.find_spec("aiosqlite") is not None
+os.environ["ASYNC_DB"] = "true" if ASYNC_DB_AVAILABLE else "false"
+
+import pytest  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+_usernames = (f"user{n}" for n in itertools.count(1))
+
+
+def build_app(async_db: bool) -> FastAPI:
+    """
+    The app as main.create_app builds it with ASYNC_DB on or off.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(main, "ASYNC_DB_ENABLED", async_db)
+        return main.create_app()
+
+
+def register(client: TestClient) -> dict:
+    """
+    Register a new user and family; returns the family id and auth headers.
+    """
+    username = next(_usernames)
+    res = client.post(
+        "/auth/register",
+        json={"username": username, "email": f"{username}@example.com", "password": "pw"},
+    )
+    assert res.status_code == 201, res.text
+    body = res.json()
+    return {
+        "family_id": body["family_id"],
+        "headers": {"Authorization": f"Bearer {body['access_token']}"},
+    }
+
+
+def create_book(client: TestClient, family: dict, title: str = "Matemáticas 3º ESO") -> dict:
+    """
+    Create a book owned by `family`; returns it as BookRead.
+    """
+    res = client.post(
+        "/books",
+        json={"title": title, "author": "Santillana", "owner_id": family["family_id"]},
+        headers=family["headers"],
+    )
+    assert res.status_code == 201, res.text
+    return res.json()
+
+
+@pytest.fixture(scope="session")
+def sync_client():
+    """
+    A client of the app with the sync handlers.
+    """
+    with TestClient(build_app(False)) as client:
+        yield client
+
+
+@pytest.fixture(
+    scope="session",
+    params=[
+        pytest.param(False, id="sync"),
+        pytest.param(True, id="async_db", marks=pytest.mark.skipif(
+            not ASYNC_DB_AVAILABLE, reason="aiosqlite is not installed"
+        )),
+    ],
+)
+def client(request):
+    """
+    A client of the app, once with the sync handlers and once with ASYNC_DB.
+    """
+    with TestClient(build_app(request.param)) as client:
+        yield client
+
+
+@pytest.fixture
+def family(client):
+    """
+    A newly registered family and its auth headers, in `client`'s app.
+    """
+    return register(client)
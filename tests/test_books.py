@@ -0,0 +1,82 @@
+# tests/test_books.py
+#
+# Optimistic concurrency on PUT /books/{id}: the version (and so the ETag)
+# only moves when a field actually changes. POST /books/bulk imports all
+# valid rows, or nothing when the body cannot be decoded.
+
+import pytest
+
+
+@pytest.fixture
+def book(client, family):
+    res = client.post(
+        "/books",
+        json={"title": "Lengua 2º ESO", "author": "Anaya", "owner_id": family["family_id"]},
+        headers=family["headers"],
+    )
+    assert res.status_code == 201, res.text
+    return res.json()
+
+
+def update(client, family, book_id, changes, **headers):
+    return client.put(f"/books/{book_id}", json=changes, headers={**family["headers"], **headers})
+
+
+def test_update_bumps_etag(client, family, book):
+    res = update(client, family, book["id"], {"title": "Lengua 3º ESO"})
+    assert res.status_code == 200, res.text
+    assert res.json()["version"] == book["version"] + 1
+    assert res.headers["etag"] == f'W/"{book["version"] + 1}"'
+
+
+@pytest.mark.parametrize("changes", [{}, {"title": "Lengua 2º ESO", "author": "Anaya"}], ids=["empty", "repeated"])
+def test_noop_update_keeps_etag(client, family, book, changes):
+    etag = f'W/"{book["version"]}"'
+    for _ in range(2):
+        res = update(client, family, book["id"], changes, **{"If-Match": etag})
+        assert res.status_code == 200, res.text
+        assert res.json() == book
+        assert res.headers["etag"] == etag
+
+    res = client.get(f"/books/{book['id']}", headers=family["headers"])
+    assert res.headers["etag"] == etag
+
+
+def test_noop_update_checks_if_match(client, family, book):
+    res = update(client, family, book["id"], {}, **{"If-Match": f'W/"{book["version"] + 1}"'})
+    assert res.status_code == 412
+
+
+def test_update_missing_book(client, family):
+    assert update(client, family, 999_999, {}).status_code == 404
+
+
+def bulk_import(client, family, body):
+    headers = {**family["headers"], "Content-Type": "text/csv"}
+    return client.post("/books/bulk", content=body, headers=headers)
+
+
+def csv_body(family, title, rows):
+    lines = ["title,author,grade,isbn,owner_id"]
+    lines += [f"{title} {n},Edebé,3,,{family['family_id']}" for n in range(rows)]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def test_bulk_import(client, family):
+    title = f"Bulkimported{family['family_id']}"
+    res = bulk_import(client, family, csv_body(family, title, 3))
+    assert res.status_code == 200, res.text
+    assert res.json() == {"inserted": 3, "error_count": 0, "errors": []}
+    res = client.get("/books/search", params={"q": title}, headers=family["headers"])
+    assert len(res.json()) == 3
+
+
+def test_bulk_import_refuses_undecodable_body(client, family):
+    # Enough valid rows that the bad bytes are decoded after the first rows were parsed
+    title = f"Undecodable{family['family_id']}"
+    body = csv_body(family, title, 1_000) + b"\xff\xfe,Edeb\xe9,3,,1\n"
+    res = bulk_import(client, family, body)
+    assert res.status_code == 400
+    assert res.json()["detail"].startswith("Could not parse body:")
+    res = client.get("/books/search", params={"q": title}, headers=family["headers"])
+    assert res.json() == []
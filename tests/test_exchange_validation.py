@@ -0,0 +1,108 @@
+# tests/test_exchange_validation.py
+#
+# Proposal validation (exchange_validation.py): POST /exchanges answers 400
+# with the reason, POST /exchanges/bulk skips invalid proposals and reports
+# each one by its index in the request.
+
+import pytest
+
+from conftest import create_book, register
+
+
+@pytest.fixture
+def families(client, family):
+    """
+    Two families with two books each.
+    """
+    receiver = register(client)
+    for f in (family, receiver):
+        f["books"] = [create_book(client, f), create_book(client, f)]
+    return family, receiver
+
+
+def proposal(proposer, receiver, offered, requested):
+    return {
+        "proposer_family_id": proposer["family_id"],
+        "receiver_family_id": receiver["family_id"],
+        "offered_book_id": offered["id"],
+        "requested_book_id": requested["id"],
+    }
+
+
+def invalid_proposals(proposer, receiver):
+    """
+    (proposal, error) pairs, one per validation rule.
+    """
+    offered, requested = proposer["books"][0], receiver["books"][0]
+    return [
+        (
+            proposal(proposer, proposer, offered, proposer["books"][1]),
+            "A family cannot propose an exchange to itself.",
+        ),
+        (
+            proposal(proposer, receiver, offered, offered),
+            "The offered and requested books must be different.",
+        ),
+        (
+            proposal(proposer, receiver, receiver["books"][1], requested),
+            "The offered book does not belong to the proposing family.",
+        ),
+        (
+            proposal(proposer, receiver, offered, proposer["books"][1]),
+            "The requested book does not belong to the receiving family.",
+        ),
+        (
+            proposal(proposer, receiver, offered, {"id": 999_999}),
+            "One or both book IDs are invalid.",
+        ),
+        (
+            {**proposal(proposer, receiver, offered, requested), "receiver_family_id": 999_999},
+            "One or both family IDs are invalid.",
+        ),
+    ]
+
+
+@pytest.mark.parametrize("rule", range(6), ids=[
+    "self-family", "same-book", "offered-wrong-owner", "requested-wrong-owner",
+    "missing-book", "missing-family",
+])
+def test_invalid_proposal_is_rejected(client, families, rule):
+    proposer, receiver = families
+    body, error = invalid_proposals(proposer, receiver)[rule]
+
+    res = client.post("/exchanges", json=body, headers=proposer["headers"])
+    assert res.status_code == 400
+    assert res.json()["detail"] == error
+
+
+def test_valid_proposal_is_created(client, families):
+    proposer, receiver = families
+    body = proposal(proposer, receiver, proposer["books"][0], receiver["books"][0])
+
+    res = client.post("/exchanges", json=body, headers=proposer["headers"])
+    assert res.status_code == 201, res.text
+    assert res.json()["status"] == "pending"
+
+
+def test_bulk_reports_each_invalid_proposal_by_index(client, families):
+    proposer, receiver = families
+    invalid = invalid_proposals(proposer, receiver)
+    valid = [
+        proposal(proposer, receiver, proposer["books"][0], receiver["books"][0]),
+        proposal(receiver, proposer, receiver["books"][1], proposer["books"][1]),
+    ]
+    # Valid proposals first, last and in between the invalid ones
+    proposals = [valid[0]] + [body for body, _ in invalid[:3]] + [valid[1]] + [body for body, _ in invalid[3:]]
+
+    res = client.post("/exchanges/bulk", json=proposals, headers=proposer["headers"])
+    assert res.status_code == 200, res.text
+    result = res.json()
+
+    assert [
+        (e["offered_book_id"], e["requested_book_id"]) for e in result["created"]
+    ] == [(p["offered_book_id"], p["requested_book_id"]) for p in valid]
+    assert result["error_count"] == len(invalid)
+    assert result["errors"] == [
+        {"index": index, "error": error}
+        for index, (_, error) in zip([1, 2, 3, 5, 6, 7], invalid)
+    ]
@@ -0,0 +1,126 @@
+# tests/test_exchanges.py
+#
+# The exchange state machine behind PUT /exchanges/{id} (versioning.py):
+# pending exchanges can be accepted or rejected once, If-Match guards
+# against lost updates, and accepting rejects the other pending exchanges
+# for either book. POST /exchanges/match only reads them.
+
+import pytest
+
+from conftest import create_book, register
+
+
+def propose(client, proposer, receiver, offered, requested):
+    res = client.post(
+        "/exchanges",
+        json={
+            "proposer_family_id": proposer["family_id"],
+            "receiver_family_id": receiver["family_id"],
+            "offered_book_id": offered["id"],
+            "requested_book_id": requested["id"],
+        },
+        headers=proposer["headers"],
+    )
+    assert res.status_code == 201, res.text
+    return res
+
+
+@pytest.fixture
+def exchange(client, family):
+    """
+    A pending exchange proposed by `family` to a second family.
+    """
+    receiver = register(client)
+    res = propose(client, family, receiver, create_book(client, family), create_book(client, receiver))
+    return res.json()
+
+
+def set_status(client, family, exchange_id, new_status, **headers):
+    return client.put(
+        f"/exchanges/{exchange_id}",
+        json={"status": new_status},
+        headers={**family["headers"], **headers},
+    )
+
+
+@pytest.mark.parametrize("new_status", ["accepted", "rejected"])
+def test_pending_exchange_can_be_settled(client, family, exchange, new_status):
+    res = set_status(client, family, exchange["id"], new_status)
+    assert res.status_code == 200, res.text
+    body = res.json()
+    assert body["status"] == new_status
+    assert body["version"] == exchange["version"] + 1
+    assert res.headers["etag"] == f'W/"{body["version"]}"'
+
+    res = client.get(f"/exchanges/{exchange['id']}", headers=family["headers"])
+    assert res.json()["status"] == new_status
+
+
+@pytest.mark.parametrize("settled", ["accepted", "rejected"])
+@pytest.mark.parametrize("new_status", ["pending", "accepted", "rejected"])
+def test_settled_exchange_cannot_change(client, family, exchange, settled, new_status):
+    assert set_status(client, family, exchange["id"], settled).status_code == 200
+
+    res = set_status(client, family, exchange["id"], new_status)
+    assert res.status_code == 409
+    assert res.json()["detail"] == f"Cannot change exchange status from {settled} to {new_status}."
+
+
+def test_stale_if_match_is_rejected(client, family, exchange):
+    stale = f'W/"{exchange["version"]}"'
+    res = set_status(client, family, exchange["id"], "rejected", **{"If-Match": stale})
+    assert res.status_code == 200, res.text
+
+    # The exchange moved on: the old ETag no longer matches, even for a legal transition
+    assert set_status(client, family, exchange["id"], "accepted", **{"If-Match": stale}).status_code == 412
+
+
+def test_matching_if_match_is_accepted(client, family, exchange):
+    current = f'W/"{exchange["version"]}"'
+    res = set_status(client, family, exchange["id"], "accepted", **{"If-Match": current})
+    assert res.status_code == 200, res.text
+    assert res.json()["status"] == "accepted"
+
+
+def test_missing_exchange(client, family):
+    assert set_status(client, family, 999_999, "accepted").status_code == 404
+    res = set_status(client, family, 999_999, "accepted", **{"If-Match": 'W/"1"'})
+    assert res.status_code == 404
+
+
+def test_accepting_rejects_other_pending_exchanges_for_either_book(client, family):
+    receiver, third = register(client), register(client)
+    offered, requested = create_book(client, family), create_book(client, receiver)
+    other_offered, other_requested = create_book(client, family), create_book(client, receiver)
+    third_book = create_book(client, third)
+
+    accepted = propose(client, family, receiver, offered, requested).json()
+    # Competing proposals for the offered book and for the requested book
+    for_offered = propose(client, third, family, third_book, offered).json()
+    for_requested = propose(client, third, receiver, third_book, requested).json()
+    # Involves neither book: stays pending
+    unrelated = propose(client, family, receiver, other_offered, other_requested).json()
+
+    res = set_status(client, family, accepted["id"], "accepted")
+    assert res.status_code == 200, res.text
+
+    def status_of(exchange):
+        res = client.get(f"/exchanges/{exchange['id']}", headers=family["headers"])
+        return res.json()["status"]
+
+    assert status_of(accepted) == "accepted"
+    assert status_of(for_offered) == "rejected"
+    assert status_of(for_requested) == "rejected"
+    assert status_of(unrelated) == "pending"
+
+
+def test_match_finds_two_way_cycle(client, family):
+    receiver = register(client)
+    offered, requested = create_book(client, family), create_book(client, receiver)
+    propose(client, family, receiver, offered, requested)
+    propose(client, receiver, family, requested, offered)
+
+    res = client.post("/exchanges/match", json={"max_cycle_length": 2}, headers=family["headers"])
+    assert res.status_code == 200, res.text
+    cycles = [{leg["book_id"] for leg in cycle} for cycle in res.json()["cycles"]]
+    assert {offered["id"], requested["id"]} in cycles
@@ -0,0 +1,36 @@
+# tests/test_fast_json.py
+#
+# The fast JSON path (fast_json.py) and the response_model path it replaces
+# (FAST_JSON=false) must send the same bodies and headers.
+
+import pytest
+
+import fast_json
+from conftest import create_book, register
+
+
+@pytest.mark.parametrize("path", ["/books?limit=5&after=", "/books/{id}", "/exchanges?limit=5", "/users?limit=5"])
+def test_fast_json_matches_response_model(client, family, monkeypatch, path):
+    book = create_book(client, family)
+    receiver = register(client)
+    res = client.post(
+        "/exchanges",
+        json={
+            "proposer_family_id": family["family_id"],
+            "receiver_family_id": receiver["family_id"],
+            "offered_book_id": book["id"],
+            "requested_book_id": create_book(client, receiver)["id"],
+        },
+        headers=family["headers"],
+    )
+    assert res.status_code == 201, res.text
+    url = path.format(id=book["id"])
+
+    fast = client.get(url, headers=family["headers"])
+    monkeypatch.setattr(fast_json, "FAST_JSON_ENABLED", False)
+    slow = client.get(url, headers=family["headers"])
+
+    assert fast.status_code == slow.status_code == 200
+    assert fast.json() == slow.json()
+    for header in ("content-type", "etag", "x-next-cursor"):
+        assert fast.headers.get(header) == slow.headers.get(header)
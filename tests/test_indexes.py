@@ -0,0 +1,108 @@
+# tests/test_indexes.py
+#
+# The hot queries must be planned on their indexes (migrations/): family
+# inbox and outbox, pending exchanges per book, books per family. Seeds a
+# synthetic dataset into its own SQLite database, runs EXPLAIN QUERY PLAN
+# on each query and looks for the expected index in the plan.
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlmodel import Session, select, text
+
+from migrate import upgrade
+from models import Book, Exchange, ExchangeStatus, Family
+
+FAMILIES = 500
+EXCHANGES = 10_000
+
+pending = ExchangeStatus.pending
+CHECKS = [
+    pytest.param(
+        select(Book).where(Book.owner_id == 7),
+        "ix_book_owner_id",
+        id="books owned by a family",
+    ),
+    pytest.param(
+        select(Exchange)
+        .where(Exchange.receiver_family_id == 7, Exchange.status == pending)
+        .order_by(Exchange.created_at.desc())
+        .limit(20),
+        "ix_exchange_receiver_status_created",
+        id="family inbox by status, newest first",
+    ),
+    pytest.param(
+        select(Exchange)
+        .where(Exchange.proposer_family_id == 7, Exchange.status == pending)
+        .order_by(Exchange.created_at.desc())
+        .limit(20),
+        "ix_exchange_proposer_status_created",
+        id="family outbox by status, newest first",
+    ),
+    pytest.param(
+        select(Exchange.id).where(Exchange.requested_book_id == 42, Exchange.status == pending),
+        "ix_exchange_pending_requested_book",
+        id="pending exchanges requesting a book",
+    ),
+    pytest.param(
+        select(Exchange.id).where(Exchange.offered_book_id == 42, Exchange.status == pending),
+        "ix_exchange_pending_offered_book",
+        id="pending exchanges offering a book",
+    ),
+]
+
+
+@pytest.fixture(scope="module")
+def seeded_engine(tmp_path_factory):
+    """
+    A migrated SQLite database with a few thousand families, books and
+    exchanges, mostly settled, and fresh planner statistics.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('explain')}/explain.db")
+    upgrade(engine)
+    rng = random.Random(42)
+    statuses = [ExchangeStatus.pending] + [ExchangeStatus.accepted, ExchangeStatus.rejected] * 4
+    started = datetime.utcnow() - timedelta(days=365)
+
+    with Session(engine) as session:
+        session.execute(
+            Family.__table__.insert(),
+            [{"id": i, "name": f"Family {i}", "email": f"family{i}@example.com"} for i in range(1, FAMILIES + 1)],
+        )
+        session.execute(
+            Book.__table__.insert(),
+            [
+                {"id": i, "title": f"Book {i}", "author": "Anon", "owner_id": (i % FAMILIES) + 1}
+                for i in range(1, FAMILIES * 5 + 1)
+            ],
+        )
+        session.execute(
+            Exchange.__table__.insert(),
+            [
+                {"proposer_family_id": rng.randint(1, FAMILIES),
+                 "receiver_family_id": rng.randint(1, FAMILIES),
+                 "offered_book_id": rng.randint(1, FAMILIES * 5),
+                 "requested_book_id": rng.randint(1, FAMILIES * 5),
+                 "status": rng.choice(statuses).name,
+                 "created_at": started + timedelta(seconds=i * 60),
+                 "updated_at": started + timedelta(seconds=i * 60)}
+                for i in range(EXCHANGES)
+            ],
+        )
+        session.commit()
+        session.execute(text("ANALYZE"))
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize("statement, index_name", CHECKS)
+def test_query_uses_index(seeded_engine, statement, index_name):
+    sql = str(statement.compile(dialect=seeded_engine.dialect, compile_kwargs={"literal_binds": True}))
+    with seeded_engine.connect() as conn:
+        plan = "\n".join(
+            " ".join(str(col) for col in row) for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))
+        )
+    assert index_name in plan, f"expected {index_name} in the plan of:\n{sql}\n{plan}"
@@ -0,0 +1,84 @@
+# tests/test_query_budget.py
+#
+# The query budget pytest plugin (pytest_query_budget.py), loaded for the
+# whole suite from [tool.pytest.ini_options]: budgeted routes run within
+# their budget, an overrun fails the test, and exempt tests only log it.
+
+from pathlib import Path
+
+from conftest import register
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# A minimal app whose only route is budgeted at 0 statements but runs one
+OVER_BUDGET_TESTS = '''
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+import query_budget
+
+engine = create_engine("sqlite://")
+query_budget.track_queries(engine)
+app = FastAPI()
+app.add_middleware(query_budget.QueryBudgetMiddleware)
+
+
+@app.get("/select")
+@query_budget.query_budget(0)
+def select_one():
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return {}
+
+
+client = TestClient(app)
+
+
+def test_over_budget():
+    assert client.get("/select").status_code == 200
+
+
+@pytest.mark.query_budget_exempt
+def test_exempt(caplog, query_reports):
+    with caplog.at_level(logging.WARNING, logger="query_budget"):
+        assert client.get("/select").status_code == 200
+    assert query_reports[-1].over_budget
+    assert "Query budget exceeded" in caplog.text
+'''
+
+
+def test_budgeted_route_within_budget(sync_client, query_reports):
+    family = register(sync_client)
+    res = sync_client.post(
+        "/books",
+        json={"title": "Matemáticas 3º ESO", "author": "Santillana", "owner_id": family["family_id"]},
+        headers=family["headers"],
+    )
+    assert res.status_code == 201, res.text
+
+    res = sync_client.get("/books", headers=family["headers"])
+    assert res.status_code == 200
+    assert res.json()
+
+    report = query_reports[-1]
+    assert report.endpoint == "routes.books.list_books"
+    assert report.budget == 2
+    assert 0 < report.count <= report.budget
+    assert not report.over_budget
+
+
+def test_over_budget_fails_and_exempt_only_logs(pytester, monkeypatch):
+    monkeypatch.setenv("PYTHONPATH", str(ROOT))
+    pytester.makepyfile(test_over_budget=OVER_BUDGET_TESTS)
+    result = pytester.runpytest_subprocess("-p", "pytest_query_budget")
+
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines([
+        "*_ test_over_budget _*",
+        "Query budget exceeded:",
+        "*GET /select (test_over_budget.select_one) ran 1 SQL statements, budget 0*",
+    ])
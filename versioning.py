@@ -0,0 +1,197 @@
+# versioning.py
+#
+# Optimistic concurrency for books and exchanges.
+# Each row carries a `version` counter that every write bumps. Clients get it
+# as an ETag and may send it back in If-Match; writes are conditional UPDATEs
+# (WHERE id = ? AND version = ? ...), so no row is locked between read and
+# write and a lost update surfaces as 412 instead of silently overwriting.
+#
+# An update that changes nothing keeps the version, so it does not invalidate
+# the ETags clients hold.
+#
+# Exchange status follows a state machine: pending -> accepted | rejected.
+# Accepting an exchange rejects every other pending exchange involving either
+# of its books, in the same transaction.
+
+import re
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Optional, Set
+
+from fastapi import HTTPException, status
+from sqlalchemy import exc, or_, select, update
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import Exchange, ExchangeStatus
+
+ALLOWED_TRANSITIONS: Dict[ExchangeStatus, FrozenSet[ExchangeStatus]] = {
+    ExchangeStatus.pending: frozenset({ExchangeStatus.accepted, ExchangeStatus.rejected}),
+    ExchangeStatus.accepted: frozenset(),
+    ExchangeStatus.rejected: frozenset(),
+}
+
+_ENTITY_TAG_RE = re.compile(r'(?:W/)?"([^"]*)"')
+
+# SQLSTATEs for serialization failure / deadlock: safe for the client to retry
+_RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+
+def etag_for(version: int) -> str:
+    """
+    ETag for a row version. Weak, since the same version may be sent with
+    different encodings.
+    """
+    return f'W/"{version}"'
+
+
+def parse_if_match(header: Optional[str]) -> Optional[Set[int]]:
+    """
+    Versions accepted by an If-Match header, or None when any version will do
+    (no header, or `*`). Tags that are not ours match nothing.
+    Weak tags are compared by value: a row version identifies the row state.
+    """
+    if header is None or header.strip() == "*":
+        return None
+    versions = set()
+    for tag in _ENTITY_TAG_RE.findall(header):
+        if tag.isdigit():
+            versions.add(int(tag))
+    return versions
+
+
+def precondition_failed(kind: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail=f"{kind} was modified since it was fetched (If-Match does not match its ETag).",
+    )
+
+
+def field_update_statement(model, row_id: int, updates: Dict, versions: Optional[Set[int]]):
+    """
+    Conditional UPDATE applying `updates` (non-empty) to one row and bumping
+    its version. It matches no row when every value is already current, or,
+    with If-Match, when the row is at none of `versions`.
+    """
+    statement = update(model).where(
+        model.id == row_id,
+        or_(*(getattr(model, name).is_distinct_from(value) for name, value in updates.items())),
+    )
+    if versions is not None:
+        statement = statement.where(model.version.in_(versions))
+    return statement.values(**updates, version=model.version + 1)
+
+
+def transition_statement(
+    exchange_id: int,
+    new_status: ExchangeStatus,
+    versions: Optional[Set[int]],
+    now: datetime,
+):
+    """
+    Conditional UPDATE moving one exchange to `new_status`. It matches no
+    row unless the exchange is in a state that allows the transition (and,
+    with If-Match, still at one of `versions`).
+    """
+    sources = [s.value for s, targets in ALLOWED_TRANSITIONS.items() if new_status in targets]
+    statement = update(Exchange).where(Exchange.id == exchange_id, Exchange.status.in_(sources))
+    if versions is not None:
+        statement = statement.where(Exchange.version.in_(versions))
+    return statement.values(
+        status=new_status.value, version=Exchange.version + 1, updated_at=now
+    ).execution_options(synchronize_session=False)
+
+
+def transition_error(
+    current: Optional[Exchange],
+    new_status: ExchangeStatus,
+    versions: Optional[Set[int]],
+) -> HTTPException:
+    """
+    Explain why `transition_statement` matched no row, given the exchange as
+    it is now: 404 if gone, 412 on an If-Match mismatch, 409 if the state
+    machine does not allow the transition.
+    """
+    if current is None:
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Exchange not found.")
+    if versions is not None and current.version not in versions:
+        return precondition_failed("Exchange")
+    current_status = ExchangeStatus(current.status)
+    if new_status not in ALLOWED_TRANSITIONS[current_status]:
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot change exchange status from {current_status.value} to {new_status.value}.",
+        )
+    return concurrent_update_conflict()
+
+
+def concurrent_update_conflict() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Exchange was changed by a concurrent request; fetch it and retry.",
+    )
+
+
+def is_retryable(error: exc.DBAPIError) -> bool:
+    """
+    True for serialization failures and deadlocks between concurrent accepts
+    of exchanges that share a book (PostgreSQL aborts one of them).
+    """
+    return getattr(error.orig, "pgcode", None) in _RETRYABLE_SQLSTATES
+
+
+def _conflicting_pending(exchange_id: int):
+    """
+    Other pending exchanges that offer or request a book of `exchange_id`.
+    """
+    books = (
+        select(Exchange.offered_book_id).where(Exchange.id == exchange_id)
+        .union_all(select(Exchange.requested_book_id).where(Exchange.id == exchange_id))
+        .scalar_subquery()
+    )
+    return [
+        Exchange.status == ExchangeStatus.pending.value,
+        Exchange.id != exchange_id,
+        or_(Exchange.offered_book_id.in_(books), Exchange.requested_book_id.in_(books)),
+    ]
+
+
+def _reject_statement(where, now: datetime):
+    return (
+        update(Exchange)
+        .where(*where)
+        .values(status=ExchangeStatus.rejected.value, version=Exchange.version + 1, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reject_conflicting_exchanges(session: Session, exchange_id: int, now: datetime) -> List[int]:
+    """
+    Reject every other pending exchange for the books of `exchange_id`, in one
+    UPDATE, and return their ids. Uses UPDATE ... RETURNING where the dialect
+    supports it; otherwise (SQLite) the ids are selected first, which is exact
+    because the transaction already holds SQLite's write lock.
+    """
+    where = _conflicting_pending(exchange_id)
+    if session.get_bind().dialect.full_returning:
+        result = session.execute(_reject_statement(where, now).returning(Exchange.id))
+        return list(result.scalars())
+    ids = list(session.execute(select(Exchange.id).where(*where)).scalars())
+    if ids:
+        session.execute(_reject_statement([Exchange.id.in_(ids)], now))
+    return ids
+
+
+async def reject_conflicting_exchanges_async(
+    session: AsyncSession, exchange_id: int, now: datetime
+) -> List[int]:
+    """
+    Same as reject_conflicting_exchanges, on an AsyncSession.
+    """
+    where = _conflicting_pending(exchange_id)
+    if session.bind.dialect.full_returning:
+        result = await session.execute(_reject_statement(where, now).returning(Exchange.id))
+        return list(result.scalars())
+    ids = list((await session.execute(select(Exchange.id).where(*where))).scalars())
+    if ids:
+        await session.execute(_reject_statement([Exchange.id.in_(ids)], now))
+    return ids